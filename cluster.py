@@ -0,0 +1,196 @@
+"""
+Cluster launcher: runs the bot from main.py as several worker processes, each an
+AutoShardedBot that opens its own contiguous range of the bot's shards.
+
+Every worker handles only the servers on its shards, so it also owns their games and keeps
+them in its own session file (data/sessions-<worker>.sqlite3). Game results and
+leaderboards stay shared in data/stats.sqlite3. Keep the numbers of workers and shards the
+same across restarts so each worker picks its running games back up.
+
+The supervisor starts the workers and restarts any that crash, waiting longer after each
+crash that follows soon after a start. Shards identify in turns from the cluster's start
+time, as many at once as Discord allows the bot. Workers reach each other through the
+supervisor, which relays owner commands such as ``load`` and ``reload`` to every worker.
+
+Usage (from the repository root):
+    python cluster.py [--workers N] [--shards N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import secrets
+import signal
+import sys
+import time
+
+import aiohttp
+
+from config import BOT_TOKEN
+from utils.cluster import HOST, send_message
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_DELAY = 1.0       # Seconds before restarting a crashed worker
+MAX_RESTART_DELAY = 60.0  # The delay doubles for each crash soon after a start, up to this
+STABLE_AFTER = 60.0       # A worker that ran this long resets the delay
+STOP_TIMEOUT = 20.0       # Seconds workers get to save their games when stopping
+
+
+async def recommended_shards():
+    """The shard count and identify concurrency Discord recommends for this bot."""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_URL, headers={"Authorization": f"Bot {BOT_TOKEN}"}) as response:
+            response.raise_for_status()
+            data = await response.json()
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def shard_ranges(shards, workers):
+    """Split shards 0..shards-1 into ``workers`` contiguous ranges of (nearly) equal size."""
+    return [list(range(shards * n // workers, shards * (n + 1) // workers)) for n in range(workers)]
+
+
+class Supervisor:
+    def __init__(self, shard_count, workers, concurrency):
+        self.shard_count = shard_count
+        self.ranges = shard_ranges(shard_count, workers)
+        self.concurrency = concurrency
+        self.secret = secrets.token_hex(16)
+        self.started = time.time()
+        self.port = None
+        self.stopping = asyncio.Event()
+        self.processes = {}    # cluster id -> running worker process
+        self.connections = {}  # cluster id -> stream to that worker
+
+    async def run(self):
+        server = await asyncio.start_server(self._connection, HOST, 0)
+        self.port = server.sockets[0].getsockname()[1]
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stopping.set)
+            except NotImplementedError:
+                pass  # Windows: Ctrl+C reaches the workers directly
+        print(f"Starting {len(self.ranges)} workers for {self.shard_count} shards")
+        async with server:
+            await asyncio.gather(*(self.supervise(cluster_id) for cluster_id in range(len(self.ranges))))
+            await self.disconnect()
+
+    async def disconnect(self):
+        """Close the links to workers, letting their relays finish before the event loop stops."""
+        for writer in list(self.connections.values()):
+            writer.close()
+            await writer.wait_closed()
+        await asyncio.sleep(0)
+
+    def environment(self, cluster_id):
+        return {
+            **os.environ,
+            "CLUSTER_ID": str(cluster_id),
+            "CLUSTER_WORKERS": str(len(self.ranges)),
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": ",".join(map(str, self.ranges[cluster_id])),
+            "CLUSTER_PORT": str(self.port),
+            "CLUSTER_SECRET": self.secret,
+            "CLUSTER_STARTED": str(self.started),
+            "IDENTIFY_CONCURRENCY": str(self.concurrency),
+        }
+
+    async def supervise(self, cluster_id):
+        """Run one worker until the cluster stops, restarting it whenever it crashes."""
+        shards = self.ranges[cluster_id]
+        delay = RESTART_DELAY
+        while not self.stopping.is_set():
+            start = time.monotonic()
+            process = self.processes[cluster_id] = await asyncio.create_subprocess_exec(
+                sys.executable, os.path.join(ROOT_DIR, "main.py"), cwd=ROOT_DIR, env=self.environment(cluster_id)
+            )
+            print(f"Worker {cluster_id} (shards {shards[0]}-{shards[-1]}) started, pid {process.pid}")
+            stopping = asyncio.create_task(self.stopping.wait())
+            exited = asyncio.create_task(process.wait())
+            await asyncio.wait((stopping, exited), return_when=asyncio.FIRST_COMPLETED)
+            stopping.cancel()
+            if not exited.done():
+                await self.stop(cluster_id, process)
+                break
+            code = exited.result()
+            if code == 0:
+                print(f"Worker {cluster_id} stopped")
+                break
+            if time.monotonic() - start > STABLE_AFTER:
+                delay = RESTART_DELAY
+            print(f"Worker {cluster_id} exited with code {code}, restarting in {delay:.0f}s")
+            try:
+                await asyncio.wait_for(self.stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+        self.processes.pop(cluster_id, None)
+
+    async def stop(self, cluster_id, process):
+        if process.returncode is None:
+            process.terminate()  # Workers close the bot on SIGTERM, writing out their games
+        try:
+            await asyncio.wait_for(process.wait(), STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Worker {cluster_id} didn't stop in {STOP_TIMEOUT:.0f}s, killing it")
+            process.kill()
+            await process.wait()
+
+    async def _connection(self, reader, writer):
+        """Relay one worker's broadcasts to the others and their replies back to it."""
+        cluster_id = None
+        try:
+            hello = json.loads(await reader.readline())
+            if not hmac.compare_digest(str(hello.get("secret", "")), self.secret):
+                return
+            cluster_id = hello["hello"]
+            self.connections[cluster_id] = writer
+            while line := await reader.readline():
+                message = json.loads(line)
+                if "op" in message:
+                    others = {other: stream for other, stream in self.connections.items() if other != cluster_id}
+                    await send_message(writer, {"reply": message["id"], "forwarded": list(others)})
+                    for stream in others.values():
+                        await self._relay(stream, {**message, "from": cluster_id})
+                elif "reply" in message:
+                    stream = self.connections.get(message.pop("to"))
+                    if stream is not None:
+                        await self._relay(stream, message)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Dropped worker {cluster_id} connection: {e!r}")
+        finally:
+            if self.connections.get(cluster_id) is writer:
+                del self.connections[cluster_id]
+            writer.close()
+
+    @staticmethod
+    async def _relay(writer, message):
+        try:
+            await send_message(writer, message)
+        except OSError:
+            pass  # That worker is gone; the sender's broadcast times out waiting for it
+
+
+async def run(workers, shards, concurrency):
+    if shards is None:
+        shards, recommended_concurrency = await recommended_shards()
+        concurrency = concurrency or recommended_concurrency
+        print(f"Discord recommends {shards} shards")
+    shards = max(shards, workers)  # Every worker needs at least one shard
+    await Supervisor(shards, workers, concurrency or 1).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: one per CPU)")
+    parser.add_argument("--shards", type=int, help="total shards (default: Discord's recommendation)")
+    parser.add_argument("--concurrency", type=int, help="shards that may identify at once (default: Discord's limit, or 1 with --shards)")
+    args = parser.parse_args()
+    asyncio.run(run(args.workers, args.shards, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
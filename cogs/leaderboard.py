@@ -0,0 +1,60 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.stats import LEADERBOARDS, get_stats
+
+class Leaderboard(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.stats = get_stats(bot)
+
+    async def cog_load(self):
+        # Read the leaderboards from disk once; after this they are served from memory
+        await self.stats.load()
+
+    def format_score(self, game, best):
+        if game == "tictactoe":
+            return f"{best} win{'s' if best != 1 else ''}"
+        if game == "wordle":
+            return f"{best} guess{'es' if best != 1 else ''}"
+        if game == "memory":
+            minutes, seconds = divmod(best, 60)
+            return f"{minutes:02}:{seconds:02}"
+        return f"Round {best}"
+
+    @commands.hybrid_command(name="leaderboard", description="Show the best players of a game")
+    @app_commands.describe(game="The game to rank", scope="This server's players or everyone's")
+    @app_commands.choices(
+        game=[app_commands.Choice(name=leaderboard.title, value=game) for game, leaderboard in LEADERBOARDS.items()],
+        scope=[app_commands.Choice(name="Server", value="server"), app_commands.Choice(name="Global", value="global")]
+    )
+    async def leaderboard(self, ctx, game: str, scope: str = "server"):
+        """Show the top players of a game in this server or globally."""
+        game = game.lower()
+        if game not in LEADERBOARDS:
+            await ctx.send(embed=discord.Embed(
+                title="Unknown Game",
+                description=f"Choose one of: {', '.join(LEADERBOARDS)}.",
+                color=discord.Color.red()
+            ))
+            return
+
+        # Outside a server there is only the global leaderboard
+        is_global = scope.lower() == "global" or ctx.guild is None
+        leaderboard = LEADERBOARDS[game]
+        entries = self.stats.top(game, None if is_global else ctx.guild.id)
+
+        lines = [
+            f"**{position}.** <@{user_id}> - {self.format_score(game, best)} ({games} game{'s' if games != 1 else ''})"
+            for position, (user_id, best, games) in enumerate(entries, 1)
+        ]
+        embed = discord.Embed(
+            title=f"{leaderboard.title} Leaderboard ({'Global' if is_global else ctx.guild.name})",
+            description="\n".join(lines) or "No games have been finished yet. Be the first!",
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=leaderboard.metric)
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+async def setup(bot):
+    await bot.add_cog(Leaderboard(bot))
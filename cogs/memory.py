@@ -1,11 +1,18 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import random
 import asyncio
+import functools
 import time
+from utils.timeouts import get_scheduler
+from utils.sessions import MemorySession
+from utils.frames import StaticView
+from utils.store import get_store
+from utils.edits import get_edits
+from utils.stats import get_stats
+from utils.router import get_router, make_custom_id
 
 #------------------Game Settings------------------#
-CHECK_FREQUENCY = 1                               #
 TIMEOUT_DURATION = 5                              #
 #-------------------------------------------------#
 
@@ -13,13 +20,39 @@ TIMEOUT_DURATION = 5                              #
 class MemoryMatchingGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.games = {}
+        self.games = {}   # game id -> session
+        self.active = {}  # (channel id, owner id) -> game id; one game per player per channel
         self.emoji_list = ["🍎", "🍌", "🍒", "🍇", "🍉", "🍍", "🍓", "🍑", "🍊", "🍋", "🍏", "🥝"]
         self.game_timeout = TIMEOUT_DURATION
-        self.check_game_timeouts.start()
+        self.timeouts = get_scheduler(bot)
+        self.store = get_store(bot)
+        self.edits = get_edits(bot)
+        self.stats = get_stats(bot)
+
+    async def cog_load(self):
+        # Restore games that were running before a restart or reload; their buttons keep
+        # working because clicks are routed by the game id in their custom_ids
+        for game, _ in await self.store.restore("memory", MemorySession):
+            self.add_game(game)
+            self.timeouts.schedule(("memory", game.game_id), self.game_timeout, functools.partial(self.handle_timeout, game.game_id))
+        # Only take clicks once the games are back; if restoring fails the cog isn't loaded
+        get_router(self.bot).register("memory", self.handle_interaction)
 
     def cog_unload(self):
-        self.check_game_timeouts.cancel()
+        self.timeouts.cancel_namespace("memory")
+        get_router(self.bot).unregister("memory")
+
+    def add_game(self, game):
+        self.games[game.game_id] = game
+        self.active[(game.channel_id, game.owner)] = game.game_id
+
+    def end_game(self, game_id):
+        """Remove a game and its pending timeout."""
+        game = self.games.pop(game_id, None)
+        if game is not None and self.active.get((game.channel_id, game.owner)) == game_id:
+            del self.active[(game.channel_id, game.owner)]
+        self.timeouts.cancel(("memory", game_id))
+        self.store.delete("memory", game_id)
 
     def shuffle_emoji_pairs(self):
         grid_size = 24
@@ -40,58 +73,48 @@ class MemoryMatchingGame(commands.Cog):
         for i in range(25):
             if i == 24:
                 button = discord.ui.Button(
-                    label="Start Game" if not game["game_started"] else "Quit Game",
-                    style=discord.ButtonStyle.danger if game["game_started"] else discord.ButtonStyle.primary,
-                    custom_id="start_game"
+                    label="Start Game" if not game.game_started else "Quit Game",
+                    style=discord.ButtonStyle.danger if game.game_started else discord.ButtonStyle.primary,
+                    custom_id=make_custom_id("memory", game.game_id, "start")
                 )
-            elif i in game["matched"]:
+            elif game.is_matched(i):
                 button = discord.ui.Button(
-                    label=game["emoji_pairs"][i],
+                    label=game.emoji_pairs[i],
                     style=discord.ButtonStyle.success,
                     disabled=True,
-                    custom_id=str(i)
+                    custom_id=make_custom_id("memory", game.game_id, i)
                 )
-            elif i in game["revealed"]:
+            elif game.is_revealed(i):
                 button = discord.ui.Button(
-                    label=game["emoji_pairs"][i],
+                    label=game.emoji_pairs[i],
                     style=discord.ButtonStyle.primary,
                     disabled=False,
-                    custom_id=str(i)
+                    custom_id=make_custom_id("memory", game.game_id, i)
                 )
             else:
                 button = discord.ui.Button(
                     label="❓",
                     style=discord.ButtonStyle.secondary,
-                    custom_id=str(i),
-                    disabled=not game["game_started"]
+                    custom_id=make_custom_id("memory", game.game_id, i),
+                    disabled=not game.game_started
                 )
             view.add_item(button)
 
-        return view
+        # Clicks are dispatched by the router, so only the component payload is kept
+        return StaticView.from_view(view)
 
     @commands.hybrid_command(name="memory", with_app_command=True)
     async def start_game(self, ctx):
-        if ctx.channel.id in self.games:
+        # Each player can run one game per channel; other players can start their own alongside it
+        if (ctx.channel.id, ctx.author.id) in self.active:
             await ctx.send(embed=discord.Embed(
                 title="Game Already Active",
-                description="A memory matching game is already active in this channel! Please finish the current game before starting a new one.",
+                description="You already have a memory matching game running in this channel! Please finish it before starting a new one.",
                 color=discord.Color.red()
             ))
             return
 
-        emoji_pairs = self.shuffle_emoji_pairs()
-        game_state = {
-            "emoji_pairs": emoji_pairs,
-            "revealed": [],
-            "matched": [],
-            "current_turn": [],
-            "owner": ctx.author.id,
-            "start_time": None,
-            "game_started": False,
-            "is_processing": False,
-            "last_interaction_time": time.time(),
-            "message_id": None
-        }
+        game_state = MemorySession(self.shuffle_emoji_pairs(), ctx.author.id, game_id=ctx.message.id, channel_id=ctx.channel.id)
 
         embed = discord.Embed(
             title="Memory Matching Game Started!",
@@ -105,19 +128,21 @@ class MemoryMatchingGame(commands.Cog):
         )
 
         message = await ctx.send(embed=embed, view=self.create_game_view(game_state))
-        game_state["message_id"] = message.id
-        self.games[ctx.channel.id] = game_state
+        game_state.message_id = message.id
+        self.add_game(game_state)
+        self.store.save("memory", game_state.game_id, game_state)
+        self.timeouts.schedule(("memory", game_state.game_id), self.game_timeout, functools.partial(self.handle_timeout, game_state.game_id))
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
+    async def handle_interaction(self, interaction: discord.Interaction, game_id, action):
+        """Handle a click on one of this cog's buttons (custom_id ``memory:<game id>:<cell>`` or ``memory:<game id>:start``)."""
         if interaction.user.bot:
             return
 
-        game = self.games.get(interaction.channel.id)
+        game = self.games.get(game_id)
         if not game:
-            return
+            return  # A button on a board whose game has ended
         
-        if interaction.user.id != game["owner"]:
+        if interaction.user.id != game.owner:
             await interaction.response.send_message(embed=discord.Embed(
                 title="Not Your Game!",
                 description="Only the person who started the game can play it! Start your own game using the `/memory` command.",
@@ -125,21 +150,35 @@ class MemoryMatchingGame(commands.Cog):
             ), ephemeral=True)
             return
 
-        game['last_interaction_time'] = time.time()
-        custom_id = interaction.data.get("custom_id")
-        if not custom_id:
-            return
-
-        if custom_id == "start_game":
-            if not game["game_started"]:
-                game["game_started"] = True
-                game["start_time"] = time.time()
-                game["is_processing"] = False
+        self.timeouts.reschedule(("memory", game_id), self.game_timeout)
+
+        # Clicks on the same game are applied one at a time, in order, instead of being turned away
+        async with game.lock:
+            if self.games.get(game_id) is not game:
+                return  # Ended while this click was waiting
+            try:
+                update = await self.handle_click(interaction, game, action)
+            except Exception as e:
+                print(f"Error in game interaction: {e}")
+                return
+
+        # The Game Over edit can be paced by rate limits, so it is sent after the lock is released
+        if update is not None:
+            await self.edits.edit(interaction.message, **update)
+
+    async def handle_click(self, interaction, game, action):
+        """Apply one click to the game. Returns the final message edit when the game ends, else None."""
+        if action == "start":
+            if not game.game_started:
+                game.game_started = True
+                game.start_time = time.time()
+                self.store.save("memory", game.game_id, game)
                 await interaction.response.edit_message(
                     content="The game has started! Enjoy!", 
                     view=self.create_game_view(game)
                 )
             else:
+                self.end_game(game.game_id)
                 await interaction.response.edit_message(
                     content=None, 
                     embed=discord.Embed(
@@ -149,95 +188,74 @@ class MemoryMatchingGame(commands.Cog):
                     ), 
                     view=None
                 )
-                del self.games[interaction.channel.id]
-            return
+            return None
 
-        if not game["game_started"]:
+        if not game.game_started:
             await interaction.response.send_message(
                 "The game hasn't started yet. Press 'Start Game' to begin!", 
                 ephemeral=True
             )
-            return
+            return None
 
-        if game["is_processing"]:
-            await interaction.response.send_message(
-                "Please wait, the game is processing the previous move.", 
-                ephemeral=True
-            )
-            return
-
-        button_index = int(custom_id)
-        if button_index in game["matched"] or button_index in game["current_turn"]:
+        button_index = int(action)
+        if game.is_matched(button_index) or button_index in game.current_turn:
             await interaction.response.send_message(
                 "This button is already revealed or matched!", 
                 ephemeral=True
             )
-            return
+            return None
+
+        game.revealed |= 1 << button_index
+        game.current_turn += (button_index,)
+        self.store.save("memory", game.game_id, game)
+        await interaction.response.edit_message(view=self.create_game_view(game))
+
+        if len(game.current_turn) < 2:
+            return None
+
+        await asyncio.sleep(0.3)
+
+        first_index, second_index = game.current_turn
+        pair_mask = 1 << first_index | 1 << second_index
+        if game.emoji_pairs[first_index] == game.emoji_pairs[second_index]:
+            game.matched |= pair_mask
+        else:
+            game.revealed &= ~pair_mask
+
+        game.current_turn = ()
+        self.store.save("memory", game.game_id, game)
+        # Not awaited: on the last pair this is merged into the Game Over edit
+        self.edits.submit(interaction.message, view=self.create_game_view(game))
+
+        if game.pairs_left:
+            return None
+
+        elapsed_time = time.time() - game.start_time
+        minutes, seconds = divmod(int(elapsed_time), 60)
+        time_display = f"{minutes:02}:{seconds:02}"
+        self.end_game(game.game_id)
+        self.stats.record("memory", interaction.guild_id, game.owner, int(elapsed_time))
+        return {
+            "embed": discord.Embed(
+                title="Game Over",
+                description=f"🎉 {interaction.user.mention} found all pairs! The game is over.\n\nTotal Time: {time_display}",
+                color=discord.Color.green()
+            ),
+            "view": None
+        }
 
-        game["is_processing"] = True
-
-        try:
-            game["revealed"].append(button_index)
-            game["current_turn"].append(button_index)
-            await interaction.response.edit_message(view=self.create_game_view(game))
-
-            if len(game["current_turn"]) == 2:
-                await asyncio.sleep(0.3)
-
-                first_index, second_index = game["current_turn"]
-                if game["emoji_pairs"][first_index] == game["emoji_pairs"][second_index]:
-                    game["matched"].extend([first_index, second_index])
-                else:
-                    game["revealed"] = [idx for idx in game["revealed"] if idx not in game["current_turn"]]
-
-                game["current_turn"] = []
-                await interaction.message.edit(view=self.create_game_view(game))
-
-                if len(game["matched"]) == len(game["emoji_pairs"]) - 1:
-                    elapsed_time = time.time() - game["start_time"]
-                    minutes, seconds = divmod(int(elapsed_time), 60)
-                    time_display = f"{minutes:02}:{seconds:02}"
-
-                    channel = self.bot.get_channel(interaction.channel_id)
-                    message = await channel.fetch_message(game["message_id"])
-                    await message.edit(embed=discord.Embed(
-                        title="Game Over",
-                        description=f"🎉 {interaction.user.mention} found all pairs! The game is over.\n\nTotal Time: {time_display}",
-                        color=discord.Color.green()
-                    ), view=None)
-                    del self.games[interaction.channel.id]
-
-        except Exception as e:
-            print(f"Error in game interaction: {e}")
-        finally:
-            game["is_processing"] = False
-
-    @tasks.loop(seconds=CHECK_FREQUENCY)
-    async def check_game_timeouts(self):
-        current_time = time.time()
-        channels_to_remove = []
-
-        for channel_id, game in self.games.items():
-            if (current_time - game["last_interaction_time"]) > self.game_timeout:
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    message = await channel.fetch_message(game["message_id"])
-                    await message.edit(embed=discord.Embed(
-                        title="Game Timed Out",
-                        description=f"Hey {self.bot.get_user(game['owner']).mention}! A good programmer never forgets to deallocate system resources after use and this timeout ensures that ;)\n Creating a game uses memory, quitting one frees the memory.\n So don't forget to hit the `quit` button if you're leaving!",
-                        color=discord.Color.red()
-                    ), view=None)
-                except Exception as e:
-                    print(f"Error in timeout handling for channel {channel_id}: {e}")
-                finally:
-                    channels_to_remove.append(channel_id)
-
-        for channel_id in channels_to_remove:
-            del self.games[channel_id]
-
-    @check_game_timeouts.before_loop
-    async def before_check_game_timeouts(self):
-        await self.bot.wait_until_ready()
+    async def handle_timeout(self, game_id):
+        """End a game that has been inactive for longer than the timeout."""
+        game = self.games.get(game_id)
+        if game is None:
+            return
+        self.end_game(game_id)
+        message = self.bot.get_partial_messageable(game.channel_id).get_partial_message(game.message_id)
+        await self.edits.edit(message, embed=discord.Embed(
+            title="Game Timed Out",
+            description=f"Hey <@{game.owner}>! A good programmer never forgets to deallocate system resources after use and this timeout ensures that ;)\n Creating a game uses memory, quitting one frees the memory.\n So don't forget to hit the `quit` button if you're leaving!",
+            color=discord.Color.red()
+        ), view=None)
 
 async def setup(bot):
     await bot.add_cog(MemoryMatchingGame(bot))
\ No newline at end of file
@@ -1,63 +1,101 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import random
-import asyncio
-import time
+import functools
+from array import array
+from utils.timeouts import get_scheduler
+from utils.sessions import SequenceSession
+from utils.store import get_store
+from utils.edits import get_edits
+from utils.animation import get_animations
+from utils.stats import get_stats
+from utils.frames import FrameCache
+from utils.router import get_router, make_custom_id
 
 #---------------------------------Game Settings-----------------------------------------
 TIMEOUT_DURATION = 2*60                                                                #
-CHECK_FREQUENCY = 10                                                                   #
-HIGHLIGHT_TIME = 0.5                                                                   #
+HIGHLIGHT_TIME = 0.5  # Animation frames are rounded to the shared clock's 0.5s tick   #
 ERROR_HIGHLIGHT_TIME = 1.0  # Time to show red button before showing correct           #
 CORRECT_HIGHLIGHT_TIME = 1.0  # Time to show correct button after error                #
+FRAME_CACHE_SIZE = 512  # Distinct board frames kept, shared by all games              #
 #---------------------------------------------------------------------------------------
 
 class SequenceMemoryGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.games = {}
+        self.games = {}   # game id -> session
+        self.active = {}  # (channel id, owner id) -> game id; one game per player per channel
         self.game_timeout = TIMEOUT_DURATION
-
-    @tasks.loop(seconds=CHECK_FREQUENCY)
-    async def check_game_timeouts(self):
-        current_time = time.time()
-        for channel_id, game in list(self.games.items()):
-            if current_time - game["last_interaction_time"] > self.game_timeout:
-                try:
-                    await game["message"].edit(
-                        embed=self.create_embed(
-                            "Game Timed Out",
-                            "The game has been inactive for too long and has timed out.",
-                            discord.Color.red()
-                        ),
-                        view=None
-                    )
-                except:
-                    pass
-                del self.games[channel_id]
-
-    @check_game_timeouts.before_loop
-    async def before_check_game_timeouts(self):
-        await self.bot.wait_until_ready()
+        self.timeouts = get_scheduler(bot)
+        self.store = get_store(bot)
+        self.edits = get_edits(bot)
+        self.animations = get_animations(bot)
+        self.stats = get_stats(bot)
+        self.frames = FrameCache(FRAME_CACHE_SIZE)
 
     async def cog_load(self):
-        self.check_game_timeouts.start()
+        # Restore games that were running before a restart or reload. A game that was
+        # mid-round has its current sequence shown again rather than a new step added.
+        for game, data in await self.store.restore("sequence", SequenceSession):
+            message_channel_id, message_id = data["message"]
+            game.message = self.bot.get_partial_messageable(message_channel_id).get_partial_message(message_id)
+            self.add_game(game)
+            self.timeouts.schedule(("sequence", game.game_id), self.game_timeout, functools.partial(self.handle_timeout, game.game_id))
+            if game.game_started:
+                self.play_round(game)
+        # Only take clicks once the games are back; if restoring fails the cog isn't loaded
+        get_router(self.bot).register("sequence", self.handle_interaction)
+
+    async def handle_timeout(self, game_id):
+        """End a game that has been inactive for longer than the timeout."""
+        game = self.games.get(game_id)
+        if game is None:
+            return
+        self.end_game(game_id)
+        game.is_quitting = True
+        try:
+            await self.edits.edit(
+                game.message,
+                embed=self.create_embed(
+                    "Game Timed Out",
+                    "The game has been inactive for too long and has timed out.",
+                    discord.Color.red()
+                ),
+                view=None
+            )
+        except:
+            pass
+
+    def add_game(self, game):
+        self.games[game.game_id] = game
+        self.active[(game.channel_id, game.owner)] = game.game_id
+
+    def end_game(self, game_id):
+        """Remove a game and its pending timeout."""
+        game = self.games.pop(game_id, None)
+        if game is not None and self.active.get((game.channel_id, game.owner)) == game_id:
+            del self.active[(game.channel_id, game.owner)]
+        self.timeouts.cancel(("sequence", game_id))
+        self.animations.cancel(("sequence", game_id))
+        self.store.delete("sequence", game_id)
 
     def cog_unload(self):
-        self.check_game_timeouts.cancel()
+        self.timeouts.cancel_namespace("sequence")
+        self.animations.cancel_namespace("sequence")
+        get_router(self.bot).unregister("sequence")
 
     def create_button(self, index, game_state, highlight=False, is_correct=False, is_error=False, show_correct=False):
         """Helper method to create a button with consistent styling."""
         if index == 24:  # Start/Quit button
             return discord.ui.Button(
-                label="Start Game" if not game_state["game_started"] else "Quit Game",
-                style=discord.ButtonStyle.primary if not game_state["game_started"] else discord.ButtonStyle.danger,
-                custom_id=f"button_{index}"
+                label="Start Game" if not game_state.game_started else "Quit Game",
+                style=discord.ButtonStyle.primary if not game_state.game_started else discord.ButtonStyle.danger,
+                custom_id=make_custom_id("sequence", 0, index)
             )
         
         # Determine button style based on state
         style = discord.ButtonStyle.secondary  # Default gray
-        if show_correct and index == game_state.get("correct_button"):
+        if show_correct and index == game_state.correct_button:
             style = discord.ButtonStyle.primary  # Blue for showing correct button
         elif highlight:
             style = discord.ButtonStyle.success  # Green for sequence display
@@ -69,22 +107,49 @@ class SequenceMemoryGame(commands.Cog):
         return discord.ui.Button(
             label="\u200b",
             style=style,
-            custom_id=f"button_{index}",
-            disabled=not game_state["game_started"] or game_state["showing_sequence"] or highlight
+            custom_id=make_custom_id("sequence", 0, index),  # Frames are cached for any game; the id is filled in on use
+            disabled=not game_state.game_started or game_state.showing_sequence or highlight
         )
 
+    def correct_mask(self, game_state):
+        """Bitmask of the buttons correctly pressed so far in the current round."""
+        mask = 0
+        seen = 0
+        for position, i in enumerate(game_state.player_sequence):
+            if seen >> i & 1:
+                continue  # Only a button's first press counts, as before
+            seen |= 1 << i
+            if position < len(game_state.current_sequence) and game_state.current_sequence[position] == i:
+                mask |= 1 << i
+        return mask
+
     def create_game_view(self, game_state, highlight_index=None):
+        """
+        Return the view for the current game state. Frames are cached by everything that
+        affects how the grid looks, so animations reuse them instead of rebuilding buttons.
+        """
+        correct_mask = self.correct_mask(game_state)
+        key = (
+            game_state.game_started,
+            game_state.showing_sequence,
+            highlight_index,
+            correct_mask,
+            game_state.error_button,
+            game_state.correct_button if game_state.showing_correct else None,
+        )
+        frame = self.frames.get(key, functools.partial(self.render_game_view, game_state, highlight_index, correct_mask))
+        return frame.with_game_id(game_state.game_id)
+
+    def render_game_view(self, game_state, highlight_index, correct_mask):
         """Create a new view with buttons based on the current game state."""
         view = discord.ui.View()
 
         for i in range(25):
             # Check if button was correctly pressed in current round
-            is_correct = (i in game_state["player_sequence"] and 
-                         game_state["player_sequence"].index(i) < len(game_state["current_sequence"]) and
-                         i == game_state["current_sequence"][game_state["player_sequence"].index(i)])
+            is_correct = bool(correct_mask >> i & 1)
             
             # Check if this is the error button
-            is_error = game_state.get("error_button") == i
+            is_error = game_state.error_button == i
             
             button = self.create_button(
                 i, 
@@ -92,7 +157,7 @@ class SequenceMemoryGame(commands.Cog):
                 highlight_index == i,
                 is_correct=is_correct,
                 is_error=is_error,
-                show_correct=game_state.get("showing_correct", False)
+                show_correct=game_state.showing_correct
             )
             view.add_item(button)
 
@@ -102,49 +167,47 @@ class SequenceMemoryGame(commands.Cog):
         """Helper method to create consistently styled embeds."""
         return discord.Embed(title=title, description=description, color=color)
 
-    async def show_error_and_end(self, game, interaction, button_index):
+    def show_error_and_end(self, game, interaction, button_index):
         """Show red button briefly, then show correct button, before ending the game."""
-        current_index = len(game["player_sequence"]) - 1
-        correct_button = game["current_sequence"][current_index]
-        
+        self.animations.play(
+            ("sequence", game.game_id),
+            interaction.message,
+            self.error_frames(game, button_index),
+            on_finish=functools.partial(self.lose_game, game, interaction)
+        )
+
+    def error_frames(self, game, button_index):
+        """Animation frames of a wrong press: the pressed button in red, then the correct one in blue."""
+        current_index = len(game.player_sequence) - 1
+
         # Show wrong button in red
-        game["error_button"] = button_index
-        view = self.create_game_view(game)
-        await interaction.message.edit(view=view)
-        await asyncio.sleep(ERROR_HIGHLIGHT_TIME)
-        
+        game.error_button = button_index
+        yield {"view": self.create_game_view(game)}
+        for _ in range(self.animations.ticks_for(ERROR_HIGHLIGHT_TIME) - 1):
+            yield None
+
         # Show correct button in blue
-        game["showing_correct"] = True
-        game["correct_button"] = correct_button
-        game["error_button"] = None  # Clear the error button
-        view = self.create_game_view(game)
-        await interaction.message.edit(view=view)
-        await asyncio.sleep(CORRECT_HIGHLIGHT_TIME)
-        
-        # End the game
-        await self.handle_game_end(game, interaction, f"Wrong sequence! You reached Round {game['round']}")
+        game.showing_correct = True
+        game.correct_button = game.current_sequence[current_index]
+        game.error_button = None  # Clear the error button
+        yield {"view": self.create_game_view(game)}
+        for _ in range(self.animations.ticks_for(CORRECT_HIGHLIGHT_TIME) - 1):
+            yield None
+
+    async def lose_game(self, game, interaction):
+        """End the game once the wrong press has been shown."""
+        self.stats.record("sequence", interaction.guild_id, game.owner, game.round)
+        await self.handle_game_end(game, interaction, f"Wrong sequence! You reached Round {game.round}")
 
     @commands.hybrid_command(name="sequence", with_app_command=True)
     async def start_game(self, ctx):
         """Start a new sequence memory game."""
-        if ctx.channel.id in self.games:
-            await ctx.send("A game is already active in this channel!")
+        # Each player can run one game per channel; other players can start their own alongside it
+        if (ctx.channel.id, ctx.author.id) in self.active:
+            await ctx.send("You already have a game running in this channel!")
             return
 
-        game_state = {
-            "owner": ctx.author.id,
-            "game_started": False,
-            "current_sequence": [],
-            "player_sequence": [],
-            "round": 1,
-            "showing_sequence": False,
-            "last_interaction_time": time.time(),
-            "message": None,
-            "is_quitting": False,
-            "error_button": None,
-            "correct_button": None,
-            "showing_correct": False
-        }
+        game_state = SequenceSession(ctx.author.id, game_id=ctx.message.id, channel_id=ctx.channel.id)
 
         view = self.create_game_view(game_state)
         embed = self.create_embed(
@@ -153,75 +216,84 @@ class SequenceMemoryGame(commands.Cog):
         )
         
         message = await ctx.send(embed=embed, view=view)
-        game_state["message"] = message
-        self.games[ctx.channel.id] = game_state
+        game_state.message = message
+        self.add_game(game_state)
+        self.store.save("sequence", game_state.game_id, game_state)
+        self.timeouts.schedule(("sequence", game_state.game_id), self.game_timeout, functools.partial(self.handle_timeout, game_state.game_id))
 
-    async def show_sequence(self, game):
-        """Show the sequence to the player."""
-        game["showing_sequence"] = True
-        await game["message"].edit(view=self.create_game_view(game))
+    def sequence_frames(self, game, delay=0):
+        """Animation frames of one round: each button of the sequence lit in turn, then the board handed back."""
+        for _ in range(self.animations.ticks_for(delay) if delay else 0):
+            yield None
 
         last_highlighted = None  # Track the last highlighted button
 
-        for button_index in game["current_sequence"]:
-            if game["is_quitting"]:
+        for button_index in game.current_sequence:
+            if game.is_quitting:
                 return
 
             # Reset the timeout timer when highlighting a button
-            game["last_interaction_time"] = time.time()
-            
+            self.timeouts.reschedule(("sequence", game.game_id), self.game_timeout)
+
             # Ensure the same button is not highlighted twice in a row
             if button_index == last_highlighted:
                 continue
 
-            view = self.create_game_view(game, highlight_index=button_index)
-            await game["message"].edit(view=view)
+            frame = {"view": self.create_game_view(game, highlight_index=button_index)}
+            if last_highlighted is None:
+                # The round's title goes out with the first highlight
+                frame["embed"] = self.create_embed(f"Round {game.round}", "Watch the sequence carefully!")
+            yield frame
             last_highlighted = button_index  # Update last highlighted button
-            await asyncio.sleep(HIGHLIGHT_TIME)
+            for _ in range(self.animations.ticks_for(HIGHLIGHT_TIME) - 1):
+                yield None
 
-        if not game["is_quitting"]:
-            game["showing_sequence"] = False
-            await game["message"].edit(view=self.create_game_view(game))
+        if not game.is_quitting:
+            game.showing_sequence = False
+            yield {
+                "embed": self.create_embed(f"Round {game.round}", "Now repeat the sequence!"),
+                "view": self.create_game_view(game)
+            }
 
-    async def start_new_round(self, game):
+    def start_new_round(self, game, delay=0):
         """Start a new round by adding to the sequence."""
-        game["current_sequence"].append(random.randint(0, 23))
-        game["player_sequence"] = []
-        
-        await game["message"].edit(
-            embed=self.create_embed(f"Round {game['round']}", "Watch the sequence carefully!")
-        )
-        await self.show_sequence(game)
-        
-        if not game["is_quitting"]:
-            await game["message"].edit(
-                embed=self.create_embed(f"Round {game['round']}", "Now repeat the sequence!")
-            )
+        game.current_sequence.append(random.randint(0, 23))
+        self.store.save("sequence", game.game_id, game)
+        self.play_round(game, delay)
+
+    def play_round(self, game, delay=0):
+        """
+        Show the current sequence, after ``delay`` seconds, and then let the player repeat it.
+        The frames are played by the shared animation clock; this returns immediately.
+        """
+        game.player_sequence = array("B")
+        game.showing_sequence = True  # Turn presses away until the sequence has been shown
+        self.animations.play(("sequence", game.game_id), game.message, self.sequence_frames(game, delay))
 
     async def handle_game_end(self, game, interaction, reason, color=discord.Color.red()):
         """Helper method to handle game ending scenarios."""
         embed = self.create_embed("Game Over", reason, color)
         try:
-            await interaction.message.edit(embed=embed, view=None)
+            await self.edits.edit(interaction.message, embed=embed, view=None)
         except Exception as e:
             print(f"Error handling game end: {e}")
             try:
-                await game["message"].edit(embed=embed, view=None)
+                await self.edits.edit(game.message, embed=embed, view=None)
             except:
                 pass
         
-        del self.games[interaction.channel.id]
+        self.end_game(game.game_id)
 
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
+    async def handle_interaction(self, interaction: discord.Interaction, game_id, action):
+        """Handle a click on one of this cog's buttons (custom_id ``sequence:<game id>:<index>``, 24 is Start/Quit)."""
         if not interaction.message:
             return
 
-        game = self.games.get(interaction.channel.id)
+        game = self.games.get(game_id)
         if not game:
-            return
+            return  # A button on a board whose game has ended
 
-        if interaction.user.id != game["owner"]:
+        if interaction.user.id != game.owner:
             await interaction.response.send_message(
                 embed=self.create_embed(
                     "Not Your Game!",
@@ -232,44 +304,55 @@ class SequenceMemoryGame(commands.Cog):
             )
             return
 
-        game["last_interaction_time"] = time.time()
-        button_id = interaction.data.get("custom_id")
-        if not button_id:
-            return
+        self.timeouts.reschedule(("sequence", game_id), self.game_timeout)
+        button_index = int(action)
 
-        button_index = int(button_id.split("_")[1])
+        # The press is checked and applied under the game's lock; ending the game runs after it is released
+        async with game.lock:
+            if self.games.get(game_id) is not game or game.is_quitting:
+                return  # Ended while this press was waiting
+            next_step = await self.apply_press(interaction, game, button_index)
 
-        if button_index == 24:  # Start/Quit button
-            if not game["game_started"]:
-                game["game_started"] = True
-                await interaction.response.defer()
-                await self.start_new_round(game)
-            else:
-                game["is_quitting"] = True
-                await self.handle_game_end(game, interaction, f"Game ended at Round {game['round']}")
-            return
+        if next_step is not None:
+            await next_step()
 
-        if not game["game_started"] or game["showing_sequence"]:
+    async def apply_press(self, interaction, game, button_index):
+        """Apply one press to the game. Returns the follow-up to run once the lock is released, if any."""
+        if button_index == 24:  # Start/Quit button
+            await interaction.response.defer()
+            if not game.game_started:
+                game.game_started = True
+                self.start_new_round(game)
+                return None
+            game.is_quitting = True
+            self.animations.cancel(("sequence", game.game_id))  # Stop a sequence that is still being shown
+            return functools.partial(self.handle_game_end, game, interaction, f"Game ended at Round {game.round}")
+
+        if not game.game_started or game.showing_sequence:
             await interaction.response.send_message("Please wait...", ephemeral=True)
-            return
+            return None
 
-        game["player_sequence"].append(button_index)
-        current_index = len(game["player_sequence"]) - 1
+        game.player_sequence.append(button_index)
+        current_index = len(game.player_sequence) - 1
+        await interaction.response.defer()
 
         # Check if the button press was correct
-        if game["player_sequence"][current_index] != game["current_sequence"][current_index]:
-            await interaction.response.defer()
-            await self.show_error_and_end(game, interaction, button_index)
-            return
+        if game.player_sequence[current_index] != game.current_sequence[current_index]:
+            game.is_quitting = True
+            self.show_error_and_end(game, interaction, button_index)
+            return None
+
+        round_complete = len(game.player_sequence) == len(game.current_sequence)
+        if round_complete:
+            game.round += 1
+            game.showing_sequence = True  # Turn presses away until the next sequence has been shown
 
         # Update the view to show the correct button press
-        await interaction.response.defer()
-        await interaction.message.edit(view=self.create_game_view(game))
+        self.edits.submit(interaction.message, view=self.create_game_view(game))
 
-        if len(game["player_sequence"]) == len(game["current_sequence"]):
-            game["round"] += 1
-            await asyncio.sleep(0.5)
-            await self.start_new_round(game)
+        if round_complete:
+            self.start_new_round(game, delay=0.5)
+        return None
 
 async def setup(bot):
     await bot.add_cog(SequenceMemoryGame(bot))
\ No newline at end of file
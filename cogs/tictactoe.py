@@ -1,28 +1,102 @@
 import discord
 from discord.ext import commands
 import asyncio
-from config import BOT_NAME
+import functools
+import logging
+from config import BOT_NAME, CLUSTER_WORKERS
+from utils import tictactoe_table, tictactoe_search
+from utils.tictactoe_worker import SearchPool, default_workers, fallback_counter
+from utils.metrics import get_metrics
+from utils.sessions import TicTacToeSession
+from utils.timeouts import get_scheduler
+from utils.store import get_store
+from utils.edits import get_edits
+from utils.stats import get_stats
+from utils.frames import StaticView
+from utils.router import get_router, make_custom_id
+
+log = logging.getLogger(__name__)
+QUIT_EMOJI = "❌"  # 5x5 boards have no row left for a Quit button, so players quit with this reaction
 
 #---------Game Settings--------------#
 TIMEOUT_DURATION = 60 #in seconds    #
+AI_TIME_LIMIT = 1.5 #search budget   #
+AI_DEADLINE = 3 #hard reply deadline #
+AI_WORKERS = None #None: CPU share   #
 #------------------------------------#
 
 class TicTacToeGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.games = {}
+        self.games = {}   # game id -> session
+        self.active = {}  # (channel id, owner id) -> game id; one game per player per channel
+        self.reaction_boards = {}  # board message id -> game id, for the games quit by reaction
+        self.timeouts = get_scheduler(bot)
+        self.store = get_store(bot)
+        self.edits = get_edits(bot)
+        self.stats = get_stats(bot)
+        tictactoe_table.get_table()  # Load the perfect-play table once, up front
+        # Searches on 4x4/5x5 boards run in worker processes to keep the event loop free
+        metrics = get_metrics(bot)
+        self.search = SearchPool(AI_WORKERS or default_workers(CLUSTER_WORKERS), AI_TIME_LIMIT, metrics)
+        self.fallbacks = fallback_counter(metrics)
+
+    async def cog_load(self):
+        # Start the search workers now, so the first AI move doesn't wait for them
+        await self.search.start()
+        # Restore games that were running before a restart or reload; their buttons keep
+        # working because clicks are routed by the game id in their custom_ids
+        for game, data in await self.store.restore("tictactoe", TicTacToeSession):
+            message_channel_id, message_id = data["message"]
+            game.message = self.bot.get_partial_messageable(message_channel_id).get_partial_message(message_id)
+            self.add_game(game)
+            self.start_turn_timeout(game.game_id)
+        # Only take clicks once the games are back; if restoring fails the cog isn't loaded
+        get_router(self.bot).register("tictactoe", self.handle_interaction)
+
+    async def cog_unload(self):
+        self.timeouts.cancel_namespace("tictactoe")
+        get_router(self.bot).unregister("tictactoe")
+        await self.search.close()
+
+    def add_game(self, game):
+        self.games[game.game_id] = game
+        self.active[(game.channel_id, game.owner)] = game.game_id
+        if game.board.size == 5:
+            self.reaction_boards[game.message.id] = game.game_id
+
+    def end_game(self, game_id):
+        """Remove a game and its pending turn timeout."""
+        game = self.games.pop(game_id, None)
+        if game is not None and self.active.get((game.channel_id, game.owner)) == game_id:
+            del self.active[(game.channel_id, game.owner)]
+        if game is not None and game.message is not None:
+            self.reaction_boards.pop(game.message.id, None)
+        self.timeouts.cancel(("tictactoe", game_id))
+        self.store.delete("tictactoe", game_id)
 
     @commands.hybrid_command(name="tictactoe", aliases=["ttt"], with_app_command=True)
-    async def start_game(self, ctx: commands.Context, player1: discord.Member = None, player2: discord.Member = None):
+    async def start_game(self, ctx: commands.Context, player1: discord.Member = None, player2: discord.Member = None, size: int = 3, win_length: int = None):
         """
         Start a new Tic-Tac-Toe game.
         If no player2 is specified, the game defaults to AI as the opponent.
+        Boards can be 3x3, 4x4 or 5x5; win_length defaults to 3, 4 and 4 respectively.
         """
-        # Check if a game is already active in the channel
-        if ctx.channel.id in self.games:
+        if win_length is None:
+            win_length = min(size, 4)
+        if not 3 <= size <= 5 or not 3 <= win_length <= size:
+            await ctx.send(embed=discord.Embed(
+                title="Invalid Board",
+                description="The board size must be 3, 4 or 5 and the win length between 3 and the board size.",
+                color=discord.Color.red()
+            ))
+            return
+
+        # Each player can run one game per channel; other players can start their own alongside it
+        if (ctx.channel.id, ctx.author.id) in self.active:
             await ctx.send(embed=discord.Embed(
                 title="Game Already Active",
-                description="A Tic-Tac-Toe game is already active in this channel! Please finish the current game before starting a new one.",
+                description="You already have a Tic-Tac-Toe game running in this channel! Please finish it before starting a new one.",
                 color=discord.Color.red()
             ))
             return
@@ -31,81 +105,62 @@ class TicTacToeGame(commands.Cog):
         player1 = player1 or ctx.author
         is_ai_game = player2 is None
 
-        # Determine player2
-        player2 = player2 if not is_ai_game else "AI"
-
-        # Create initial game state
-        view = discord.ui.View()
-
-        # Create a 3x3 grid of buttons
-        for row in range(3):
-            for col in range(3):
-                button = discord.ui.Button(
-                    label="\u200b",
-                    style=discord.ButtonStyle.secondary,
-                    row=row,
-                    custom_id=f"ttt_{row}_{col}",
-                    disabled=True  # Initially disabled until game starts
-                )
-                button.callback = self.button_callback
-                view.add_item(button)
-
-        # Add Start/Quit Game button
-        start_button = discord.ui.Button(
-            label="Start Game",
-            style=discord.ButtonStyle.primary,
-            row=3,
-            custom_id="start_game"
+        # Create initial game state (player2 is the AI when not given)
+        # A 5x5 grid fills all 25 button slots, leaving no room for Start/Quit, so it starts right
+        # away and is quit with the QUIT_EMOJI reaction instead
+        game = TicTacToeSession(
+            player_ids=(player1.id, None if is_ai_game else player2.id),
+            player_names=(player1.name, BOT_NAME if is_ai_game else player2.name),
+            owner=ctx.author.id,
+            size=size,
+            win_length=win_length,
+            game_started=size == 5,
+            game_id=ctx.message.id,
+            channel_id=ctx.channel.id
         )
-        start_button.callback = self.start_button_callback
-        view.add_item(start_button)
 
         # Create an embed message for starting the game
         embed = discord.Embed(
             title="Tic-Tac-Toe Game",
-            description=f"**{player1.name}** vs **{player2.name if not is_ai_game else BOT_NAME}**\n\nClick 'Start Game' to begin!",
+            description=(
+                f"**{game.player_names[0]}** vs **{game.player_names[1]}**\n"
+                f"{size}x{size} board, {win_length} in a row wins\n\n"
+                + (f"{player1.name}'s turn (X)" if game.game_started else "Click 'Start Game' to begin!")
+                + (f"\nReact with {QUIT_EMOJI} to quit." if size == 5 else "")
+            ),
             color=discord.Color.green()
         )
 
         # Send the initial grid and embed
-        message = await ctx.send(embed=embed, view=view)
+        message = await ctx.send(embed=embed, view=await self.create_game_view(game))
 
         # Store game state
-        self.games[ctx.channel.id] = {
-            "board": [[None for _ in range(3)] for _ in range(3)],
-            "players": {
-                "X": player1,
-                "O": player2
-            },
-            "current_player": "X",
-            "message_id": message.id,
-            "message": message,
-            "is_ai_game": is_ai_game,
-            "game_started": False,
-            "owner": ctx.author.id
-        }
+        game.message = message
+        self.add_game(game)
+        self.store.save("tictactoe", game.game_id, game)
+        if size == 5:
+            try:
+                await message.add_reaction(QUIT_EMOJI)
+            except discord.HTTPException:
+                pass  # Missing permission: players can still add it themselves
 
         # Start the first turn timeout
-        self.start_turn_timeout(ctx.channel.id)
+        self.start_turn_timeout(game.game_id)
 
 
-    async def start_button_callback(self, interaction: discord.Interaction):
+    async def start_button_callback(self, interaction: discord.Interaction, game):
         """Handle Start/Quit Game button interaction"""
-        if interaction.channel_id not in self.games:
-            return
-
-        game = self.games[interaction.channel_id]
-
         # If game is not started, start it
-        if not game["game_started"]:
-            game["game_started"] = True
+        if not game.game_started:
+            game.game_started = True
+            self.store.save("tictactoe", game.game_id, game)
             
             # Create new view with enabled buttons
             view = await self.create_game_view(game)
             
             embed = discord.Embed(
                 title="Tic-Tac-Toe Game",
-                description=f"{game['players']['X'].name}'s turn (X)",
+                description=f"{game.player_names[0]}'s turn (X)",
                 color=discord.Color.yellow()
             )
             
@@ -118,61 +173,112 @@ class TicTacToeGame(commands.Cog):
                 description="The Tic-Tac-Toe game has been ended.",
                 color=discord.Color.red()
             )
+            self.end_game(game.game_id)
             await interaction.response.edit_message(embed=embed, view=None)
-            del self.games[interaction.channel_id]
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        # Only the quit reaction on a 5x5 board, from one of its players or the owner, ends a game
+        game_id = self.reaction_boards.get(payload.message_id)
+        if game_id is None or str(payload.emoji) != QUIT_EMOJI:
+            return
+        game = self.games.get(game_id)
+        if game is None or payload.user_id not in (game.owner, *game.player_ids):
+            return
+        async with game.lock:
+            if self.games.get(game_id) is not game:
+                return  # Ended while this reaction was waiting
+            self.end_game(game_id)
+        embed = discord.Embed(
+            title="Game Quit",
+            description="The Tic-Tac-Toe game has been ended.",
+            color=discord.Color.red()
+        )
+        await self.edits.edit(game.message, embed=embed, view=None)
+
+    async def handle_interaction(self, interaction: discord.Interaction, game_id, action):
+        """Route a click on this cog's buttons (custom_id ``tictactoe:<game id>:<row>:<col>`` or ``tictactoe:<game id>:start``)."""
+        game = self.games.get(game_id)
+        if game is None:
+            # A button on a board whose game has ended
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="No Active Game",
+                    description="This Tic-Tac-Toe game is no longer active.",
+                    color=discord.Color.red()
+                ),
+                ephemeral=True
+            )
+            return
+
+        if game.lock.locked() and game.current_player_id is None:
+            # The AI is thinking; answer now rather than queue the click behind a search of up to AI_DEADLINE
+            await interaction.response.send_message(
+                embed=discord.Embed(
+                    title="Not Your Turn",
+                    description=f"It's {BOT_NAME}'s turn, please wait.",
+                    color=discord.Color.orange()
+                ),
+                ephemeral=True
+            )
+            return
+
+        # Clicks on the same game are handled one at a time
+        async with game.lock:
+            if self.games.get(game_id) is not game:
+                return  # Ended while this click was waiting
+            if action == "start":
+                await self.start_button_callback(interaction, game)
+                return
+            update = await self.button_callback(interaction, game, action)
+
+        # Edits can be paced by rate limits, so they are sent after the lock is released
+        if update is not None:
+            await self.edits.edit(interaction.message, **update)
 
     async def create_game_view(self, game):
         """Create a new view with the current game state"""
         view = discord.ui.View()
         
         # Add game grid buttons
-        for row in range(3):
-            for col in range(3):
+        board = game.board
+        for row in range(board.size):
+            for col in range(board.size):
+                mark = board.cell(row * board.size + col)
                 button = discord.ui.Button(
-                    label=game["board"][row][col] if game["board"][row][col] else "\u200b",
+                    label=mark or "\u200b",
                     style=(
-                        discord.ButtonStyle.success if game["board"][row][col] == "X" else
-                        discord.ButtonStyle.danger if game["board"][row][col] == "O" else
+                        discord.ButtonStyle.success if mark == "X" else
+                        discord.ButtonStyle.danger if mark == "O" else
                         discord.ButtonStyle.secondary
                     ),
                     row=row,
-                    custom_id=f"ttt_{row}_{col}",
-                    disabled=not game["game_started"] or game["board"][row][col] is not None
+                    custom_id=make_custom_id("tictactoe", game.game_id, row, col),
+                    disabled=not game.game_started or mark is not None
                 )
-                button.callback = self.button_callback
                 view.add_item(button)
 
-        # Add Start/Quit Game button
-        start_button = discord.ui.Button(
-            label="Quit Game" if game["game_started"] else "Start Game",
-            style=discord.ButtonStyle.danger if game["game_started"] else discord.ButtonStyle.primary,
-            row=3,
-            custom_id="start_game"
-        )
-        start_button.callback = self.start_button_callback
-        view.add_item(start_button)
+        # Add Start/Quit Game button below the grid, if there is a row left for it (5x5 boards quit by reaction)
+        if board.size < 5:
+            start_button = discord.ui.Button(
+                label="Quit Game" if game.game_started else "Start Game",
+                style=discord.ButtonStyle.danger if game.game_started else discord.ButtonStyle.primary,
+                row=board.size,
+                custom_id=make_custom_id("tictactoe", game.game_id, "start")
+            )
+            view.add_item(start_button)
         
-        return view
+        # Clicks are dispatched by the router, so only the component payload is kept
+        return StaticView.from_view(view)
 
-    async def button_callback(self, interaction: discord.Interaction):
+    async def button_callback(self, interaction: discord.Interaction, game, cell):
         """
         Handle button press in the Tic-Tac-Toe game.
+        Returns the message edit to make afterwards, or None.
         """
-        # Ensure the game exists and has started
-        if interaction.channel_id not in self.games:
-            await interaction.response.send_message(
-                embed=discord.Embed(
-                    title="No Active Game",
-                    description="There is no active Tic-Tac-Toe game in this channel.",
-                    color=discord.Color.red()
-                ),
-                ephemeral=True
-            )
-            return
+        board = game.board
 
-        game = self.games[interaction.channel_id]
-        
-        if not game["game_started"]:
+        if not game.game_started:
             await interaction.response.send_message(
                 embed=discord.Embed(
                     title="Game Not Started",
@@ -183,12 +289,15 @@ class TicTacToeGame(commands.Cog):
             )
             return
 
-        # Check if it's the correct player's turn
-        if game["players"][game["current_player"]] != interaction.user and game["players"][game["current_player"]] != "AI":
+        # Check if it's the correct player's turn (clicks are rejected while the AI is thinking)
+        if game.current_player_id != interaction.user.id:
             await interaction.response.send_message(
                 embed=discord.Embed(
                     title="Not Your Turn",
-                    description=f"It's {game['players'][game['current_player']].name}'s turn.",
+                    description=(
+                        f"It's {BOT_NAME}'s turn, please wait." if game.current_player_id is None
+                        else f"It's {game.current_player_name}'s turn."
+                    ),
                     color=discord.Color.orange()
                 ),
                 ephemeral=True
@@ -196,10 +305,11 @@ class TicTacToeGame(commands.Cog):
             return
 
         # Parse button coordinates
-        row, col = map(int, interaction.data['custom_id'].split('_')[1:])
+        row, col = map(int, cell.split(":"))
+        index = row * board.size + col
 
         # Check if the cell is already occupied
-        if game["board"][row][col] is not None:
+        if not board.is_empty(index):
             await interaction.response.send_message(
                 embed=discord.Embed(
                     title="Invalid Move",
@@ -213,42 +323,31 @@ class TicTacToeGame(commands.Cog):
         # Acknowledge the interaction immediately
         await interaction.response.defer()
 
-        # Cancel any existing timeout task
-        if 'timeout_task' in game:
-            game['timeout_task'].cancel()
+        # Update game board (this also passes the turn)
+        board.play(index)
+
+        # Check for win or draw
+        result = self.check_game_status(board)
 
-        # Update game board
-        game["board"][row][col] = game["current_player"]
+        # AI move if applicable
+        if result is None and game.is_ai_game and board.current_player == "O":
+            move = await self.get_ai_move(board)
+            if self.games.get(game.game_id) is not game:
+                return None  # The game timed out while the AI was thinking
+            board.play(move)
+            result = self.check_game_status(board)
 
         # Create updated view
         view = await self.create_game_view(game)
 
-        # Check for win or draw
-        result = self.check_game_status(game["board"])
-
-        # Handle game progression
-        if result is None:
-            game["current_player"] = "O" if game["current_player"] == "X" else "X"
-            
-            # AI move if applicable
-            if game["is_ai_game"] and game["current_player"] == "O":
-                row, col = self.get_best_move(game["board"])
-                game["board"][row][col] = "O"
-                view = await self.create_game_view(game)
-                result = self.check_game_status(game["board"])
-                game["current_player"] = "X"
-
         # Update embed based on game state
         if result is not None:
             # Game ended
-            if result == "X":
-                embed = discord.Embed(
-                    title="Game Over",
-                    description=f"🎉 {game['players']['X'].name} wins!",
-                    color=discord.Color.green()
-                )
-            elif result == "O":
-                winner_name = game['players']['O'].name if not game["is_ai_game"] else BOT_NAME
+            if result in ("X", "O"):
+                winner_name = game.player_names[0 if result == "X" else 1]
+                winner_id = game.player_ids[0 if result == "X" else 1]
+                if winner_id is not None:  # Wins by the AI aren't ranked
+                    self.stats.record("tictactoe", interaction.guild_id, winner_id, 1)
                 embed = discord.Embed(
                     title="Game Over",
                     description=f"🎉 {winner_name} wins!",
@@ -260,45 +359,42 @@ class TicTacToeGame(commands.Cog):
                     description="It's a draw!",
                     color=discord.Color.blue()
                 )
-            del self.games[interaction.channel_id]
-            await interaction.message.edit(embed=embed, view=None)
-        else:
-            # Game continues
-            current_player_name = game['players'][game['current_player']].name
-            embed = discord.Embed(
-                title="Tic-Tac-Toe Game",
-                description=f"{current_player_name}'s turn ({game['current_player']})",
-                color=discord.Color.yellow()
-            )
-            await interaction.message.edit(embed=embed, view=view)
+            self.end_game(game.game_id)
+            return {"embed": embed, "view": None}
 
-            # Start a timeout for the next player's turn
-            self.start_turn_timeout(interaction.channel_id)
+        # Game continues
+        self.store.save("tictactoe", game.game_id, game)
+        embed = discord.Embed(
+            title="Tic-Tac-Toe Game",
+            description=f"{game.current_player_name}'s turn ({board.current_player})",
+            color=discord.Color.yellow()
+        )
+
+        # Start a timeout for the next player's turn
+        self.start_turn_timeout(game.game_id)
+        return {"embed": embed, "view": view}
 
 
-    def start_turn_timeout(self, channel_id):
+    def start_turn_timeout(self, game_id):
         """
-        Start a timeout task for the current player's turn.
+        Start (or restart) the timeout for the current player's turn.
         """
-        timeout_duration = TIMEOUT_DURATION  # Timeout duration in seconds
-
-        async def timeout_task():
-            await asyncio.sleep(timeout_duration)
-            # Handle timeout event
-            if channel_id in self.games:
-                game = self.games[channel_id]
-                current_player = game["players"][game["current_player"]]
-                if current_player != "AI":  # Skip timeout handling for AI
-                    embed = discord.Embed(
-                        title="Turn Timeout",
-                        description=f"{current_player.name} took too long! Game over.",
-                        color=discord.Color.red()
-                    )
-                    await game["message"].edit(embed=embed, view=None)
-                    del self.games[channel_id]
-
-        # Create and store the timeout task
-        self.games[channel_id]['timeout_task'] = asyncio.create_task(timeout_task())
+        self.timeouts.schedule(("tictactoe", game_id), TIMEOUT_DURATION, functools.partial(self.handle_turn_timeout, game_id))
+
+    async def handle_turn_timeout(self, game_id):
+        """
+        End the game when the current player took too long.
+        """
+        game = self.games.get(game_id)
+        if game is not None:
+            if game.current_player_id is not None:  # Skip timeout handling for AI
+                embed = discord.Embed(
+                    title="Turn Timeout",
+                    description=f"{game.current_player_name} took too long! Game over.",
+                    color=discord.Color.red()
+                )
+                self.end_game(game_id)
+                await self.edits.edit(game.message, embed=embed, view=None)
 
 
     def check_game_status(self, board):
@@ -306,87 +402,32 @@ class TicTacToeGame(commands.Cog):
         Check if the game has a winner or is a draw.
         Returns 'X', 'O', 'Draw', or None
         """
-        # Check rows
-        for row in board:
-            if row[0] == row[1] == row[2] and row[0] is not None:
-                return row[0]
-
-        # Check columns
-        for col in range(3):
-            if board[0][col] == board[1][col] == board[2][col] and board[0][col] is not None:
-                return board[0][col]
-
-        # Check diagonals
-        if board[0][0] == board[1][1] == board[2][2] and board[0][0] is not None:
-            return board[0][0]
-        if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not None:
-            return board[0][2]
-
-        # Check for draw
-        if all(cell is not None for row in board for cell in row):
-            return "Draw"
-
-        # Game continues
-        return None
+        return board.status()
 
     def get_best_move(self, board):
         """
-        Use minimax algorithm to find the best move for the AI.
+        Look up the optimal move for the AI in the precomputed perfect-play table.
+        Returns the cell index to play.
         """
-        best_score = float('-inf')
-        best_move = None
-
-        for r in range(3):
-            for c in range(3):
-                if board[r][c] is None:
-                    # Try this move
-                    board[r][c] = "O"
-                    # Calculate the move's score
-                    score = self.minimax(board, 0, False)
-                    # Undo the move
-                    board[r][c] = None
-
-                    # Update best move if score is better
-                    if score > best_score:
-                        best_score = score
-                        best_move = (r, c)
-
-        return best_move
-
-    def minimax(self, board, depth, is_maximizing):
+        cell, _ = tictactoe_table.lookup(board.x, board.o)
+        return cell
+
+    async def get_ai_move(self, board):
         """
-        Minimax algorithm with recursion to find the best move.
+        Pick the AI's move. 3x3 games use the perfect-play table; larger boards run
+        a time-bounded search in a worker process, falling back to a quick heuristic
+        move if no worker can answer within AI_DEADLINE.
         """
-        result = self.check_game_status(board)
-
-        # Scoring
-        if result == "O":
-            return 10 - depth
-        elif result == "X":
-            return depth - 10
-        elif result == "Draw":
-            return 0
-
-        if is_maximizing:
-            best_score = float('-inf')
-            for r in range(3):
-                for c in range(3):
-                    if board[r][c] is None:
-                        board[r][c] = "O"
-                        score = self.minimax(board, depth + 1, False)
-                        board[r][c] = None
-                        best_score = max(best_score, score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for r in range(3):
-                for c in range(3):
-                    if board[r][c] is None:
-                        board[r][c] = "X"
-                        score = self.minimax(board, depth + 1, True)
-                        board[r][c] = None
-                        best_score = min(best_score, score)
-            return best_score
+        if board.size == 3:
+            return self.get_best_move(board)
+
+        args = (board.x, board.o, board.turn, board.size, board.win_length)
+        try:
+            return await asyncio.wait_for(self.search.best_move(*args, AI_DEADLINE), timeout=AI_DEADLINE)
+        except Exception as e:
+            self.fallbacks.labels("timeout" if isinstance(e, asyncio.TimeoutError) else "error").inc()
+            log.warning("AI search failed, using fallback move: %r", e)
+            return tictactoe_search.quick_move(*args)
 
 async def setup(bot):
     await bot.add_cog(TicTacToeGame(bot))
\ No newline at end of file
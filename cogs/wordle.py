@@ -1,34 +1,93 @@
 import discord
-from discord.ext import commands, tasks
-import random
+from discord.ext import commands
+import asyncio
+import functools
+import io
 import time
+from utils.dictionary import get_dictionary, score_guess, CORRECT, PRESENT
+from utils.wordle_solver import get_solver
+from utils.timeouts import get_scheduler
+from utils.sessions import WordleSession
+from utils.store import get_store
+from utils.edits import get_edits
+from utils.stats import get_stats
+from utils.render import get_renderer
+from utils.metrics import get_metrics
 
 #---------------------------------Game Settings--------------------------------------#
-CHECK_FREQUENCY = 10  # checks for timeout every n seconds                           #
 TIMEOUT_DURATION = 2*60  # n*60 => game times out in n minutes                       #
+DEFAULT_LENGTH = 5  # Word length when none is chosen                                #
+MAX_GUESSES = {4: 6, 5: 6, 6: 7, 7: 8, 8: 9}  # Word length -> guesses allowed       #
+IMAGE_BOARDS = False  # Draw the board as an image instead of text (needs Pillow)    #
 #------------------------------------------------------------------------------------#
 
+SQUARES = {CORRECT: "🟩", PRESENT: "🟨"}
+ABSENT_SQUARE = "⬛"
+EMPTY_SQUARE = "⬜"
+CELL_STYLES = {CORRECT: "correct", PRESENT: "present"}  # Image board tile styles; anything else is "absent"
+
 class WordleGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.games = {}
-        self.word_list = self.load_words('words.txt')
+        self.games = {}  # id of the channel or thread the guesses are typed in -> session
         self.game_timeout = TIMEOUT_DURATION
-        self.check_game_timeouts.start()
+        self.timeouts = get_scheduler(bot)
+        self.store = get_store(bot)
+        self.edits = get_edits(bot)
+        self.stats = get_stats(bot)
+        # Guesses are timed alongside the button games' clicks
+        self.guess_latency = get_metrics(bot).histogram(
+            "interaction_seconds", "Time to handle a button click or Wordle guess", ("game",)
+        ).labels("wordle")
+        self.renderer = None
+        if IMAGE_BOARDS:
+            try:
+                self.renderer = get_renderer(bot)
+            except RuntimeError as e:
+                print(f"{e}; Wordle boards will be drawn as text")
+
+    async def cog_load(self):
+        # Restore games that were running before a restart or reload. A game played in a
+        # thread is keyed by the thread, while its board message is in the parent channel.
+        for key, data in (await self.store.load("wordle")).items():
+            channel_id = int(key)
+            game = WordleSession.from_dict(data)
+            await self.load_dictionary(len(game.target_word))
+            message_channel_id, message_id = data["message"]
+            game.message = self.bot.get_partial_messageable(message_channel_id).get_partial_message(message_id)
+            self.games[channel_id] = game
+            self.timeouts.schedule(("wordle", channel_id), self.game_timeout, functools.partial(self.handle_timeout, channel_id))
 
     def cog_unload(self):
-        self.check_game_timeouts.cancel()
+        self.timeouts.cancel_namespace("wordle")
 
-    def load_words(self, filename):
-        try:
-            with open(filename, "r") as file:
-                return [line.strip().upper() for line in file if line.strip()]
-        except FileNotFoundError:
-            print(f"Error: {filename} not found!")
-            return []
-
-    @commands.hybrid_command(name="wordle", with_app_command=True)
-    async def start_game(self, ctx, word: str = None, hint: str = None):
+    def end_game(self, channel_id):
+        """Remove a game and its pending timeout."""
+        self.games.pop(channel_id, None)
+        self.timeouts.cancel(("wordle", channel_id))
+        self.store.delete("wordle", channel_id)
+        if self.renderer is not None:
+            self.renderer.discard(channel_id)
+
+    def board_edited(self, channel_id, game, future):
+        # The board message was deleted, so the game can't be shown any more
+        if future.cancelled() or not isinstance(future.exception(), discord.NotFound):
+            return
+        if self.games.get(channel_id) is game:
+            self.end_game(channel_id)
+
+    async def load_dictionary(self, length):
+        """
+        Return the dictionary for a word length. Each length is read on first use only and then
+        shared across games and cog reloads; building it runs off the event loop.
+        """
+        return await asyncio.to_thread(get_dictionary, length=length)
+
+    def max_guesses(self, game):
+        return MAX_GUESSES.get(len(game.target_word), 6)
+
+    @commands.hybrid_group(name="wordle", fallback="start", invoke_without_command=True, with_app_command=True)
+    async def start_game(self, ctx, word: str = None, hint: str = None, length: int = DEFAULT_LENGTH):
         if ctx.channel.id in self.games:
             await ctx.send(embed=discord.Embed(
                 title="Game Already Active",
@@ -37,70 +96,142 @@ class WordleGame(commands.Cog):
             ))
             return
         
+        # A custom word sets the length; otherwise a random word of the chosen length is picked
+        if word:
+            length = len(word)
+        lengths = f"{min(MAX_GUESSES)} to {max(MAX_GUESSES)}"
+        if length not in MAX_GUESSES or (word and not word.isalpha()):
+            await ctx.send(embed=discord.Embed(
+                title="Invalid Word",
+                description=f"The word must be {lengths} letters long and contain only letters.",
+                color=discord.Color.red()
+            ))
+            return
+
+        dictionary = await self.load_dictionary(length)
         if word:
             target_word = word.upper()
-            if len(target_word) != 5 or not target_word.isalpha():
-                await ctx.send(embed=discord.Embed(
-                    title="Invalid Word",
-                    description="The word must be exactly 5 letters long and contain only letters.",
-                    color=discord.Color.red()
-                ))
-                return
+        elif dictionary.answers:
+            target_word = dictionary.random_answer()
         else:
-            target_word = random.choice(self.word_list)
+            await ctx.send(embed=discord.Embed(
+                title="No Words Available",
+                description=f"The word list has no {length}-letter words. Start a game with a custom word instead.",
+                color=discord.Color.red()
+            ))
+            return
+        # Only games on a random word of the default length are comparable on the leaderboard
+        game = WordleSession(target_word, ctx.author.id, hint=hint, ranked=not word and length == DEFAULT_LENGTH)
 
-        view = discord.ui.View()
-        for _ in range(25):
-            button = discord.ui.Button(label="\u200b", style=discord.ButtonStyle.secondary)
-            view.add_item(button)
-        
+        # In a server text channel each game gets its own thread, so several games can run side by side
+        use_thread = ctx.guild is not None and isinstance(ctx.channel, discord.TextChannel)
         embed = discord.Embed(
             title="Wordle Game Started!",
-            description="Send your guesses (5-letter words). Good luck!",
+            description=(
+                f"Send your guesses ({length}-letter words) in the thread below. Good luck!" if use_thread
+                else f"Send your guesses ({length}-letter words). Good luck!"
+            ),
             color=discord.Color.green()
         )
-        embed.add_field(name="How to Play", value="Type a 5-letter word to guess the target word.", inline=False)
+        board = await self.show_board(embed, None, game)
+        embed.add_field(name="How to Play", value=f"Type a {length}-letter word to guess the target word. You have {self.max_guesses(game)} guesses. Other messages are ignored, so you can keep chatting.", inline=False)
         
         if hint:
             embed.add_field(name="Hint", value=hint, inline=False)
 
-        message = await ctx.send(embed=embed, view=view)
-        self.games[ctx.channel.id] = {
-            "target_word": target_word,
-            "current_row": 0,
-            "message_id": message.id,
-            "owner": ctx.author.id,
-            "hint": hint,
-            "last_interaction_time": time.time()
-        }
-
-    @tasks.loop(seconds=CHECK_FREQUENCY)
-    async def check_game_timeouts(self):
-        current_time = time.time()
-        channels_to_remove = []
-
-        for channel_id, game in self.games.items():
-            if (current_time - game["last_interaction_time"]) > self.game_timeout:
-                try:
-                    channel = self.bot.get_channel(channel_id)
-                    message = await channel.fetch_message(game["message_id"])
-                    timeout_embed = discord.Embed(
-                        title="Game Timed Out",
-                        description=f"Hey {self.bot.get_user(game['owner']).mention}! The game has timed out due to inactivity.\nThe word was **{game['target_word']}**.\nStart a new game with `/wordle`!",
-                        color=discord.Color.red()
-                    )
-                    await message.edit(embed=timeout_embed, view=None)
-                except Exception as e:
-                    print(f"Error in timeout handling for channel {channel_id}: {e}")
-                finally:
-                    channels_to_remove.append(channel_id)
+        message = game.message = await ctx.send(embed=embed, files=board.get("attachments"))
+        channel_id = ctx.channel.id
+        if use_thread:
+            try:
+                thread = await message.create_thread(name=f"Wordle - {ctx.author.display_name}", auto_archive_duration=60)
+                channel_id = thread.id
+            except discord.HTTPException:
+                pass  # No permission to create threads: play in the channel itself
 
-        for channel_id in channels_to_remove:
-            del self.games[channel_id]
+        self.games[channel_id] = game
+        self.store.save("wordle", channel_id, self.games[channel_id])
+        self.timeouts.schedule(("wordle", channel_id), self.game_timeout, functools.partial(self.handle_timeout, channel_id))
 
-    @check_game_timeouts.before_loop
-    async def before_check_game_timeouts(self):
-        await self.bot.wait_until_ready()
+    @start_game.command(name="hint", with_app_command=True)
+    async def hint_command(self, ctx):
+        """Suggest the guess that reveals the most information about the word."""
+        game = self.games.get(ctx.channel.id)
+        if game is None:
+            await ctx.send(embed=discord.Embed(
+                title="No Active Game",
+                description="There is no active Wordle game in this channel.",
+                color=discord.Color.red()
+            ), ephemeral=True)
+            return
+
+        await ctx.defer(ephemeral=True)
+        # The first call may have to build the pattern matrix, so keep it off the event loop
+        suggestions = await asyncio.to_thread(self.get_suggestions, game)
+        if not suggestions:
+            await ctx.send(embed=discord.Embed(
+                title="No Hint Available",
+                description="No word in the word list matches the feedback so far.",
+                color=discord.Color.orange()
+            ), ephemeral=True)
+            return
+
+        best, bits, remaining = suggestions[0]
+        await ctx.send(embed=discord.Embed(
+            title="Hint",
+            description=f"Try **{best}** (expected {bits:.2f} bits of information).\n{remaining} possible word(s) left.",
+            color=discord.Color.blue()
+        ), ephemeral=True)
+
+    def get_suggestions(self, game, count=1):
+        dictionary = get_dictionary(length=len(game.target_word))
+        return get_solver(dictionary).best_guesses(game.history, count)
+
+    def render_board(self, game):
+        """
+        Render the board as rows of colored squares, one per guess, with unused rows left empty.
+        Text fits every word length and guess count, where a button grid stops at 5x5.
+        """
+        rows = [
+            "".join(SQUARES.get(value, ABSENT_SQUARE) for value in feedback) + f"  `{guess}`"
+            for guess, feedback in game.history
+        ]
+        rows.extend([EMPTY_SQUARE * len(game.target_word)] * (self.max_guesses(game) - len(rows)))
+        return "\n".join(rows)
+
+    def board_cells(self, game):
+        """The board as (style, letter) cells, row by row, for the image renderer."""
+        cells = [
+            (CELL_STYLES.get(value, "absent"), letter)
+            for guess, feedback in game.history
+            for letter, value in zip(guess, feedback)
+        ]
+        cells.extend([("empty", "")] * (len(game.target_word) * self.max_guesses(game) - len(cells)))
+        return tuple(cells)
+
+    async def show_board(self, embed, key, game):
+        """
+        Put the board on ``embed``: as an image when image boards are on, else as text below
+        the description. Returns the extra message fields (the image attachment) to send with it.
+        """
+        if self.renderer is None:
+            embed.description = "\n\n".join(filter(None, (embed.description, self.render_board(game))))
+            return {}
+        png = await self.renderer.render(key, len(game.target_word), self.board_cells(game))
+        embed.set_image(url="attachment://board.png")
+        return {"attachments": [discord.File(io.BytesIO(png), filename="board.png")]}
+
+    async def handle_timeout(self, channel_id):
+        """End a game that has been inactive for longer than the timeout."""
+        game = self.games.get(channel_id)
+        if game is None:
+            return
+        self.end_game(channel_id)
+        timeout_embed = discord.Embed(
+            title="Game Timed Out",
+            description=f"Hey <@{game.owner}>! The game has timed out due to inactivity.\nThe word was **{game.target_word}**.\nStart a new game with `/wordle start`!",
+            color=discord.Color.red()
+        )
+        await self.edits.edit(game.message, embed=timeout_embed, view=None)
 
     @commands.hybrid_command(name="quit", with_app_command=True)
     async def quit_game(self, ctx):
@@ -113,7 +244,7 @@ class WordleGame(commands.Cog):
             return
         
         game = self.games[ctx.channel.id]
-        if game["owner"] != ctx.author.id:
+        if game.owner != ctx.author.id:
             await ctx.send(embed=discord.Embed(
                 title="Permission Denied",
                 description="Only the game owner can quit the game.",
@@ -121,92 +252,112 @@ class WordleGame(commands.Cog):
             ))
             return
 
-        del self.games[ctx.channel.id]
+        self.end_game(ctx.channel.id)
         await ctx.send(embed=discord.Embed(
             title="Game Quit",
-            description="The Wordle game has been quit. Feel free to start a new game with `/wordle`.",
+            description="The Wordle game has been quit. Feel free to start a new game with `/wordle start`.",
             color=discord.Color.blue()
         ))
 
+    def parse_guess(self, content, game):
+        """Return the message as a guess if it is one, else None (ordinary chat in the game channel)."""
+        if len(content) != len(game.target_word):
+            content = content.strip()
+            if len(content) != len(game.target_word):
+                return None
+        guess = content.upper()
+        dictionary = get_dictionary(length=len(game.target_word))  # Loaded when the game started
+        if guess in dictionary.valid or guess == game.target_word:
+            return guess
+        # Without a word list, any word of the right length counts
+        if not dictionary.valid and guess.isalpha():
+            return guess
+        return None
+
     @commands.Cog.listener()
     async def on_message(self, message):
-        if message.author.bot or not message.guild:
+        # This runs for every message the bot can see, so reject anything outside a game channel first
+        game = self.games.get(message.channel.id)
+        if game is None:
             return
 
-        if message.channel.id not in self.games:
+        if message.author.bot or not message.guild:
             return
 
-        guess = message.content.upper()
-        if len(guess) != 5 or not guess.isalpha():
-            await message.channel.send(embed=discord.Embed(
-                title="Invalid Guess",
-                description="Your guess must be a 5-letter word!\nType `/quit` to quit the game",
-                color=discord.Color.orange()
-            ), delete_after=5)
+        # Chat in the game channel is ignored; only words from the word list count as guesses
+        guess = self.parse_guess(message.content, game)
+        if guess is None:
             return
 
+        channel_id = message.channel.id
+        target_word = game.target_word
+        start = time.perf_counter()
         try:
-            game = self.games[message.channel.id]
-            game["last_interaction_time"] = time.time()
-            
-            original_message = await message.channel.fetch_message(game["message_id"])
-            current_row = game["current_row"]
-
-            if current_row >= 5:
-                del self.games[message.channel.id]
-                await message.channel.send(embed=discord.Embed(
-                    title="Game Over",
-                    description="The game is over! Start a new game with `/wordle`.",
-                    color=discord.Color.red()
-                ), delete_after=5)
-                return
-
-            target_word = game["target_word"]
-            button_styles = [
-                discord.ButtonStyle.success if guess[i] == target_word[i]
-                else discord.ButtonStyle.danger if guess[i] in target_word
-                else discord.ButtonStyle.secondary
-                for i in range(5)
-            ]
-
-            view = discord.ui.View()
-            for row in range(5):
-                for col in range(5):
-                    label = guess[col] if row == current_row else original_message.components[row].children[col].label
-                    style = button_styles[col] if row == current_row else original_message.components[row].children[col].style
-                    view.add_item(discord.ui.Button(label=label, style=style))
-
-            embed = discord.Embed(
-                title=f"Guess {current_row + 1}: **{guess}**",
-                description="",
-                color=discord.Color.yellow()
-            )
-
-            if game.get("hint"):
-                embed.add_field(name="Hint", value=game["hint"], inline=False)
-
-            await original_message.edit(embed=embed, view=view)
-            await message.delete()
-            
-            if guess == target_word:
-                del self.games[message.channel.id]
-                await message.channel.send(embed=discord.Embed(
-                    title="Congratulations!",
-                    description=f"🎉 {message.author.mention} guessed the word **{target_word}** correctly!",
-                    color=discord.Color.green()
-                ))
-            else:
-                game["current_row"] += 1
-                if game["current_row"] >= 5:
-                    del self.games[message.channel.id]
-                    await message.channel.send(embed=discord.Embed(
+            # Guesses sent at the same time are scored one at a time, each against the row it lands on
+            async with game.lock:
+                if self.games.get(channel_id) is not game:
+                    return  # Ended while this guess was waiting
+                self.timeouts.reschedule(("wordle", channel_id), self.game_timeout)
+                current_row = game.current_row
+
+                if current_row >= self.max_guesses(game):
+                    self.end_game(channel_id)
+                    result = discord.Embed(
+                        title="Game Over",
+                        description="The game is over! Start a new game with `/wordle start`.",
+                        color=discord.Color.red()
+                    )
+                    await message.channel.send(embed=result, delete_after=5)
+                    return
+
+                feedback = score_guess(guess, target_word)
+                game.add_guess(guess, feedback)
+                self.store.save("wordle", channel_id, game)
+
+                embed = discord.Embed(
+                    title=f"Guess {current_row + 1}: **{guess}**",
+                    color=discord.Color.yellow()
+                )
+                # Rendered while holding the lock, so boards are queued in the order the guesses landed
+                board = await self.show_board(embed, channel_id, game)
+
+                if game.hint:
+                    embed.add_field(name="Hint", value=game.hint, inline=False)
+
+                # The board is rendered from the game state, so the stored message is edited directly.
+                # Not awaited: rapid guesses collapse into one edit showing the latest board
+                edited = self.edits.submit(game.message, embed=embed, **board)
+                edited.add_done_callback(functools.partial(self.board_edited, channel_id, game))
+
+                result = None
+                if guess == target_word:
+                    self.end_game(channel_id)
+                    if game.ranked:
+                        self.stats.record("wordle", message.guild.id, message.author.id, game.current_row)
+                    result = discord.Embed(
+                        title="Congratulations!",
+                        description=f"🎉 {message.author.mention} guessed the word **{target_word}** correctly!",
+                        color=discord.Color.green()
+                    )
+                elif game.current_row >= self.max_guesses(game):
+                    self.end_game(channel_id)
+                    result = discord.Embed(
                         title="Game Over",
                         description=f"Game over! The word was **{target_word}**. Better luck next time!",
                         color=discord.Color.red()
-                    ))
+                    )
+
+            try:
+                await message.delete()
+            except discord.NotFound:
+                pass  # Already removed, e.g. by a moderator; the guess still counts
+            if result is not None:
+                await message.channel.send(embed=result)
 
         except discord.NotFound:
-            del self.games[message.channel.id]
+            self.end_game(channel_id)
+        finally:
+            self.guess_latency.observe(time.perf_counter() - start)
 
 async def setup(bot):
     await bot.add_cog(WordleGame(bot))
\ No newline at end of file
@@ -12,6 +12,18 @@ if BOT_TOKEN is None:
     raise ValueError("Bot token not found in environment variables. Please check your .env file.")
 
 
+# Cluster mode: cluster.py sets these for each worker process it starts. Left unset, the bot
+# runs as one process that opens every shard itself.
+CLUSTER_ID = int(os.getenv("CLUSTER_ID", "0"))
+CLUSTER_WORKERS = int(os.getenv("CLUSTER_WORKERS", "1"))  # Bot processes sharing this machine
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(shard) for shard in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+CLUSTER_PORT = int(os.getenv("CLUSTER_PORT")) if os.getenv("CLUSTER_PORT") else None  # The supervisor's socket
+CLUSTER_SECRET = os.getenv("CLUSTER_SECRET", "")
+CLUSTER_STARTED = float(os.getenv("CLUSTER_STARTED")) if os.getenv("CLUSTER_STARTED") else None  # Unix time
+IDENTIFY_CONCURRENCY = int(os.getenv("IDENTIFY_CONCURRENCY", "1"))  # Shards Discord lets identify at once
+
+
 """
 BOT_TOKEN = 'your token' #replace lines 10 to 12 with this if you don't want to set environment variables.
 """
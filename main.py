@@ -1,45 +1,198 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
+import asyncio
 import os
+import signal
+import time
+import aiohttp
 from discord.ui import Button, View
 from config import *
+from utils import metrics as metrics_settings
+from utils import store as store_settings
+from utils.cluster import ClusterClient
+from utils.store import SQLiteSessionStore
+from utils.stats import StatsService
+from utils.metrics import get_metrics, summarize
+from utils.command_sync import get_syncer
+
+PROCESS_STARTED = time.monotonic()  # Startup phases are measured from here
+
+IDENTIFY_INTERVAL = 5.0     # Seconds Discord wants between identifies of the same concurrency bucket
+LEADERBOARD_REFRESH = 30.0  # Seconds between re-reading the leaderboards other workers update (cluster mode)
+
+
+class GameTree(app_commands.CommandTree):
+    async def _call(self, interaction):
+        # Times every slash command (hybrid ones included) through to the end of its error handling
+        start = time.perf_counter()
+        try:
+            await super()._call(interaction)
+        finally:
+            command = interaction.command
+            name = command.qualified_name if command is not None else "unknown"
+            self.client.command_latency.labels(name, "slash").observe(time.perf_counter() - start)
+
+
+class GameBot(commands.AutoShardedBot):
+    def __init__(self, *args, **kwargs):
+        # REST calls are timed through the HTTP session's trace hooks, which have to exist before login
+        trace = aiohttp.TraceConfig()
+        super().__init__(*args, http_trace=trace, tree_cls=GameTree, **kwargs)
+        metrics = get_metrics(self)
+        metrics.trace_requests(trace)
+        self.command_latency = metrics.histogram("command_seconds", "Time to run a command", ("command", "kind"))
+        self.cluster = None  # Link to the other workers when started by cluster.py
+        self.startup = {}    # Startup phase -> seconds it took
+        metrics.gauge("startup_seconds", "Time each startup phase took", ("phase",),
+                      lambda: {(phase,): seconds for phase, seconds in self.startup.items()})
+
+    async def setup_hook(self):
+        # Runs once, after login and before connecting to the gateway
+        setup_started = time.monotonic()
+        # Start sampling the event loop lag and serving the Prometheus endpoint (one port per worker, none if PORT is None)
+        port = None if metrics_settings.PORT is None else metrics_settings.PORT + CLUSTER_ID
+        await self.metrics.start(port=port)
+        if CLUSTER_PORT is None:
+            # Open the session store before any cog loads, so cogs can restore their games from it
+            # (unless a script already gave the bot one)
+            if getattr(self, "session_store", None) is None:
+                self.session_store = SQLiteSessionStore()
+        else:
+            # A cluster worker only sees the servers on its shards, so it keeps their games to itself,
+            # while results go to the shared database and the leaderboards are re-read from it
+            path, extension = os.path.splitext(store_settings.DEFAULT_PATH)
+            self.session_store = SQLiteSessionStore(f"{path}-{CLUSTER_ID}{extension}")
+            self.stats = StatsService(refresh_interval=LEADERBOARD_REFRESH)
+            self.cluster = ClusterClient(CLUSTER_ID, CLUSTER_PORT, CLUSTER_SECRET)
+            self.cluster.on("extension", self.apply_extension_action)
+            self.cluster.start()
+        try:
+            # Stop cleanly (saving running games) when the supervisor or a service manager stops the bot
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except NotImplementedError:
+            pass  # Not available on Windows
+
+        # Cogs are loaded once here rather than in on_ready, which fires again after some reconnects
+        started = time.monotonic()
+        await self.load_cogs()
+        self.startup["cogs"] = time.monotonic() - started
+
+        # Sync slash commands, but only if they changed since the last sync. They are global,
+        # so in a cluster the first worker syncs them for everyone.
+        if CLUSTER_ID == 0:
+            started = time.monotonic()
+            try:
+                if await get_syncer(self).sync():
+                    print("Slash commands synced successfully!")
+                else:
+                    print("Slash commands unchanged since the last sync")
+            except Exception as e:
+                print(f"Failed to sync slash commands: {e}")
+            self.startup["sync"] = time.monotonic() - started
+        self.startup["setup"] = time.monotonic() - setup_started
+
+    async def load_cogs(self):
+        # Dynamically load cogs from the cogs directory
+        for filename in sorted(os.listdir('./cogs')):
+            if filename.endswith('.py'):
+                cog_name = f'cogs.{filename[:-3]}'
+                try:
+                    await self.load_extension(cog_name)
+                    print(f'Loaded cog: {cog_name}')
+                except Exception as e:
+                    print(f'Failed to load cog {cog_name}: {e}')
+
+    async def before_identify_hook(self, shard_id, *, initial=False):
+        # Shards of every worker take turns from the cluster's start, IDENTIFY_CONCURRENCY at a time,
+        # so workers starting together don't identify at once. Later identifies (reconnects, restarted
+        # workers) are spaced by the library's default.
+        if CLUSTER_STARTED is not None:
+            delay = CLUSTER_STARTED + IDENTIFY_INTERVAL * (shard_id // IDENTIFY_CONCURRENCY) - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                return
+        await super().before_identify_hook(shard_id, initial=initial)
+
+    async def apply_extension_action(self, action, cogs):
+        """Repeat an owner's load/unload/reload/switch sent by another worker (which syncs the commands itself)."""
+        if action != "load":
+            await self.unload_extension(f'cogs.{cogs[0]}')
+        if action != "unload":
+            await self.load_extension(f'cogs.{cogs[-1]}')
+
+    async def invoke(self, ctx):
+        # Times prefix commands; slash commands are timed by GameTree
+        start = time.perf_counter()
+        try:
+            await super().invoke(ctx)
+        finally:
+            if ctx.command is not None:
+                self.command_latency.labels(ctx.command.qualified_name, "prefix").observe(time.perf_counter() - start)
+
+    async def close(self):
+        # Stop animations, drop queued message edits and write out any pending game sessions and results before shutting down
+        animations = getattr(self, "animations", None)
+        if animations is not None:
+            animations.close()
+        edits = getattr(self, "edits", None)
+        if edits is not None:
+            edits.close()
+        store = getattr(self, "session_store", None)
+        if store is not None:
+            await store.close()
+        stats = getattr(self, "stats", None)
+        if stats is not None:
+            await stats.close()
+        renderer = getattr(self, "renderer", None)
+        if renderer is not None:
+            renderer.close()
+        if self.cluster is not None:
+            await self.cluster.close()
+        await self.metrics.close()
+        await super().close()
+
 
 # Create the bot instance
 intents = discord.Intents.default()
 intents.message_content = True  # Needed for receiving messages
 intents.members = True
-bot = commands.Bot(command_prefix=PREFIX, intents=intents)
+# One process opens every shard itself unless cluster.py gave it a range of them.
+# The presence is sent with each shard's identify, so reconnects don't have to set it again.
+bot = GameBot(
+    command_prefix=PREFIX, intents=intents, shard_ids=SHARD_IDS, shard_count=SHARD_COUNT,
+    activity=discord.Activity(type=discord.ActivityType.listening, name=f"prefix: {PREFIX[0]}")
+)
 
-# Sync slash commands on bot startup
+# Cogs and slash commands are set up in GameBot.setup_hook; this fires again after reconnects that can't resume
 @bot.event
 async def on_ready():
+    bot.startup.setdefault("ready", time.monotonic() - PROCESS_STARTED)
     print(f'{bot.user} has connected to Discord!')
 
-    # Dynamically load cogs from the cogs directory
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py'):
-            cog_name = f'cogs.{filename[:-3]}'
-            try:
-                await bot.load_extension(cog_name)
-                print(f'Loaded cog: {cog_name}')
-            except Exception as e:
-                print(f'Failed to load cog {cog_name}: {e}')
-
-    # Sync slash commands
-    await bot.tree.sync()
-    print("Slash commands synced successfully!")
-
-    # Set bot presence
-    await bot.change_presence(
-        activity=discord.Activity(type=discord.ActivityType.listening, name=f"prefix: {PREFIX[0]}")
-    )
+# Repeat cog actions on the other workers of a cluster
+async def fan_out(ctx, action, *cogs):
+    if bot.cluster is None:
+        return
+    try:
+        results = await bot.cluster.broadcast("extension", action=action, cogs=cogs)
+    except ConnectionError as e:
+        await ctx.send(f'Failed to reach the other workers. Error: {e}')
+        return
+    failed = {cluster_id: error for cluster_id, error in results.items() if error}
+    if failed:
+        await ctx.send('Failed on ' + '; '.join(f'worker {cluster_id}: {error}' for cluster_id, error in sorted(failed.items())))
+    else:
+        await ctx.send(f'Done on all {len(results) + 1} workers!')
 
-# Sync slash commands after cog actions
+# Sync slash commands after cog actions. Actions a few seconds apart share one sync,
+# which is skipped if they left the commands as they were.
 async def sync_commands(ctx):
     try:
-        await bot.tree.sync()
-        await ctx.send("Slash commands synced successfully!")
+        if await get_syncer(bot).request():
+            await ctx.send("Slash commands synced successfully!")
+        else:
+            await ctx.send("Slash commands unchanged, nothing to sync.")
     except Exception as e:
         await ctx.send(f"Failed to sync slash commands. Error: {e}")
 
@@ -51,6 +204,7 @@ async def load_cog(ctx, cog: str):
     try:
         await bot.load_extension(f'cogs.{cog}')
         await ctx.send(f'Cog {cog} loaded successfully!')
+        await fan_out(ctx, 'load', cog)
         await sync_commands(ctx)  # Sync slash commands after loading a cog
     except Exception as e:
         await ctx.send(f'Failed to load cog {cog}. Error: {e}')
@@ -63,6 +217,7 @@ async def unload_cog(ctx, cog: str):
     try:
         await bot.unload_extension(f'cogs.{cog}')
         await ctx.send(f'Cog {cog} unloaded successfully!')
+        await fan_out(ctx, 'unload', cog)
         await sync_commands(ctx)  # Sync slash commands after unloading a cog
     except Exception as e:
         await ctx.send(f'Failed to unload cog {cog}. Error: {e}')
@@ -76,6 +231,7 @@ async def reload_cog(ctx, cog: str):
         await bot.unload_extension(f'cogs.{cog}')
         await bot.load_extension(f'cogs.{cog}')
         await ctx.send(f'Cog {cog} reloaded successfully!')
+        await fan_out(ctx, 'reload', cog)
         await sync_commands(ctx)  # Sync slash commands after reloading a cog
     except Exception as e:
         await ctx.send(f'Failed to reload cog {cog}. Error: {e}')
@@ -95,13 +251,59 @@ async def switch_cogs(ctx, cog_to_unload: str, cog_to_load: str):
         # Load the new cog
         await bot.load_extension(f'cogs.{cog_to_load}')
         await ctx.send(f'Cog {cog_to_load} loaded successfully!')
-        
-        # Sync commands
+
+        # Repeat on the other workers, then sync commands
+        await fan_out(ctx, 'switch', cog_to_unload, cog_to_load)
         await sync_commands(ctx)
     except Exception as e:
         await ctx.send(f'Failed to switch cogs. Error: {e}')
 
 
+def format_latencies(metric, top=6):
+    rows = summarize(metric, top)
+    return "\n".join(
+        f"`{' '.join(labels)}` {count}× · p50 {p50 * 1000:.1f}ms · p99 {p99 * 1000:.1f}ms"
+        for labels, count, p50, p99, _ in rows
+    ) or "Nothing recorded yet"
+
+# Command to show runtime metrics (the same numbers the Prometheus endpoint serves)
+@bot.command(name='metrics')
+@commands.is_owner()
+async def show_metrics(ctx):
+    """Show command and interaction latency, REST calls, running games and event loop lag."""
+    metrics = bot.metrics
+    responses = metrics.get("discord_rest_responses")
+    statuses = {}
+    for (method, route, status), counter in (responses.items() if responses else []):
+        statuses[status] = statuses.get(status, 0) + counter.value
+    games = ", ".join(f"{game}: {count}" for (game,), count in sorted(metrics.get("active_games").items())) or "None"
+    lag = metrics.loop_lag
+    minutes = int(time.monotonic() - metrics.started) // 60
+
+    embed = discord.Embed(title="Bot Metrics", color=discord.Color.blue())
+    embed.add_field(name="Commands", value=format_latencies(metrics.get("command_seconds")), inline=False)
+    embed.add_field(name="Interactions", value=format_latencies(metrics.get("interaction_seconds")), inline=False)
+    embed.add_field(
+        name=f"REST calls ({sum(statuses.values())}, {statuses.get('429', 0)} rate limited)",
+        value=format_latencies(metrics.get("discord_rest_seconds")), inline=False
+    )
+    embed.add_field(name="Timeouts", value=format_latencies(metrics.get("timeout_seconds")), inline=False)
+    embed.add_field(name="Active Games", value=games, inline=False)
+    embed.add_field(
+        name="Startup",
+        value=" · ".join(f"{phase} {seconds:.2f}s" for phase, seconds in bot.startup.items()) or "Not finished",
+        inline=False
+    )
+    embed.add_field(
+        name="Event Loop Lag",
+        value=f"p50 {lag.quantile(0.5) * 1000:.1f}ms · p99 {lag.quantile(0.99) * 1000:.1f}ms · max {lag.max * 1000:.1f}ms"
+        if lag.count else "Not sampled yet",
+        inline=False
+    )
+    # In a cluster these are this worker's numbers; each worker serves its own endpoint
+    worker = f"Worker {CLUSTER_ID} · " if bot.cluster is not None else ""
+    embed.set_footer(text=f"{worker}Up {minutes // 60}h {minutes % 60}m")
+    await ctx.send(embed=embed)
 
 
 # Handle command errors
@@ -130,4 +332,5 @@ async def on_command_error(ctx, error):
         await ctx.send(embed=embed, view=view)
 
 # Run the bot with your token
-bot.run(BOT_TOKEN)
+if __name__ == "__main__":
+    bot.run(BOT_TOKEN)
@@ -0,0 +1,88 @@
+"""
+Animation benchmark: plays a sequence in many games at once, first with one sleeping
+coroutine per game (edit, sleep, repeat) and then on the shared animation clock,
+reporting CPU time per frame, how many separate bursts the edits arrived in and how
+far the gap between a game's frames drifted from the intended frame time.
+
+Edits go through the real edit queue to messages whose edits return immediately.
+
+Usage (from the repository root):
+    python -m scripts.bench_animation [--games N] [--steps N] [--tick SECONDS]
+"""
+import argparse
+import asyncio
+import time
+
+from scripts.bench_wordle_messages import FakeMessage
+from utils.animation import AnimationClock
+from utils.edits import EditCoalescer
+
+
+class TimedEdits(EditCoalescer):
+    """Records when each frame was handed over, per message."""
+
+    def __init__(self):
+        super().__init__(min_interval=0)
+        self.times = {}
+
+    def _queue(self, message, fields):
+        self.times.setdefault(message.id, []).append(time.monotonic())
+        return super()._queue(message, fields)
+
+
+async def sleeping(edits, messages, steps, tick):
+    async def show(message):
+        for step in range(steps):
+            await edits.edit(message, view=step)
+            await asyncio.sleep(tick)
+
+    await asyncio.gather(*(show(message) for message in messages))
+
+
+async def clocked(edits, messages, steps, tick):
+    clock = AnimationClock(edits, tick=tick)
+    done = asyncio.Event()
+    remaining = len(messages)
+
+    async def finished():
+        nonlocal remaining
+        remaining -= 1
+        if not remaining:
+            done.set()
+
+    for message in messages:
+        clock.play(message.id, message, ({"view": step} for step in range(steps)), on_finish=finished)
+    await done.wait()
+
+
+async def run(games, steps, tick):
+    print(f"{'mode':<10}{'frames':>8}{'cpu/frame':>12}{'bursts':>8}{'gap':>10}{'max gap':>10}")
+    for name, animate in (("sleeping", sleeping), ("clock", clocked)):
+        edits = TimedEdits()
+        messages = [FakeMessage(i, i, "") for i in range(games)]
+        cpu = time.process_time()
+        await animate(edits, messages, steps, tick)
+        cpu = time.process_time() - cpu
+        edits.close()
+
+        frames = sum(len(times) for times in edits.times.values())
+        # Frames handed over within a millisecond of each other count as one burst
+        moments = sorted(t for times in edits.times.values() for t in times)
+        bursts = 1 + sum(1 for a, b in zip(moments, moments[1:]) if b - a > 0.001)
+        gaps = [b - a for times in edits.times.values() for a, b in zip(times, times[1:])]
+        print(f"{name:<10}{frames:>8}{cpu / frames * 1e6:>10.1f}us{bursts:>8}"
+              f"{sum(gaps) / len(gaps) * 1000:>8.1f}ms{max(gaps) * 1000:>8.1f}ms")
+    print(f"(intended gap {tick * 1000:.1f}ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000, help="games animating at once")
+    parser.add_argument("--steps", type=int, default=10, help="frames per game")
+    parser.add_argument("--tick", type=float, default=0.1, help="seconds per frame")
+    args = parser.parse_args()
+    asyncio.run(run(args.games, args.steps, args.tick))
+
+
+if __name__ == "__main__":
+    main()
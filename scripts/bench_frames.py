@@ -0,0 +1,67 @@
+"""
+Frame-cache benchmark for Sequence Memory: animates a sequence in many games and
+compares rebuilding every view against the cached frames, reporting frame rate,
+UI buttons built and cache hit rate.
+
+Usage (from the repository root):
+    python -m scripts.bench_frames [--games N] [--steps N]
+"""
+import argparse
+import asyncio
+import random
+import time
+from array import array
+
+from cogs.sequence import FRAME_CACHE_SIZE, SequenceMemoryGame
+from utils.frames import FrameCache
+from utils.sessions import SequenceSession
+
+
+def animate(render, games, steps):
+    """Render every frame of a ``steps``-long round in each game, as show_sequence and the presses do."""
+    for i in range(games):
+        game = SequenceSession(i, game_id=i)
+        game.game_started = True
+        game.current_sequence = array("B", (random.randint(0, 23) for _ in range(steps)))
+        game.showing_sequence = True
+        render(game, None)
+        for cell in game.current_sequence:
+            render(game, cell)
+        game.showing_sequence = False
+        for cell in game.current_sequence:
+            game.player_sequence.append(cell)
+            render(game, None)
+
+
+async def run(games, steps):
+    # Only the rendering methods are used, so skip the cog's timers and session store
+    cog = SequenceMemoryGame.__new__(SequenceMemoryGame)
+    cog.frames = FrameCache(FRAME_CACHE_SIZE)
+    renders = 0
+
+    def rebuild(game, highlight):
+        nonlocal renders
+        renders += 1
+        return cog.render_game_view(game, highlight, cog.correct_mask(game))
+
+    frames = games * (2 * steps + 1)
+    for name, render in (("rebuild", rebuild), ("cached", cog.create_game_view)):
+        random.seed(0)
+        start = time.perf_counter()
+        animate(render, games, steps)
+        elapsed = time.perf_counter() - start
+        built = (renders if name == "rebuild" else cog.frames.misses) * 25
+        print(f"{name:<8}{frames / elapsed:>10,.0f} frames/s {built / games:>8,.0f} buttons built per game")
+    print(f"cache: {len(cog.frames)} frames, {cog.frames.hits / (cog.frames.hits + cog.frames.misses):.1%} hits")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=100, help="games to animate")
+    parser.add_argument("--steps", type=int, default=30, help="sequence length")
+    args = parser.parse_args()
+    asyncio.run(run(args.games, args.steps))  # Views need a running event loop
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Metrics overhead benchmark: what the instrumentation in utils/metrics.py adds to the
+paths it measures. Reports the cost of recording one observation, of one routed button
+click with and without metrics (the handler does nothing, so the difference is all
+overhead), of the REST trace hooks per call and of rendering a scrape.
+
+Usage (from the repository root):
+    python -m scripts.bench_metrics [--count N] [--routes N]
+"""
+import argparse
+import asyncio
+import time
+from types import SimpleNamespace
+
+import aiohttp
+from yarl import URL
+
+from scripts.bench_router import FakeInteraction
+from utils.metrics import Histogram, Metrics
+from utils.router import InteractionRouter, make_custom_id
+
+
+def per_call(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - start) / count
+
+
+async def per_await(function, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        await function()
+    return (time.perf_counter() - start) / count
+
+
+async def router_click(metrics, count):
+    router = InteractionRouter(metrics)
+
+    async def handler(interaction, game_id, action):
+        pass
+
+    router.register("memory", handler)
+    interaction = FakeInteraction(1, make_custom_id("memory", 1234, 12))
+    return await per_await(lambda: router.dispatch(interaction), count)
+
+
+async def trace_hooks(count):
+    """One REST call's worth of trace callbacks, as aiohttp would run them."""
+    trace = aiohttp.TraceConfig()
+    Metrics().trace_requests(trace)
+    start_hook, = trace.on_request_start
+    end_hook, = trace.on_request_end
+    url = URL("https://discord.com/api/v10/channels/123456789012345678/messages/123456789012345679")
+    params = SimpleNamespace(method="PATCH", url=url, response=SimpleNamespace(status=200))
+    context = SimpleNamespace()
+
+    async def call():
+        await start_hook(None, context, params)
+        await end_hook(None, context, params)
+
+    return await per_await(call, count)
+
+
+def scrape(routes, count):
+    """Render a registry with ``routes`` REST routes and a typical set of game and command series."""
+    metrics = Metrics()
+    for name, labelnames, values in (
+        ("discord_rest_seconds", ("method", "route"), [("PATCH", f"/route/{n}") for n in range(routes)]),
+        ("interaction_seconds", ("game",), [(game,) for game in ("tictactoe", "wordle", "memory", "sequence")]),
+        ("command_seconds", ("command", "kind"), [(command, kind) for command in range(10) for kind in ("prefix", "slash")]),
+    ):
+        family = metrics.histogram(name, name, labelnames)
+        for labels in values:
+            family.labels(*map(str, labels)).observe(0.01)
+    text = metrics.render()
+    return per_call(metrics.render, count), len(text.splitlines())
+
+
+async def run(count, routes):
+    histogram = Histogram()
+    family = Metrics().histogram("bench_seconds", "Benchmark", ("game",))
+    observe = per_call(lambda: histogram.observe(0.0042), count)
+    labelled = per_call(lambda: family.labels("memory").observe(0.0042), count)
+    timed = per_call(lambda: histogram.observe(time.perf_counter() - time.perf_counter()), count)
+    print(f"{'observe':<32}{observe * 1e9:>10.0f} ns")
+    print(f"{'labels(...).observe':<32}{labelled * 1e9:>10.0f} ns")
+    print(f"{'perf_counter + observe':<32}{timed * 1e9:>10.0f} ns")
+
+    bare = await router_click(None, count)
+    instrumented = await router_click(Metrics(), count)
+    print(f"{'router click, no metrics':<32}{bare * 1e6:>10.2f} us")
+    print(f"{'router click, metrics':<32}{instrumented * 1e6:>10.2f} us  (+{(instrumented - bare) * 1e9:.0f} ns)")
+
+    print(f"{'REST trace hooks per call':<32}{await trace_hooks(count) * 1e6:>10.2f} us")
+
+    render, lines = scrape(routes, max(count // 1000, 10))
+    print(f"{'scrape render':<32}{render * 1e3:>10.2f} ms  ({lines} lines)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000, help="operations per measurement")
+    parser.add_argument("--routes", type=int, default=30, help="REST routes in the scraped registry")
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.routes))
+
+
+if __name__ == "__main__":
+    main()
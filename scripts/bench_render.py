@@ -0,0 +1,68 @@
+"""
+Image board benchmark: many concurrent Wordle games render their board after every
+guess through the shared renderer, reporting p50/p99 render latency as seen by the
+game (queueing included), boards per second, PNG cache hits and the share of cells
+actually redrawn. Guesses arrive at random times averaging ``--rate`` boards per
+second across all games; ``--rate 0`` sends every guess at once as a burst.
+Runs once redrawing every cell and once redrawing only the changed cells.
+
+Needs Pillow. Usage (from the repository root):
+    python -m scripts.bench_render [--games N] [--rate N] [--length N] [--rows N] [--workers N]
+"""
+import argparse
+import asyncio
+import random
+import string
+import time
+
+from utils.render import BoardRenderer
+
+STYLES = ("absent", "present", "correct")
+
+
+async def play(renderer, key, length, rows, gap, latencies):
+    """One game: a board that gains a random row of feedback per guess, ``gap`` seconds apart on average."""
+    cells = [("empty", "")] * (length * rows)
+    await renderer.render(None, length, tuple(cells))  # The starting board, shared by every game
+    for row in range(rows):
+        await asyncio.sleep(random.random() * 2 * gap)
+        for column in range(length):
+            cells[row * length + column] = (random.choice(STYLES), random.choice(string.ascii_uppercase))
+        start = time.perf_counter()
+        await renderer.render(key, length, tuple(cells))
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(games, rate, length, rows, workers):
+    gap = games / rate if rate else 0
+    print(f"{'mode':<12}{'boards/s':>10}{'p50':>10}{'p99':>10}{'redrawn':>10}{'png hits':>10}")
+    for name, canvases in (("full", 0), ("incremental", games)):
+        random.seed(0)
+        renderer = BoardRenderer(workers=workers, canvas_cache_size=canvases)
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(play(renderer, key, length, rows, gap, latencies) for key in range(games)))
+        elapsed = time.perf_counter() - start
+        renderer.close()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+        redrawn = renderer.cells_drawn / max(renderer.cells_total, 1)
+        hits = renderer.png_hits / (len(latencies) + games)
+        print(f"{name:<12}{len(latencies) / elapsed:>10,.0f}{p50:>8.1f}ms{p99:>8.1f}ms{redrawn:>10.0%}{hits:>10.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=500, help="concurrent games")
+    parser.add_argument("--rate", type=float, default=300, help="average boards per second over all games (0: burst)")
+    parser.add_argument("--length", type=int, default=5, help="letters per word")
+    parser.add_argument("--rows", type=int, default=6, help="guesses per game")
+    parser.add_argument("--workers", type=int, default=4, help="render threads")
+    args = parser.parse_args()
+    asyncio.run(run(args.games, args.rate, args.length, args.rows, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Interaction dispatch benchmark: cost of one button click as more game cogs are
+loaded, with every cog listening to on_interaction (the old layout) versus one
+router listener dispatching by custom_id prefix.
+
+Usage (from the repository root):
+    python -m scripts.bench_router [--clicks N] [--cogs 1,2,4,8,16,32]
+"""
+import argparse
+import asyncio
+import time
+
+import discord
+from discord.ext import commands
+
+from utils.router import get_router, make_custom_id
+
+
+class FakeInteraction:
+    type = discord.InteractionType.component
+
+    def __init__(self, channel_id, custom_id):
+        self.channel = discord.Object(channel_id)
+        self.data = {"custom_id": custom_id}
+
+
+def listener_cog(index, games):
+    """A game cog in the old style: it sees every interaction and filters by channel and custom_id."""
+    class ListenerGame(commands.Cog, name=f"ListenerGame{index}"):
+        @commands.Cog.listener()
+        async def on_interaction(self, interaction):
+            game = games.get(interaction.channel.id)
+            if not game:
+                return
+            custom_id = interaction.data.get("custom_id")
+            if not custom_id or not custom_id.startswith(f"game{index}_"):
+                return
+            game["clicks"] += 1
+
+    return ListenerGame()
+
+
+async def measure(bot, interaction, clicks):
+    async with bot:  # Sets up the bot's event loop without logging in
+        start = time.perf_counter()
+        for _ in range(clicks):
+            bot.dispatch("interaction", interaction)
+            await asyncio.sleep(0)  # Let the listener tasks run
+        await asyncio.sleep(0)
+        return (time.perf_counter() - start) / clicks
+
+
+async def run(clicks, counts):
+    print(f"{'cogs':>6}{'listeners':>14}{'router':>14}")
+    for count in counts:
+        # Each cog has one game in its own channel; the click goes to the last cog's game
+        games = {channel_id: {"clicks": 0} for channel_id in range(count)}
+        listener_bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        for index in range(count):
+            await listener_bot.add_cog(listener_cog(index, {index: games[index]}))
+        listener_time = await measure(listener_bot, FakeInteraction(count - 1, f"game{count - 1}_3"), clicks)
+
+        router_bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+        router = get_router(router_bot)
+        for index in range(count):
+            async def handler(interaction, game_id, action, games=games):
+                game = games.get(interaction.channel.id)
+                if game:
+                    game["clicks"] += 1
+            router.register(f"game{index}", handler)
+        router_time = await measure(router_bot, FakeInteraction(count - 1, make_custom_id(f"game{count - 1}", 1, 3)), clicks)
+
+        print(f"{count:>6}{listener_time * 1e6:>11.1f} us{router_time * 1e6:>11.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clicks", type=int, default=20000, help="clicks per measurement")
+    parser.add_argument("--cogs", default="1,2,4,8,16,32", help="comma-separated numbers of game cogs")
+    args = parser.parse_args()
+    asyncio.run(run(args.clicks, [int(count) for count in args.cogs.split(",")]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Memory benchmark for game sessions: reports bytes per live game for each game
+type, next to the free-form dict layout the cogs used before.
+
+Usage (from the repository root):
+    python -m scripts.bench_sessions [--games N]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from utils.dictionary import score_guess
+from utils.sessions import MemorySession, SequenceSession, TicTacToeSession, WordleSession
+
+EMOJIS = ["🍎", "🍌", "🍒", "🍇", "🍉", "🍍", "🍓", "🍑", "🍊", "🍋", "🍏", "🥝"]
+WORDS = ["CRANE", "SLATE", "TRAIN", "PLANT", "GHOST", "STONE"]
+
+
+def make_tictactoe(i):
+    game = TicTacToeSession((1000 + i, None), ("player", "bot"), 1000 + i, game_started=True)
+    for cell in (4, 0, 8):
+        game.board.play(cell)
+    return game
+
+
+def make_tictactoe_dict(i):
+    return {
+        "board": [["X", None, None], [None, "O", None], [None, None, "X"]],
+        "players": {"X": "player", "O": "AI"},
+        "current_player": "O",
+        "message_id": 10 ** 18 + i,
+        "message": None,
+        "is_ai_game": True,
+        "game_started": True,
+        "owner": 1000 + i,
+    }
+
+
+def make_wordle(i):
+    game = WordleSession(WORDS[i % len(WORDS)], 1000 + i)
+    for guess in WORDS[:3]:
+        game.add_guess(guess, score_guess(guess, game.target_word))
+    return game
+
+
+def make_wordle_dict(i):
+    target = WORDS[i % len(WORDS)]
+    return {
+        "target_word": target,
+        "current_row": 3,
+        "message_id": 10 ** 18 + i,
+        "owner": 1000 + i,
+        "hint": None,
+        "history": [(guess, score_guess(guess, target)) for guess in WORDS[:3]],
+        "last_interaction_time": time.time(),
+    }
+
+
+def shuffled_pairs():
+    pairs = EMOJIS * 2
+    random.shuffle(pairs)
+    return pairs + ["🔹"]
+
+
+def make_memory(i):
+    game = MemorySession(shuffled_pairs(), 1000 + i)
+    game.game_started = True
+    game.start_time = time.time()
+    game.matched = 0b1111111111
+    game.revealed = 0b11111111111
+    game.current_turn = (10,)
+    game.message_id = 10 ** 18 + i
+    return game
+
+
+def make_memory_dict(i):
+    return {
+        "emoji_pairs": shuffled_pairs(),
+        "revealed": list(range(11)),
+        "matched": list(range(10)),
+        "current_turn": [10],
+        "owner": 1000 + i,
+        "start_time": time.time(),
+        "game_started": True,
+        "is_processing": False,
+        "last_interaction_time": time.time(),
+        "message_id": 10 ** 18 + i,
+    }
+
+
+def make_sequence(i):
+    game = SequenceSession(1000 + i)
+    game.game_started = True
+    game.current_sequence.extend(random.randint(0, 23) for _ in range(12))
+    game.player_sequence.extend(game.current_sequence[:6])
+    game.round = 12
+    return game
+
+
+def make_sequence_dict(i):
+    sequence = [random.randint(0, 23) for _ in range(12)]
+    return {
+        "owner": 1000 + i,
+        "game_started": True,
+        "current_sequence": sequence,
+        "player_sequence": sequence[:6],
+        "round": 12,
+        "showing_sequence": False,
+        "last_interaction_time": time.time(),
+        "message": None,
+        "is_quitting": False,
+        "error_button": None,
+        "correct_button": None,
+        "showing_correct": False,
+    }
+
+
+def bytes_per_game(factory, count):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    games = {i: factory(i) for i in range(count)}
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del games
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=10000, help="live games per type")
+    args = parser.parse_args()
+
+    print(f"{'game':<12}{'session':>12}{'dict':>12}")
+    for name, session, legacy in (
+        ("tictactoe", make_tictactoe, make_tictactoe_dict),
+        ("wordle", make_wordle, make_wordle_dict),
+        ("memory", make_memory, make_memory_dict),
+        ("sequence", make_sequence, make_sequence_dict),
+    ):
+        print(f"{name:<12}{bytes_per_game(session, args.games):>10.0f} B{bytes_per_game(legacy, args.games):>10.0f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Stats benchmark: records game results from many players across many servers,
+reporting results written per second and batch commit times, then times the
+/leaderboard command end to end (minus the network send) on the cached boards.
+
+Usage (from the repository root):
+    python -m scripts.bench_stats [--results N] [--players N] [--guilds N] [--lookups N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+from cogs.leaderboard import Leaderboard
+from utils.stats import LEADERBOARDS, StatsService
+
+SCORES = {
+    "tictactoe": lambda: 1,
+    "wordle": lambda: random.randint(1, 5),
+    "memory": lambda: random.randint(20, 300),
+    "sequence": lambda: random.randint(1, 25),
+}
+
+
+class TimedStats(StatsService):
+    """Records how long each batch takes to commit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_times = []
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        rows = super()._write(batch)
+        self.write_times.append(time.perf_counter() - start)
+        return rows
+
+
+class FakeContext:
+    def __init__(self, guild):
+        self.guild = guild
+
+    async def send(self, *args, **kwargs):
+        pass
+
+
+async def run(results, players, guilds, lookups, path):
+    stats = TimedStats(path, flush_interval=0.05)
+    games = list(LEADERBOARDS)
+
+    start = time.perf_counter()
+    for n in range(results):
+        game = random.choice(games)
+        stats.record(game, random.randint(1, guilds), random.randrange(players), SCORES[game]())
+        if n % 1000 == 0:
+            await asyncio.sleep(0)  # Let the writer run, as the event loop would between games
+    await stats.flush()
+    elapsed = time.perf_counter() - start
+
+    print(f"results:     {results} in {elapsed:.2f}s ({results / elapsed:,.0f} results/s)")
+    print(f"batches:     {stats.batches}")
+    times = sorted(stats.write_times)
+    print(f"batch time:  median {times[len(times) // 2] * 1000:.1f} ms, max {times[-1] * 1000:.1f} ms")
+
+    # Only the command itself is exercised, so the cog isn't added to a running bot
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    bot.stats = stats
+    cog = Leaderboard(bot)
+    start = time.perf_counter()
+    await stats.load()
+    print(f"cache load:  {(time.perf_counter() - start) * 1000:.1f} ms for {len(stats._top)} leaderboards")
+
+    ctx = FakeContext(discord.Object(1))
+    ctx.guild.name = "bench"
+    latencies = []
+    for n in range(lookups):
+        start = time.perf_counter()
+        await cog.leaderboard.callback(cog, ctx, games[n % len(games)], "global" if n % 2 else "server")
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    print(f"leaderboard: median {latencies[len(latencies) // 2] * 1e6:.0f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us")
+    await stats.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results", type=int, default=200000, help="game results to record")
+    parser.add_argument("--players", type=int, default=20000, help="distinct players")
+    parser.add_argument("--guilds", type=int, default=100, help="distinct servers")
+    parser.add_argument("--lookups", type=int, default=10000, help="leaderboard commands to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args.results, args.players, args.guilds, args.lookups, os.path.join(directory, "stats.sqlite3")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Throughput benchmark for the session store: simulates players clicking in many
+concurrent games and reports sustained clicks per second, rows written and the
+time each write-behind flush takes.
+
+Usage (from the repository root):
+    python -m scripts.bench_store [--games N] [--clicks N] [--interval SECONDS]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from utils.sessions import TicTacToeSession
+from utils.store import SQLiteSessionStore
+
+
+class TimedStore(SQLiteSessionStore):
+    """Records how long each batch takes to commit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.write_times = []
+
+    def _write(self, upserts, deletes):
+        start = time.perf_counter()
+        super()._write(upserts, deletes)
+        self.write_times.append(time.perf_counter() - start)
+
+
+async def run(games, clicks, interval, path):
+    store = TimedStore(path, flush_interval=interval)
+    sessions = [TicTacToeSession((i, None), ("player", "bot"), i, game_started=True) for i in range(games)]
+
+    start = time.perf_counter()
+    for n in range(clicks):
+        channel_id = random.randrange(games)
+        game = sessions[channel_id]
+        empty = game.board.empty
+        if not empty or game.board.status() is not None:
+            game = sessions[channel_id] = TicTacToeSession((channel_id, None), ("player", "bot"), channel_id, game_started=True)
+            empty = game.board.empty
+        game.board.play(random.choice([i for i in range(game.board.geometry.cells) if empty >> i & 1]))
+        store.save("tictactoe", channel_id, game)
+        if n % 1000 == 0:
+            await asyncio.sleep(0)  # Let the flush task run, as the event loop would between interactions
+    await store.flush()
+    elapsed = time.perf_counter() - start
+
+    restored = await store.load("tictactoe")
+    await store.close()
+
+    print(f"clicks:       {clicks} in {elapsed:.2f}s ({clicks / elapsed:,.0f} clicks/s)")
+    print(f"rows written: {store.writes} in {store.flushes} flushes")
+    if store.write_times:
+        times = sorted(store.write_times)
+        print(f"flush time:   median {times[len(times) // 2] * 1000:.1f} ms, max {times[-1] * 1000:.1f} ms")
+    print(f"restored:     {len(restored)} games")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000, help="concurrent games")
+    parser.add_argument("--clicks", type=int, default=200000, help="total clicks to simulate")
+    parser.add_argument("--interval", type=float, default=0.05, help="flush interval in seconds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args.games, args.clicks, args.interval, os.path.join(directory, "sessions.sqlite3")))
+
+
+if __name__ == "__main__":
+    main()
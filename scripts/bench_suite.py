@@ -0,0 +1,282 @@
+"""
+Microbenchmarks of every game's per-interaction hot paths, compared against stored
+baselines (scripts/bench_baseline.json) to catch changes that make a click or guess
+cost more CPU. Runs headless: the cogs are built on a bot that never connects.
+
+Each benchmark reports the best per-operation time over several rounds, which take
+turns through all the benchmarks so a slow patch of the machine doesn't land on just
+one of them. How far apart the rounds' best times are is the benchmark's spread (noise),
+and is stored with the baseline. A benchmark slower than its baseline by more than
+``--threshold`` (default 25%) and by more than ``NOISE_MARGIN`` times the larger of the
+two spreads is a regression, and the run exits with status 1. Baselines depend on the
+machine, so save them again (``--save``) on the machine the suite is compared on.
+
+Usage (from the repository root):
+    python -m scripts.bench_suite [--only TEXT] [--threshold 0.25] [--rounds N] [--repeat N]
+    python -m scripts.bench_suite --save
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import string
+import timeit
+
+os.environ.setdefault("BOT_TOKEN", "fake")  # config.py insists on a token; nothing here connects
+
+import discord
+from discord.ext import commands
+
+from cogs.memory import MemoryMatchingGame
+from cogs.sequence import SequenceMemoryGame
+from cogs.tictactoe import TicTacToeGame
+from cogs.wordle import DEFAULT_LENGTH, WordleGame
+from utils.bitboard import Board
+from utils.dictionary import get_dictionary, score_guess
+from utils.sessions import MemorySession, SequenceSession, WordleSession
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+THRESHOLD = 0.25   # Allowed slowdown before a benchmark counts as a regression
+NOISE_MARGIN = 2   # ... and it must also be this many times the measured spread
+ROUNDS = 5         # Measurements of every benchmark, taken in turns
+
+BENCHMARKS = {}  # name -> function(cogs) returning (operation, items handled per call)
+
+
+def benchmark(name):
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def reachable_boards(size=3, win_length=3):
+    """Every position reachable in a game on the board, finished ones included."""
+    seen = set()
+    boards = []
+    stack = [Board(size=size, win_length=win_length)]
+    while stack:
+        board = stack.pop()
+        if (board.x, board.o) in seen:
+            continue
+        seen.add((board.x, board.o))
+        boards.append(board)
+        if board.status() is None:
+            for cell in range(size * size):
+                if board.is_empty(cell):
+                    child = Board(board.x, board.o, board.turn, size, win_length)
+                    child.play(cell)
+                    stack.append(child)
+    return boards
+
+
+def wordle_words():
+    words = list(get_dictionary(length=DEFAULT_LENGTH).words)
+    if not words:  # No word list installed: random words score the same way
+        words = ["".join(random.choices(string.ascii_uppercase, k=DEFAULT_LENGTH)) for _ in range(2000)]
+    return words
+
+
+def wordle_game(words, rows):
+    game = WordleSession(random.choice(words), owner=1)
+    for _ in range(rows):
+        guess = random.choice(words)
+        game.add_guess(guess, score_guess(guess, game.target_word))
+    return game
+
+
+@benchmark("tictactoe.get_best_move/openings")
+def _(cogs):
+    # The AI's reply to each of X's nine first moves
+    openings = []
+    for cell in range(9):
+        board = Board()
+        board.play(cell)
+        openings.append(board)
+    get_best_move = cogs["tictactoe"].get_best_move
+    return (lambda: [get_best_move(board) for board in openings]), len(openings)
+
+
+@benchmark("tictactoe.check_game_status/3x3")
+def _(cogs):
+    boards = reachable_boards()
+    check = cogs["tictactoe"].check_game_status
+    return (lambda: [check(board) for board in boards]), len(boards)
+
+
+@benchmark("tictactoe.check_game_status/5x5")
+def _(cogs):
+    boards = []
+    for _ in range(500):
+        board = Board(size=5, win_length=4)
+        for cell in random.sample(range(25), random.randint(5, 20)):
+            board.play(cell)
+        boards.append(board)
+    check = cogs["tictactoe"].check_game_status
+    return (lambda: [check(board) for board in boards]), len(boards)
+
+
+@benchmark("wordle.score_guess")
+def _(cogs):
+    words = wordle_words()
+    pairs = [(random.choice(words), random.choice(words)) for _ in range(1000)]
+    return (lambda: [score_guess(guess, target) for guess, target in pairs]), len(pairs)
+
+
+@benchmark("wordle.render_board")
+def _(cogs):
+    # Wordle has no buttons: its "view" is the board drawn into the embed after every guess
+    games = [wordle_game(wordle_words(), rows) for rows in range(1, 7)]
+    render_board = cogs["wordle"].render_board
+    return (lambda: [render_board(game) for game in games]), len(games)
+
+
+@benchmark("wordle.board_cells")
+def _(cogs):
+    games = [wordle_game(wordle_words(), rows) for rows in range(1, 7)]
+    board_cells = cogs["wordle"].board_cells
+    return (lambda: [board_cells(game) for game in games]), len(games)
+
+
+@benchmark("memory.create_game_view")
+def _(cogs):
+    memory = cogs["memory"]
+    games = []
+    for matched in (0, 4, 8):
+        game = MemorySession(memory.shuffle_emoji_pairs(), owner=1, game_id=10 ** 18)
+        game.game_started = True
+        for cell in range(matched * 2):
+            game.matched |= 1 << cell
+        game.revealed |= 1 << 23
+        games.append(game)
+    return (lambda: [memory.create_game_view(game).to_components() for game in games]), len(games)
+
+
+@benchmark("memory.shuffle_emoji_pairs")
+def _(cogs):
+    return cogs["memory"].shuffle_emoji_pairs, 1
+
+
+@benchmark("sequence.create_game_view")
+def _(cogs):
+    # Cached frames, as during a sequence animation
+    sequence = cogs["sequence"]
+    game = SequenceSession(1, game_id=10 ** 18)
+    game.game_started = True
+    game.current_sequence.extend(random.randint(0, 23) for _ in range(20))
+    cells = list(game.current_sequence)
+    sequence.create_game_view(game)
+    for cell in cells:
+        sequence.create_game_view(game, highlight_index=cell)
+    return (lambda: [sequence.create_game_view(game, highlight_index=cell).to_components() for cell in cells]), len(cells)
+
+
+@benchmark("sequence.create_game_view/uncached")
+def _(cogs):
+    sequence = cogs["sequence"]
+    game = SequenceSession(1, game_id=10 ** 18)
+    game.game_started = True
+    return (lambda: [sequence.render_game_view(game, cell, 0).to_components() for cell in range(24)]), 24
+
+
+def build_cogs():
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    # Set so the cogs don't open the real databases; nothing benchmarked touches them
+    bot.session_store = bot.stats = object()
+    return {
+        "tictactoe": TicTacToeGame(bot),
+        "wordle": WordleGame(bot),
+        "memory": MemoryMatchingGame(bot),
+        "sequence": SequenceMemoryGame(bot),
+    }
+
+
+def measure(timers, rounds, repeat):
+    """
+    {name: (best time per item in microseconds, spread)} for ``{name: (timer, number, items)}``.
+    The spread is how much slower the slowest round's best time was than the fastest's.
+    """
+    times = {name: [] for name in timers}
+    for _ in range(rounds):
+        for name, (timer, number, items) in timers.items():
+            times[name].append(min(timer.repeat(repeat, number)) / number / items * 1e6)
+    return {name: (min(best), max(best) / min(best) - 1) for name, best in times.items()}
+
+
+async def run(only, rounds, repeat):
+    cogs = build_cogs()
+    timers = {}
+    for name, setup in BENCHMARKS.items():
+        if only and only not in name:
+            continue
+        random.seed(name)  # The same data every run, whichever benchmarks are selected
+        operation, items = setup(cogs)
+        timer = timeit.Timer(operation)
+        number, _ = timer.autorange()
+        timers[name] = (timer, number, items)
+    return measure(timers, rounds, repeat)
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        return None
+    # Baselines saved before spreads were measured hold just the time
+    baseline["results"] = {
+        name: result if isinstance(result, list) else [result, 0.0] for name, result in baseline["results"].items()
+    }
+    return baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown, e.g. 0.25 for 25%%")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help="measurements of each benchmark, taken in turns")
+    parser.add_argument("--repeat", type=int, default=7, help="runs per round; the best one counts")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.only, args.rounds, args.repeat))  # Views need a running event loop
+    baseline = load_baseline()
+    baselines = baseline["results"] if baseline else {}
+    if baseline and baseline["machine"] != platform.machine():
+        print(f"note: baseline was saved on {baseline['machine']}, comparisons may be off")
+
+    regressions = []
+    print(f"{'benchmark':<40}{'us/op':>10}{'spread':>8}{'baseline':>10}{'change':>9}{'allowed':>9}")
+    for name, (time, spread) in results.items():
+        if name not in baselines:
+            print(f"{name:<40}{time:>10.2f}{spread:>8.0%}{'-':>10}")
+            continue
+        expected, expected_spread = baselines[name]
+        change = time / expected - 1
+        allowed = max(args.threshold, NOISE_MARGIN * max(spread, expected_spread))
+        flag = ""
+        if change > allowed:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<40}{time:>10.2f}{spread:>8.0%}{expected:>10.2f}{change:>+9.0%}{allowed:>9.0%}{flag}")
+
+    if args.save:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({
+                "machine": platform.machine(),
+                "python": platform.python_version(),
+                "results": {**baselines, **{
+                    name: [round(time, 4), round(spread, 4)] for name, (time, spread) in results.items()
+                }},
+            }, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline saved to {BASELINE_PATH}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) beyond the allowed slowdown: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+View-store memory benchmark: resident memory held for N open games when every
+board message keeps a 25-button View in discord.py's view store (the old layout),
+versus payload-only StaticViews whose clicks are routed by custom_id.
+
+Usage (from the repository root):
+    python -m scripts.bench_views [--games N]
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+
+import discord
+from discord.ui.view import ViewStore
+
+from utils.frames import StaticView
+from utils.router import make_custom_id
+
+
+def build_view(game_id):
+    view = discord.ui.View()
+    for cell in range(24):
+        view.add_item(discord.ui.Button(label="\u200b", custom_id=make_custom_id("memory", game_id, cell)))
+    view.add_item(discord.ui.Button(label="Quit Game", custom_id=make_custom_id("memory", game_id, "start")))
+    return view
+
+
+def resident(games, send):
+    """Bytes still allocated after calling ``send(game_id)`` once for each of ``games`` games."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for game_id in range(games):
+        send(game_id)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+
+async def run(games):
+    store = ViewStore(state=None)
+
+    def stored_view(game_id):
+        # What Message.edit/send do with an unfinished view: register it under the message id
+        view = build_view(game_id)
+        store.add_view(view, message_id=10 ** 18 + game_id)
+
+    def static_view(game_id):
+        view = StaticView.from_view(build_view(game_id))
+        view.to_components()  # Sent, then dropped: is_finished() keeps it out of the store
+
+    old = resident(games, stored_view)
+    new = resident(games, static_view)
+    print(f"stored Views: {old / 1024 / 1024:8.1f} MiB ({old / games:,.0f} B per game)")
+    print(f"StaticViews:  {new / 1024 / 1024:8.1f} MiB ({new / games:,.0f} B per game)")
+    for view in list(store._synced_message_views.values()):
+        view.stop()  # Cancel the timeout tasks the stored views started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=10000, help="open games")
+    args = parser.parse_args()
+    asyncio.run(run(args.games))  # Views need a running event loop
+
+
+if __name__ == "__main__":
+    main()
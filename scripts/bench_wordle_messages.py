@@ -0,0 +1,103 @@
+"""
+Message firehose benchmark for the Wordle on_message listener: feeds synthetic
+traffic through the cog and reports messages per second for channels without a
+game, chat in game channels, and real guesses.
+
+Usage (from the repository root):
+    python -m scripts.bench_wordle_messages [--messages N] [--channels N] [--games N]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+from cogs.wordle import WordleGame
+from utils.dictionary import get_dictionary
+from utils.sessions import WordleSession
+from utils.store import SQLiteSessionStore
+
+CHAT = ["lol", "anyone up for a game?", "brb", "that was close", "gg", "hi all", "nice one", "what time is it"]
+
+
+class FakeChannel(discord.Object):
+    async def send(self, *args, **kwargs):
+        pass
+
+
+class FakeAuthor(discord.Object):
+    bot = False
+    mention = "@player"
+
+
+class FakeMessage:
+    """Just enough of discord.Message for the listener; sending, editing and deleting do nothing."""
+
+    def __init__(self, message_id, channel_id, content):
+        self.id = message_id
+        self.channel = FakeChannel(channel_id)
+        self.content = content
+        self.author = FakeAuthor(1)
+        self.guild = discord.Object(1)
+
+    async def edit(self, **fields):
+        pass
+
+    async def delete(self):
+        pass
+
+
+def traffic(kind, count, channels, games, words):
+    for i in range(count):
+        if kind == "no game":
+            yield FakeMessage(i, random.randrange(games, channels), random.choice(CHAT + words))
+        elif kind == "chat":
+            yield FakeMessage(i, random.randrange(games), random.choice(CHAT))
+        else:
+            yield FakeMessage(i, random.randrange(games), random.choice(words).lower())
+
+
+async def run(messages, channels, games, path):
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    bot.session_store = SQLiteSessionStore(path)
+    cog = WordleGame(bot)
+    words = list(get_dictionary().words) or ["CRANE", "SLATE", "TRAIN"]
+
+    def reset_games():
+        # Guesses end games once the rows run out, so every run starts from fresh boards
+        for channel_id in range(games):
+            cog.games[channel_id] = WordleSession(random.choice(words), 1, message=FakeMessage(0, channel_id, ""))
+
+    print(f"{'traffic':<10}{'messages/s':>14}")
+    for kind in ("no game", "chat", "guesses"):
+        reset_games()
+        start = time.perf_counter()
+        for message in traffic(kind, messages, channels, games, words):
+            if kind == "guesses" and message.channel.id not in cog.games:
+                cog.games[message.channel.id] = WordleSession(random.choice(words), 1, message=FakeMessage(0, message.channel.id, ""))
+            await cog.on_message(message)
+        elapsed = time.perf_counter() - start
+        print(f"{kind:<10}{messages / elapsed:>14,.0f}")
+
+    cog.cog_unload()
+    bot.edits.close()
+    await bot.session_store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000, help="messages per traffic type")
+    parser.add_argument("--channels", type=int, default=10000, help="channels the bot can see")
+    parser.add_argument("--games", type=int, default=100, help="channels with an active game")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args.messages, args.channels, args.games, os.path.join(directory, "sessions.sqlite3")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Pack the Wordle word files into one memory-mappable binary dictionary per word
+length (data/dictionary/words<N>.bin), or check the packed files against the text
+files and compare load time and memory.
+
+Run it again whenever words.txt or guesses.txt change; until then the game falls
+back to reading the text files for the lengths whose packed file is out of date.
+
+Usage (from the repository root):
+    python -m scripts.build_dictionary build [--lengths 4,5,6,7,8]
+    python -m scripts.build_dictionary check [--lengths 4,5,6,7,8]
+"""
+import argparse
+import os
+import random
+import time
+import tracemalloc
+
+from utils.dictionary import (ANSWERS_PATH, GUESSES_PATH, WORD_LENGTHS, WordDictionary, load_packed,
+                              packed_path, read_words, save_packed)
+
+
+def build(lengths):
+    for length in lengths:
+        answers = read_words(ANSWERS_PATH, length)
+        guesses = read_words(GUESSES_PATH, length)
+        path = packed_path(length)
+        save_packed(path, length, answers, guesses)
+        print(f"{length} letters: {len(answers)} answers, {len(set(answers).union(guesses))} words, "
+              f"{os.path.getsize(path):,} bytes -> {path}")
+
+
+def timed(load):
+    """Return (result, seconds, bytes of Python heap still held) for ``load()``."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, held
+
+
+def check(lengths):
+    ok = True
+    for length in lengths:
+        text, text_time, text_memory = timed(lambda: WordDictionary.from_words(
+            read_words(ANSWERS_PATH, length), read_words(GUESSES_PATH, length), length
+        ))
+        try:
+            packed, packed_time, packed_memory = timed(lambda: load_packed(packed_path(length)))
+        except (OSError, ValueError) as e:
+            print(f"{length} letters: {e}")
+            ok = False
+            continue
+
+        matches = list(packed.words) == list(text.words) and list(packed.answers) == list(text.answers)
+        ok = ok and matches
+        print(f"{length} letters: {'OK' if matches else 'MISMATCH'} ({len(text.words)} words)")
+        print(f"  load    text {text_time * 1000:8.2f} ms {text_memory / 1024:10.1f} KiB   "
+              f"packed {packed_time * 1000:8.2f} ms {packed_memory / 1024:10.1f} KiB")
+
+        if text.words:
+            probes = [random.choice(text.words) for _ in range(10000)] + ["Q" * length] * 10000
+            for name, dictionary in (("text", text), ("packed", packed)):
+                start = time.perf_counter()
+                for word in probes:
+                    word in dictionary.valid
+                print(f"  lookup  {name:<6} {(time.perf_counter() - start) / len(probes) * 1e6:6.2f} us")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--lengths", default=",".join(map(str, WORD_LENGTHS)), help="comma-separated word lengths")
+    args = parser.parse_args()
+    lengths = [int(length) for length in args.lengths.split(",")]
+
+    if args.command == "build":
+        build(lengths)
+    elif not check(lengths):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
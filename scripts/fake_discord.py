@@ -0,0 +1,415 @@
+"""
+In-process stand-in for Discord, so the bot can be load tested without a connection.
+
+FakeDiscord plugs into an unmodified ``commands.Bot`` (e.g. the one in main.py):
+
+- REST: the HTTP client's aiohttp session is swapped for FakeSession, so every call
+  still goes through discord.py's own routing and rate-limit handling. Calls are
+  recorded by route and answered with plausible payloads. Message routes are rate
+  limited per channel like Discord's (``RATE_LIMIT``) and answer 429 once a bucket is
+  used up; with ``ratelimit_headers=False`` the remaining-quota headers are left out,
+  so the library can't slow down ahead of time and every excess call gets a 429.
+- Gateway: synthetic messages and button clicks are fed to the library's own event
+  parsers, as the websocket would, so they reach the bot's listeners and commands.
+
+This relies on a few discord.py internals (the HTTP client's private session and the
+gateway parsers), as of discord.py 2.4.
+"""
+import asyncio
+import datetime
+import itertools
+import json
+import re
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+import aiohttp
+import discord
+from discord.http import Route
+from multidict import CIMultiDict
+
+RATE_LIMIT = (5, 5.0)  # Requests per window (seconds) on each channel's message routes
+ALL_PERMISSIONS = str(discord.Permissions.all().value)
+ID_SEGMENT = re.compile(r"^\d+$")
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class FakeResponse:
+    """Just enough of aiohttp.ClientResponse for discord.py's request handling."""
+
+    def __init__(self, status, data=None, headers=None):
+        self.status = status
+        self.reason = "Too Many Requests" if status == 429 else "OK"
+        self.headers = CIMultiDict(headers or {})
+        if data is None:
+            self._text = ""
+        else:
+            self._text = json.dumps(data)
+            self.headers["Content-Type"] = "application/json"
+
+    async def text(self, encoding=None):
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _Call:
+    """The ``async with session.request(...)`` context: runs the fake request on entry."""
+
+    def __init__(self, coroutine):
+        self._coroutine = coroutine
+
+    async def __aenter__(self):
+        return await self._coroutine
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """Replaces the HTTP client's aiohttp.ClientSession; every request is answered by ``discord``."""
+
+    closed = False
+
+    def __init__(self, discord):
+        self._discord = discord
+
+    def request(self, method, url, **kwargs):
+        return _Call(self._discord.handle(method, url, kwargs.get("data")))
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeGateway:
+    """Stands in for the bot's websocket: parses injected events and accepts presence updates."""
+
+    open = False
+    latency = 0.0
+
+    def __init__(self, state):
+        self._parsers = state.parsers
+        self.presence = None
+
+    def dispatch(self, event, data):
+        self._parsers[event](data)
+
+    async def change_presence(self, *, activity=None, status=None, since=0.0):
+        self.presence = (activity, status)
+
+
+class FakeShard:
+    """The single shard of an AutoShardedClient; its websocket is the fake gateway."""
+
+    def __init__(self, gateway):
+        self.ws = gateway
+
+    async def close(self):
+        pass
+
+    def is_ratelimited(self):
+        return False
+
+
+class FakeDiscord:
+    def __init__(self, latency=0.0, rate_limit=RATE_LIMIT, ratelimit_headers=True):
+        self.latency = latency  # Seconds each REST call takes
+        self.rate_limit = rate_limit
+        self.ratelimit_headers = ratelimit_headers
+        self.session = FakeSession(self)
+        self.gateway = None
+        self._ids = itertools.count(10 ** 17)
+        self.application_id = next(self._ids)
+        self.user = self.user_payload(self.application_id, "GameBot", bot=True)
+        self.guild_id = next(self._ids)
+        self.channel_ids = []
+        self.user_ids = []
+        self.messages = {}       # message id -> latest payload
+        self.threads = {}        # starter message id -> thread id
+        self._parents = {}       # thread id -> parent channel id
+        self._interactions = {}  # interaction token -> [channel id, message id, original response id]
+        self._buckets = {}       # (route, channel id) -> [remaining, reset time]
+        self._waiters = {}       # channel id -> futures waiting for the bot's next message there
+        self.calls = Counter()          # (method, route) -> REST calls
+        self.channel_calls = Counter()  # channel id (threads count as their parent) -> REST calls
+        self.rate_limited = 0           # Calls answered with a 429
+
+    # Payloads
+
+    def user_payload(self, user_id, name, bot=False):
+        return {"id": str(user_id), "username": name, "global_name": name, "discriminator": "0", "avatar": None, "bot": bot}
+
+    def member_payload(self, user_id):
+        return {"user": self.user_payload(user_id, f"player{user_id % 100000}"), "roles": [], "joined_at": _now(),
+                "deaf": False, "mute": False, "flags": 0}
+
+    def channel_payload(self, channel_id, position):
+        return {"id": str(channel_id), "type": 0, "guild_id": str(self.guild_id), "name": f"games-{position}",
+                "position": position, "permission_overwrites": [], "nsfw": False, "parent_id": None,
+                "rate_limit_per_user": 0, "last_message_id": None, "topic": None}
+
+    def guild_payload(self):
+        everyone = {"id": str(self.guild_id), "name": "@everyone", "permissions": ALL_PERMISSIONS, "position": 0,
+                    "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}
+        return {
+            "id": str(self.guild_id), "name": "Load Test", "icon": None, "owner_id": str(self.application_id),
+            "roles": [everyone], "emojis": [], "stickers": [], "features": [], "threads": [],
+            "channels": [self.channel_payload(channel_id, n) for n, channel_id in enumerate(self.channel_ids)],
+            "members": [self.member_payload(self.application_id)] + [self.member_payload(user_id) for user_id in self.user_ids],
+            "member_count": len(self.user_ids) + 1, "large": False, "afk_timeout": 300, "verification_level": 0,
+            "default_message_notifications": 0, "explicit_content_filter": 0, "mfa_level": 0, "nsfw_level": 0,
+            "premium_tier": 0, "preferred_locale": "en-US", "system_channel_flags": 0,
+        }
+
+    def message_payload(self, channel_id, author, fields):
+        payload = {
+            "id": str(next(self._ids)), "channel_id": str(channel_id), "guild_id": str(self.guild_id),
+            "author": author, "content": "", "timestamp": _now(), "edited_timestamp": None, "tts": False,
+            "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+            "components": [], "pinned": False, "type": 0, "flags": 0,
+        }
+        self._update(payload, fields)
+        self.messages[int(payload["id"])] = payload
+        return payload
+
+    def _update(self, payload, fields):
+        for name in ("content", "embeds", "components", "flags"):
+            if name in fields and fields[name] is not None:
+                payload[name] = fields[name]
+        if fields.get("attachments") is not None:
+            # Uploads are described by filename only; Discord answers with the stored files
+            payload["attachments"] = [
+                {"id": str(next(self._ids)), "filename": attachment.get("filename", "file"), "size": 0,
+                 "url": f"https://cdn.invalid/{attachment.get('filename', 'file')}",
+                 "proxy_url": f"https://cdn.invalid/{attachment.get('filename', 'file')}"}
+                for attachment in fields["attachments"]
+            ]
+
+    # Connecting
+
+    async def connect(self, bot, users=100, channels=100, token="fake-token"):
+        """
+        Log ``bot`` in against the fake API and bring it online in one server with ``channels``
+        text channels and ``users`` members (ids in ``channel_ids`` and ``user_ids``).
+        Dispatches ``on_ready`` as the gateway would.
+        """
+        self.channel_ids = [next(self._ids) for _ in range(channels)]
+        self.user_ids = [next(self._ids) for _ in range(users)]
+        http = bot.http
+
+        async def static_login(token):
+            # HTTPClient.static_login, with the fake session in place of a real one
+            http._HTTPClient__session = self.session
+            http._global_over = asyncio.Event()
+            http._global_over.set()
+            http.token = token
+            return await http.request(Route("GET", "/users/@me"))
+
+        http.static_login = static_login
+        await bot.login(token)
+
+        state = bot._connection
+        self.gateway = bot.ws = FakeGateway(state)
+        if isinstance(bot, discord.AutoShardedClient):
+            bot.shard_count = state.shard_count = 1
+            state.shard_ids = [0]
+            bot._AutoShardedClient__shards = {0: FakeShard(self.gateway)}
+        state._add_guild_from_data(self.guild_payload())
+        bot._ready.set()
+        bot.dispatch("ready")
+
+    # Gateway events
+
+    def send_message(self, channel_id, user_id, content):
+        """Post ``content`` in a channel or thread as a member. Returns the message id."""
+        payload = self.message_payload(channel_id, self.user_payload(user_id, f"player{user_id % 100000}"), {"content": content})
+        member = self.member_payload(user_id)
+        del member["user"]
+        self.gateway.dispatch("MESSAGE_CREATE", {**payload, "member": member})
+        return int(payload["id"])
+
+    def click(self, message_id, user_id, custom_id):
+        """Press a button on one of the bot's messages as a member. Returns the interaction id."""
+        message = self.messages[message_id]
+        channel_id = int(message["channel_id"])
+        interaction_id = next(self._ids)
+        token = f"token{interaction_id}"
+        self._interactions[token] = [channel_id, message_id, message_id]
+        self.gateway.dispatch("INTERACTION_CREATE", {
+            "id": str(interaction_id), "application_id": str(self.application_id), "type": 3, "token": token,
+            "version": 1, "guild_id": str(self.guild_id), "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 11 if channel_id in self._parents else 0},
+            "member": {**self.member_payload(user_id), "permissions": ALL_PERMISSIONS},
+            "data": {"custom_id": custom_id, "component_type": 2}, "message": message,
+            "app_permissions": ALL_PERMISSIONS, "locale": "en-US", "guild_locale": "en-US",
+        })
+        return interaction_id
+
+    def next_message(self, channel_id):
+        """Future resolving to the payload of the bot's next message in a channel."""
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(channel_id, []).append(future)
+        return future
+
+    # REST
+
+    async def handle(self, method, url, data):
+        path = urlsplit(url).path.split("/api/v10", 1)[-1]
+        parts = path.strip("/").split("/")
+        route = "/" + "/".join(self._template(parts))
+        body = self._body(data)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        self.calls[method, route] += 1
+        channel_id = self._channel_of(parts)
+        if channel_id is not None:
+            self.channel_calls[channel_id] += 1
+
+        headers = {}
+        if parts[0] == "channels" and len(parts) > 2 and parts[2] == "messages":
+            headers = self._take(route, int(parts[1]))
+            if headers is None:
+                self.rate_limited += 1
+                retry_after = self._buckets[route, int(parts[1])][1] - time.monotonic()
+                return FakeResponse(429, {"message": "You are being rate limited.", "retry_after": retry_after,
+                                          "global": False}, {"Via": "1.1 google"})
+
+        status, payload = self._respond(method, parts, body)
+        return FakeResponse(status, payload, headers)
+
+    def _take(self, route, channel_id):
+        """Use one request of the channel's bucket for ``route``. Returns the rate limit headers, or None when exhausted."""
+        limit, window = self.rate_limit
+        now = time.monotonic()
+        bucket = self._buckets.get((route, channel_id))
+        if bucket is None or now >= bucket[1]:
+            bucket = self._buckets[route, channel_id] = [limit, now + window]
+        if bucket[0] == 0:
+            return None
+        bucket[0] -= 1
+        if not self.ratelimit_headers:
+            return {}
+        return {"X-RateLimit-Limit": str(limit), "X-RateLimit-Remaining": str(bucket[0]),
+                "X-RateLimit-Reset-After": f"{bucket[1] - now:.3f}", "X-RateLimit-Bucket": route}
+
+    @staticmethod
+    def _template(parts):
+        for n, part in enumerate(parts):
+            if ID_SEGMENT.match(part):
+                yield "{id}"
+            elif n > 1 and parts[n - 2] in ("webhooks", "interactions"):
+                yield "{token}"
+            else:
+                yield part
+
+    @staticmethod
+    def _body(data):
+        if isinstance(data, (str, bytes)):
+            return json.loads(data)
+        if isinstance(data, aiohttp.FormData):
+            # Multipart (messages with files): the JSON part carries the message fields
+            for options, _, value in data._fields:
+                if options.get("name") == "payload_json":
+                    return json.loads(value)
+        return {}
+
+    def _channel_of(self, parts):
+        if parts[0] == "channels":
+            channel_id = int(parts[1])
+            return self._parents.get(channel_id, channel_id)
+        if parts[0] in ("webhooks", "interactions") and len(parts) > 2:
+            interaction = self._interactions.get(parts[2])
+            if interaction is not None:
+                return self._parents.get(interaction[0], interaction[0])
+        return None
+
+    def _respond(self, method, parts, body):
+        """Return (status, payload) for a REST call."""
+        if parts == ["users", "@me"]:
+            return 200, self.user
+        if parts == ["oauth2", "applications", "@me"]:
+            return 200, {"id": str(self.application_id), "name": "GameBot", "description": "", "icon": None,
+                         "bot_public": True, "bot_require_code_grant": False, "owner": self.user,
+                         "verify_key": "0" * 64, "flags": 0, "bot": self.user}
+        if parts[0] == "applications" and parts[-1] == "commands":
+            return 200, []
+
+        if parts[0] == "channels" and len(parts) >= 3 and parts[2] == "messages":
+            channel_id = int(parts[1])
+            if len(parts) == 3 and method == "POST":
+                return 200, self._send(channel_id, body)
+            message = self.messages.get(int(parts[3]))
+            if message is None:
+                return 404, {"message": "Unknown Message", "code": 10008}
+            if len(parts) == 4 and method == "PATCH":
+                self._update(message, body)
+                message["edited_timestamp"] = _now()
+                return 200, message
+            if len(parts) == 4 and method == "DELETE":
+                del self.messages[int(parts[3])]
+                return 204, None
+            if len(parts) == 5 and parts[4] == "threads":
+                return 200, self._create_thread(channel_id, int(parts[3]), body)
+
+        if parts[0] == "interactions":
+            return self._interaction_callback(parts[2], body)
+        if parts[0] == "webhooks" and len(parts) >= 3:
+            interaction = self._interactions.get(parts[2])
+            if interaction is None:
+                return 404, {"message": "Unknown Webhook", "code": 10015}
+            if len(parts) == 3:  # Followup message
+                return 200, self._send(interaction[0], body)
+            message_id = interaction[2] if parts[4] == "@original" else int(parts[4])
+            message = self.messages.get(message_id)
+            if message is None:
+                return 404, {"message": "Unknown Message", "code": 10008}
+            if method == "DELETE":
+                del self.messages[message_id]
+                return 204, None
+            self._update(message, body)
+            return 200, message
+
+        return 200, {}
+
+    def _send(self, channel_id, body):
+        message = self.message_payload(channel_id, self.user, body)
+        if message["flags"] & 64:
+            return message  # Ephemeral: only the clicking user sees it
+        for future in self._waiters.pop(channel_id, ()):
+            if not future.done():
+                future.set_result(message)
+        return message
+
+    def _create_thread(self, channel_id, message_id, body):
+        thread_id = next(self._ids)
+        self.threads[message_id] = thread_id
+        self._parents[thread_id] = channel_id
+        thread = {
+            "id": str(thread_id), "type": 11, "guild_id": str(self.guild_id), "parent_id": str(channel_id),
+            "owner_id": str(self.application_id), "name": body.get("name", "thread"), "message_count": 0,
+            "member_count": 1, "rate_limit_per_user": 0, "flags": 0, "last_message_id": None,
+            "thread_metadata": {"archived": False, "auto_archive_duration": body.get("auto_archive_duration", 60),
+                                "archive_timestamp": _now(), "locked": False},
+        }
+        self.gateway.dispatch("THREAD_CREATE", {**thread, "newly_created": True})
+        return thread
+
+    def _interaction_callback(self, token, body):
+        interaction = self._interactions.get(token)
+        if interaction is None:
+            return 404, {"message": "Unknown interaction", "code": 10062}
+        kind, fields = body.get("type"), body.get("data") or {}
+        if kind == 7 and interaction[1] in self.messages:  # Update the clicked message
+            self._update(self.messages[interaction[1]], fields)
+        elif kind in (4, 5):  # New message, or a "thinking" one to be edited later
+            interaction[2] = int(self._send(interaction[0], fields)["id"])
+        return 204, None
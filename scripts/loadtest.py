@@ -0,0 +1,208 @@
+"""
+Load test: runs the bot from main.py against the in-process fake Discord
+(scripts/fake_discord.py) with many players each playing Tic-Tac-Toe, Wordle, Memory
+or Sequence Memory in their own channel at the same time, over and over.
+
+Players act like people: they start a game, then click a random enabled button of
+the board (never Quit) or send a guess, wait a random think time, and start again
+once the game is over. Reports per game the p50/p99 handler latency (from the event
+arriving until every listener for it has returned), REST calls per player action and
+429s, plus the event loop lag over the whole run. The fake Discord runs in the same
+process and event loop, so its own work is included in the numbers.
+
+Game sessions, results and the last synced command tree go to a temporary directory, not data/.
+
+Usage (from the repository root):
+    python -m scripts.loadtest [--sessions N] [--duration S] [--think S] [--latency S] [--no-ratelimit-headers]
+"""
+import argparse
+import asyncio
+import os
+import random
+import string
+import tempfile
+import time
+from collections import Counter
+
+os.environ.setdefault("BOT_TOKEN", "fake")  # config.py insists on a token; the fake API accepts any
+
+from main import bot
+from cogs.wordle import DEFAULT_LENGTH, MAX_GUESSES
+from config import PREFIX
+from scripts.fake_discord import FakeDiscord
+from utils.command_sync import CommandSyncer
+from utils.dictionary import get_dictionary
+from utils.stats import StatsService
+from utils.store import SQLiteSessionStore
+
+GAMES = ("tictactoe", "wordle", "memory", "sequence")
+REPLY_TIMEOUT = 10  # Seconds to wait for the bot to answer a start command
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000 if values else float("nan")
+
+
+class LoadTest:
+    def __init__(self, fake, think):
+        self.fake = fake
+        self.think = think
+        self.sent = {}            # event id -> [game, injected at, last handler finished at]
+        self.actions = Counter()  # game -> events injected
+        self.channels = {}        # channel id -> game played there
+        self.lag = []
+
+    def track(self, game, event_id):
+        self.actions[game] += 1
+        self.sent[event_id] = [game, time.perf_counter(), None]
+
+    def instrument(self, bot):
+        """Time every message and interaction listener by wrapping the bot's event runner."""
+        run_event = bot._run_event
+
+        async def timed_run_event(coro, event_name, *args, **kwargs):
+            try:
+                await run_event(coro, event_name, *args, **kwargs)
+            finally:
+                entry = self.sent.get(getattr(args[0], "id", None)) if args else None
+                if entry is not None:
+                    entry[2] = time.perf_counter()
+
+        bot._run_event = timed_run_event
+
+    async def pause(self):
+        await asyncio.sleep(random.uniform(0.5, 1.5) * self.think)
+
+    async def start(self, game, channel_id, user_id, command):
+        """Send a start command and return the bot's reply."""
+        reply = self.fake.next_message(channel_id)
+        self.track(game, self.fake.send_message(channel_id, user_id, f"{PREFIX[0]}{command}"))
+        return await asyncio.wait_for(reply, REPLY_TIMEOUT)
+
+    async def play_buttons(self, game, channel_id, user_id, deadline):
+        await asyncio.sleep(random.uniform(0, self.think))  # Players don't all arrive at the same instant
+        while time.monotonic() < deadline:
+            board = await self.start(game, channel_id, user_id, game)
+            message_id = int(board["id"])
+            while time.monotonic() < deadline:
+                await self.pause()
+                components = self.fake.messages.get(message_id, {}).get("components")
+                if not components:
+                    break  # Game over: the board's buttons were removed
+                buttons = [
+                    button["custom_id"] for row in components for button in row["components"]
+                    if not button.get("disabled") and button.get("label") != "Quit Game"
+                ]
+                if buttons:  # Nothing to press while an animation or the AI's move is showing
+                    self.track(game, self.fake.click(message_id, user_id, random.choice(buttons)))
+
+    async def play_wordle(self, channel_id, user_id, deadline, words):
+        length = len(words[0])
+        await asyncio.sleep(random.uniform(0, self.think))
+        while time.monotonic() < deadline:
+            target = random.choice(words)
+            board = await self.start("wordle", channel_id, user_id, f"wordle {target}")
+            await asyncio.sleep(0.1)  # The thread is opened right after the board is sent
+            thread_id = self.fake.threads.get(int(board["id"]))
+            if thread_id is None:
+                await self.pause()
+                continue
+            for row in range(MAX_GUESSES[length]):
+                await self.pause()
+                if time.monotonic() >= deadline:
+                    return
+                guess = target if random.random() < 0.25 else random.choice(words)
+                self.track("wordle", self.fake.send_message(thread_id, user_id, guess.lower()))
+                if guess == target:
+                    break
+
+    async def sample_lag(self, interval=0.05):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            self.lag.append(time.perf_counter() - start - interval)
+
+    def report(self, elapsed):
+        latencies = {game: [] for game in GAMES}
+        unanswered = Counter()
+        for game, injected, finished in self.sent.values():
+            if finished is None:
+                unanswered[game] += 1
+            else:
+                latencies[game].append(finished - injected)
+        calls = Counter()
+        for channel_id, count in self.fake.channel_calls.items():
+            if channel_id in self.channels:
+                calls[self.channels[channel_id]] += count
+
+        print(f"{'game':<11}{'actions':>9}{'p50':>10}{'p99':>10}{'REST/action':>13}{'pending':>9}")
+        for game in GAMES:
+            print(f"{game:<11}{self.actions[game]:>9}{percentile(latencies[game], 0.5):>8.1f}ms"
+                  f"{percentile(latencies[game], 0.99):>8.1f}ms{calls[game] / max(self.actions[game], 1):>13.2f}"
+                  f"{unanswered[game]:>9}")
+        total = sum(self.actions.values())
+        all_latencies = [latency for values in latencies.values() for latency in values]
+        print(f"{'all':<11}{total:>9}{percentile(all_latencies, 0.5):>8.1f}ms{percentile(all_latencies, 0.99):>8.1f}ms"
+              f"{sum(calls.values()) / max(total, 1):>13.2f}{sum(unanswered.values()):>9}")
+        print(f"\n{total / elapsed:,.0f} actions/s, {sum(self.fake.calls.values()) / elapsed:,.0f} REST calls/s, "
+              f"{self.fake.rate_limited} answered 429")
+        print(f"event loop lag: p50 {percentile(self.lag, 0.5):.1f}ms, p99 {percentile(self.lag, 0.99):.1f}ms, "
+              f"max {max(self.lag, default=0) * 1000:.1f}ms")
+        print("\nbusiest routes:")
+        for (method, route), count in self.fake.calls.most_common(8):
+            print(f"  {count:>8}  {method} {route}")
+
+
+async def run(sessions, duration, think, latency, ratelimit_headers, directory):
+    fake = FakeDiscord(latency=latency, ratelimit_headers=ratelimit_headers)
+    test = LoadTest(fake, think)
+
+    # Used by main.py's setup_hook instead of the files in data/
+    bot.session_store = SQLiteSessionStore(os.path.join(directory, "sessions.sqlite3"))
+    bot.stats = StatsService(os.path.join(directory, "stats.sqlite3"))
+    bot.command_sync = CommandSyncer(bot.tree, os.path.join(directory, "command_tree.json"))
+    test.instrument(bot)
+
+    await fake.connect(bot, users=sessions, channels=sessions)  # Returns once setup_hook has loaded the cogs
+
+    words = get_dictionary(length=DEFAULT_LENGTH).words
+    words = list(words) if len(words) else ["".join(random.choices(string.ascii_uppercase, k=DEFAULT_LENGTH)) for _ in range(500)]
+    sampler = asyncio.create_task(test.sample_lag())
+    start = time.monotonic()
+    deadline = start + duration
+    players = []
+    for n, (channel_id, user_id) in enumerate(zip(fake.channel_ids, fake.user_ids)):
+        game = test.channels[channel_id] = GAMES[n % len(GAMES)]
+        if game == "wordle":
+            players.append(test.play_wordle(channel_id, user_id, deadline, words))
+        else:
+            players.append(test.play_buttons(game, channel_id, user_id, deadline))
+    print(f"{sessions} players for {duration:.0f}s...")
+    results = await asyncio.gather(*players, return_exceptions=True)
+    elapsed = time.monotonic() - start
+    await asyncio.sleep(1)  # Let the last handlers finish
+    sampler.cancel()
+
+    errors = Counter(type(result).__name__ for result in results if isinstance(result, Exception))
+    if errors:
+        print(f"players stopped by errors: {dict(errors)}")
+    test.report(elapsed)
+    await bot.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000, help="players, each in their own channel")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to play")
+    parser.add_argument("--think", type=float, default=1.0, help="average seconds between a player's actions")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds each REST call takes")
+    parser.add_argument("--no-ratelimit-headers", action="store_true",
+                        help="don't tell the bot its remaining quota, so every excess call gets a 429")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args.sessions, args.duration, args.think, args.latency, not args.no_ratelimit_headers, directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Generate or verify the Tic-Tac-Toe perfect-play table.
+
+Usage (from the repository root):
+    python -m scripts.tictactoe_table generate
+    python -m scripts.tictactoe_table check
+"""
+import sys
+
+from utils import tictactoe_table
+
+
+def check_game_status(board):
+    """Reference win/draw check, as used by the original minimax AI."""
+    for row in board:
+        if row[0] == row[1] == row[2] and row[0] is not None:
+            return row[0]
+    for col in range(3):
+        if board[0][col] == board[1][col] == board[2][col] and board[0][col] is not None:
+            return board[0][col]
+    if board[0][0] == board[1][1] == board[2][2] and board[0][0] is not None:
+        return board[0][0]
+    if board[0][2] == board[1][1] == board[2][0] and board[0][2] is not None:
+        return board[0][2]
+    if all(cell is not None for row in board for cell in row):
+        return "Draw"
+    return None
+
+
+def minimax(board, depth, is_maximizing):
+    """Reference unpruned minimax, identical to the original AI."""
+    result = check_game_status(board)
+    if result == "O":
+        return 10 - depth
+    elif result == "X":
+        return depth - 10
+    elif result == "Draw":
+        return 0
+
+    best_score = float('-inf') if is_maximizing else float('inf')
+    for r in range(3):
+        for c in range(3):
+            if board[r][c] is None:
+                board[r][c] = "O" if is_maximizing else "X"
+                score = minimax(board, depth + 1, not is_maximizing)
+                board[r][c] = None
+                best_score = max(best_score, score) if is_maximizing else min(best_score, score)
+    return best_score
+
+
+def reachable_ai_positions():
+    """Yield every reachable non-terminal board where it is O's (the AI's) turn."""
+    seen = set()
+
+    def walk(board, player):
+        if check_game_status(board) is not None:
+            return
+        key = tuple(cell for row in board for cell in row)
+        if key in seen:
+            return
+        seen.add(key)
+        if player == "O":
+            yield [row[:] for row in board]
+        for r in range(3):
+            for c in range(3):
+                if board[r][c] is None:
+                    board[r][c] = player
+                    yield from walk(board, "O" if player == "X" else "X")
+                    board[r][c] = None
+
+    yield from walk([[None] * 3 for _ in range(3)], "X")
+
+
+def check():
+    """Compare the stored table against the reference minimax for every AI turn."""
+    table = tictactoe_table.load_table()
+    tictactoe_table._table = table
+    checked = mismatches = 0
+
+    for board in reachable_ai_positions():
+        x_mask, o_mask = tictactoe_table.board_to_masks(board)
+        cell, score = tictactoe_table.lookup(x_mask, o_mask)
+        r, c = divmod(cell, 3)
+
+        # Best score according to the reference AI
+        expected = float('-inf')
+        for mr in range(3):
+            for mc in range(3):
+                if board[mr][mc] is None:
+                    board[mr][mc] = "O"
+                    expected = max(expected, minimax(board, 0, False))
+                    board[mr][mc] = None
+
+        # Score actually achieved by the table's move
+        if board[r][c] is not None:
+            achieved = None
+        else:
+            board[r][c] = "O"
+            achieved = minimax(board, 0, False)
+            board[r][c] = None
+
+        checked += 1
+        if achieved != expected or score != expected:
+            mismatches += 1
+            print(f"Mismatch on {board}: table move {(r, c)} scores {achieved} (stored {score}), minimax best is {expected}")
+
+    print(f"Checked {checked} positions, {mismatches} mismatches.")
+    return mismatches == 0
+
+
+def generate():
+    table = tictactoe_table.build_table()
+    tictactoe_table.save_table(table)
+    print(f"Wrote {len(table)} canonical positions to {tictactoe_table.TABLE_PATH}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "generate":
+        generate()
+    elif command == "check":
+        sys.exit(0 if check() else 1)
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,64 @@
+"""
+Offline Wordle solver: plays every answer in the word list with the entropy
+solver and reports how many guesses it needs.
+
+Usage (from the repository root):
+    python -m scripts.wordle_solver [--limit N] [--word WORD] [--length N]
+"""
+import argparse
+import time
+from collections import Counter
+
+from utils.dictionary import WORD_LENGTH, get_dictionary, score_guess
+from utils.wordle_solver import get_solver
+
+MAX_GUESSES = 10
+
+
+def solve(solver, answer):
+    """Return the list of guesses the solver makes to find ``answer``."""
+    history = []
+    while len(history) < MAX_GUESSES:
+        suggestions = solver.best_guesses(history, 1)
+        if not suggestions:
+            break
+        guess = suggestions[0][0]
+        history.append((guess, score_guess(guess, answer)))
+        if guess == answer:
+            break
+    return [guess for guess, _ in history]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--limit", type=int, default=None, help="only play the first N answers")
+    parser.add_argument("--word", default=None, help="play a single answer and print the guesses")
+    parser.add_argument("--length", type=int, default=WORD_LENGTH, help="word length (ignored with --word)")
+    args = parser.parse_args()
+
+    dictionary = get_dictionary(length=len(args.word) if args.word else args.length)
+    if not dictionary.answers:
+        print("The word list is empty.")
+        return
+
+    start = time.perf_counter()
+    solver = get_solver(dictionary)
+    print(f"Pattern matrix {solver.patterns.shape} ready in {time.perf_counter() - start:.2f}s")
+
+    if args.word:
+        print(" -> ".join(solve(solver, args.word.upper())))
+        return
+
+    answers = dictionary.answers[:args.limit]
+    start = time.perf_counter()
+    results = Counter(len(solve(solver, answer)) for answer in answers)
+    elapsed = time.perf_counter() - start
+
+    for guesses in sorted(results):
+        print(f"{guesses:>2} guesses: {results[guesses]}")
+    average = sum(guesses * count for guesses, count in results.items()) / len(answers)
+    print(f"Average {average:.3f} guesses over {len(answers)} words ({elapsed / len(answers) * 1000:.1f} ms per game)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Wordle guesses played against the in-process fake Discord (scripts/fake_discord.py) with
+the bot from main.py: the REST calls a guess costs, and messages deleted under the game.
+"""
+import asyncio
+import os
+from collections import Counter
+
+os.environ.setdefault("BOT_TOKEN", "test-token")  # config.py refuses to import without one
+
+import main
+from config import PREFIX
+from scripts.fake_discord import FakeDiscord
+from utils.command_sync import CommandSyncer
+from utils.stats import StatsService
+from utils.store import SQLiteSessionStore
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGE = "/channels/{id}/messages/{id}"
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+async def play(tmp_path, scenario):
+    """Start ``wordle crane`` on a fresh bot and return ``await scenario(bot, fake, board, thread_id)``."""
+    bot = main.GameBot(command_prefix=PREFIX, intents=main.intents)
+    # Keep sessions, stats and the synced command hash out of data/
+    bot.session_store = SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"))
+    bot.stats = StatsService(str(tmp_path / "stats.sqlite3"))
+    bot.command_sync = CommandSyncer(bot.tree, str(tmp_path / "command_tree.json"))
+    fake = FakeDiscord()
+    await fake.connect(bot, users=2, channels=1)
+    try:
+        await wait_for(lambda: "WordleGame" in bot.cogs)
+        channel_id = fake.channel_ids[0]
+        board = fake.next_message(channel_id)
+        fake.send_message(channel_id, fake.user_ids[0], f"{PREFIX[0]}wordle crane")
+        board = await asyncio.wait_for(board, 5)
+        await wait_for(lambda: int(board["id"]) in fake.threads)
+        await asyncio.sleep(0.2)  # Let the start settle so only the guess is counted
+        return await scenario(bot, fake, board, fake.threads[int(board["id"])])
+    finally:
+        await bot.close()
+
+
+def test_guess_edits_the_board_and_deletes_the_guess_only(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)  # Cogs are loaded from ./cogs
+
+    async def guess(bot, fake, board, thread_id):
+        before = Counter(fake.calls)
+        fake.send_message(thread_id, fake.user_ids[0], "slate")
+        await wait_for(lambda: fake.calls["PATCH", MESSAGE] > before["PATCH", MESSAGE])
+        await asyncio.sleep(0.5)  # Anything else the guess set off
+        assert fake.messages[int(board["id"])]["embeds"][0]["title"] == "Guess 1: **SLATE**"
+        return fake.calls - before
+
+    calls = asyncio.run(play(tmp_path, guess))
+    assert calls == Counter({("PATCH", MESSAGE): 1, ("DELETE", MESSAGE): 1})
+    assert ("GET", MESSAGE) not in calls
+
+
+def test_winning_guess_deleted_by_someone_else_still_wins(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)
+
+    async def guess(bot, fake, board, thread_id):
+        result = fake.next_message(thread_id)
+        del fake.messages[fake.send_message(thread_id, fake.user_ids[0], "crane")]  # A moderator was quicker
+        return (await asyncio.wait_for(result, 5))["embeds"][0]["title"], bot.stats.recorded
+
+    title, recorded = asyncio.run(play(tmp_path, guess))
+    assert title == "Congratulations!"
+    assert recorded == 0  # A custom word doesn't count for the leaderboard
+
+
+def test_deleting_the_board_ends_the_game(tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT_DIR)
+
+    async def guess(bot, fake, board, thread_id):
+        games = bot.get_cog("WordleGame").games
+        del fake.messages[int(board["id"])]
+        fake.send_message(thread_id, fake.user_ids[0], "slate")
+        await wait_for(lambda: thread_id not in games)
+
+    asyncio.run(play(tmp_path, guess))
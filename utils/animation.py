@@ -0,0 +1,175 @@
+"""
+Shared animation clock for message animations (e.g. Sequence Memory playbacks).
+
+One task ticks at a fixed rate while anything is playing. Every tick advances each
+playback by one frame and hands all the frames to the edit queue as one batch, so
+thousands of games cost one timer instead of one sleeping coroutine each, and their
+edits go out in step instead of in unsynchronized bursts.
+
+A playback is a generator that yields the fields of its next edit (``{"view": ...}``)
+or None to hold the current frame for another tick. Its code runs between frames, so
+it can update the game as the animation goes. A playback whose previous frame hasn't
+been sent yet (e.g. its channel is rate limited) is held as well, so no frame is
+merged away before it was shown.
+"""
+import asyncio
+import time
+
+from utils.edits import get_edits
+
+TICK = 0.5  # Seconds per frame
+
+
+class _Playback:
+    __slots__ = ("message", "frames", "on_finish", "paused", "pending")
+
+    def __init__(self, message, frames, on_finish):
+        self.message = message
+        self.frames = frames
+        self.on_finish = on_finish
+        self.paused = False
+        self.pending = None  # Future of the last frame's edit
+
+
+class AnimationClock:
+    def __init__(self, edits, tick=TICK):
+        self.edits = edits
+        self.tick = tick
+        self._playbacks = {}  # key -> _Playback
+        self._finishing = {}  # key -> task running the playback's on_finish
+        self._task = None
+        self.ticks = 0      # Ticks run
+        self.frames = 0     # Frames handed to the edit queue
+        self.held = 0       # Frames held back because the previous one hadn't been sent
+        self.max_batch = 0  # Most frames sent in one tick
+
+    def __len__(self):
+        return len(self._playbacks)
+
+    def __contains__(self, key):
+        return key in self._playbacks
+
+    def ticks_for(self, seconds):
+        """Number of ticks that best covers ``seconds`` (at least one)."""
+        return max(1, round(seconds / self.tick))
+
+    def play(self, key, message, frames, on_finish=None):
+        """
+        Play the ``frames`` generator on ``message``, replacing any playback for ``key``.
+        Once the frames run out, ``await on_finish()`` is called (not if it is cancelled, and
+        cancelling the key before it returns stops it).
+        """
+        self.cancel(key)
+        self._playbacks[key] = _Playback(message, frames, on_finish)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def pause(self, key):
+        """
+        Stop advancing ``key``'s playback until resumed. Returns False if it isn't playing
+        (including while its on_finish runs, which has no frames left to hold).
+        """
+        playback = self._playbacks.get(key)
+        if playback is None:
+            return False
+        playback.paused = True
+        return True
+
+    def resume(self, key):
+        """Continue a paused playback from the next tick. Returns False if it isn't playing."""
+        playback = self._playbacks.get(key)
+        if playback is None:
+            return False
+        playback.paused = False
+        return True
+
+    def cancel(self, key):
+        """Stop ``key``'s playback without sending any more of its frames, or its running on_finish."""
+        task = self._finishing.get(key)
+        # An on_finish that ends its own game cancels its key; let it run to the end
+        if task is not None and task is not asyncio.current_task():
+            del self._finishing[key]
+            task.cancel()
+            return True
+        playback = self._playbacks.pop(key, None)
+        if playback is None:
+            return False
+        playback.frames.close()
+        return True
+
+    def cancel_namespace(self, namespace):
+        """Cancel every playback whose key is a tuple starting with ``namespace`` (used on cog unload)."""
+        for key in [key for key in {**self._playbacks, **self._finishing} if isinstance(key, tuple) and key and key[0] == namespace]:
+            self.cancel(key)
+
+    def close(self):
+        for key in [*self._playbacks, *self._finishing]:
+            self.cancel(key)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        next_tick = time.monotonic()
+        while self._playbacks:
+            self._advance()
+            next_tick += self.tick
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Fell behind: start counting again from now rather than firing the missed ticks back to back
+                next_tick = time.monotonic()
+                await asyncio.sleep(0)
+
+    def _advance(self):
+        """Run one tick: take the next frame of every playback and queue them together."""
+        self.ticks += 1
+        batch = []
+        finished = []
+        for key, playback in list(self._playbacks.items()):
+            if playback.paused:
+                continue
+            if playback.pending is not None and not playback.pending.done():
+                self.held += 1
+                continue
+            try:
+                fields = next(playback.frames)
+            except StopIteration:
+                finished.append((key, playback))
+                continue
+            except Exception as e:
+                print(f"Error in animation {key}: {e}")
+                self._playbacks.pop(key, None)
+                continue
+            if fields:
+                batch.append((playback, fields))
+
+        if batch:
+            futures = self.edits.submit_many([(playback.message, fields) for playback, fields in batch])
+            for (playback, _), future in zip(batch, futures):
+                playback.pending = future
+            self.frames += len(batch)
+            self.max_batch = max(self.max_batch, len(batch))
+
+        for key, playback in finished:
+            del self._playbacks[key]
+            if playback.on_finish is not None:
+                self._finishing[key] = asyncio.create_task(self._finish(key, playback.on_finish))
+
+    async def _finish(self, key, callback):
+        try:
+            await callback()
+        except Exception as e:
+            print(f"Error finishing animation {key}: {e}")
+        finally:
+            if self._finishing.get(key) is asyncio.current_task():
+                del self._finishing[key]
+
+
+def get_animations(bot):
+    """Return the bot's shared AnimationClock, creating it on first use."""
+    animations = getattr(bot, "animations", None)
+    if animations is None:
+        animations = bot.animations = AnimationClock(get_edits(bot))
+    return animations
@@ -0,0 +1,127 @@
+"""
+Bitboard representation of a k-in-a-row (Tic-Tac-Toe style) board.
+
+A board is two ints (one mask per player) plus a turn bit. Cell ``row * size + col``
+maps to bit ``1 << (row * size + col)``. Win and draw checks run against win masks
+precomputed once per (size, win length) geometry; the classic 3x3 game uses a
+512-entry lookup table instead.
+"""
+
+FULL_MASK = 0b111111111
+WIN_LINES = (
+    0b000000111, 0b000111000, 0b111000000,  # rows
+    0b001001001, 0b010010010, 0b100100100,  # columns
+    0b100010001, 0b001010100,               # diagonals
+)
+
+# Whether a 9-bit mask contains a complete line
+IS_WIN = bytes(any(mask & line == line for line in WIN_LINES) for mask in range(512))
+
+PLAYERS = ("X", "O")
+
+
+class Geometry:
+    """Masks shared by every board of the same size and win length."""
+
+    __slots__ = ("size", "win_length", "cells", "full_mask", "win_lines", "cell_lines")
+
+    def __init__(self, size, win_length):
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.full_mask = (1 << self.cells) - 1
+
+        lines = []
+        for row in range(size):
+            for col in range(size):
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + d_row * (win_length - 1)
+                    end_col = col + d_col * (win_length - 1)
+                    if not (0 <= end_row < size and 0 <= end_col < size):
+                        continue
+                    mask = 0
+                    for step in range(win_length):
+                        mask |= 1 << ((row + d_row * step) * size + col + d_col * step)
+                    lines.append(mask)
+        self.win_lines = tuple(lines)
+
+        # Win lines passing through each cell, used for incremental win checks
+        self.cell_lines = tuple(
+            tuple(line for line in lines if line >> cell & 1) for cell in range(self.cells)
+        )
+
+    def is_win(self, mask):
+        if self.cells == 9:
+            return IS_WIN[mask]
+        for line in self.win_lines:
+            if mask & line == line:
+                return True
+        return False
+
+
+_geometries = {}
+
+
+def get_geometry(size=3, win_length=3):
+    geometry = _geometries.get((size, win_length))
+    if geometry is None:
+        geometry = _geometries[(size, win_length)] = Geometry(size, win_length)
+    return geometry
+
+
+class Board:
+    """Two player masks and whose turn it is (0 for X, 1 for O)."""
+
+    __slots__ = ("x", "o", "turn", "geometry")
+
+    def __init__(self, x=0, o=0, turn=0, size=3, win_length=3):
+        self.x = x
+        self.o = o
+        self.turn = turn
+        self.geometry = get_geometry(size, win_length)
+
+    @property
+    def size(self):
+        return self.geometry.size
+
+    @property
+    def win_length(self):
+        return self.geometry.win_length
+
+    @property
+    def current_player(self):
+        return PLAYERS[self.turn]
+
+    @property
+    def empty(self):
+        """Mask of the legal moves."""
+        return self.geometry.full_mask & ~(self.x | self.o)
+
+    def is_empty(self, index):
+        return not (self.x | self.o) >> index & 1
+
+    def cell(self, index):
+        """Return "X", "O" or None for the given cell."""
+        if self.x >> index & 1:
+            return "X"
+        if self.o >> index & 1:
+            return "O"
+        return None
+
+    def play(self, index):
+        """Place the current player's mark and pass the turn."""
+        if self.turn:
+            self.o |= 1 << index
+        else:
+            self.x |= 1 << index
+        self.turn ^= 1
+
+    def status(self):
+        """Return 'X', 'O', 'Draw', or None if the game continues."""
+        if self.geometry.is_win(self.x):
+            return "X"
+        if self.geometry.is_win(self.o):
+            return "O"
+        if self.x | self.o == self.geometry.full_mask:
+            return "Draw"
+        return None
@@ -0,0 +1,121 @@
+"""
+Worker side of cluster mode (see cluster.py).
+
+Every worker process holds one connection to the supervisor on a local TCP socket, over
+which both sides exchange one JSON message per line. A worker can ``broadcast`` an
+operation: the supervisor forwards it to every other worker, each one runs the handler
+registered for it with ``on``, and their replies are routed back to the sender, which
+waits until all of them have answered or the timeout runs out.
+"""
+import asyncio
+import itertools
+import json
+
+HOST = "127.0.0.1"
+BROADCAST_TIMEOUT = 15.0  # Seconds to wait for the other workers to answer
+RECONNECT_DELAY = 1.0     # Seconds between attempts to reach the supervisor
+NO_REPLY = "no reply"
+
+
+async def send_message(writer, message):
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+class ClusterClient:
+    def __init__(self, cluster_id, port, secret, host=HOST):
+        self.cluster_id = cluster_id
+        self.host = host
+        self.port = port
+        self.secret = secret
+        self._handlers = {}  # op -> async handler(**data)
+        self._pending = {}   # request id -> [{cluster id: error or None}, future]
+        self._ids = itertools.count(1)
+        self._writer = None
+        self._task = None
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    def on(self, op, handler):
+        """Run ``await handler(**data)`` when another worker broadcasts ``op``."""
+        self._handlers[op] = handler
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                await send_message(writer, {"hello": self.cluster_id, "secret": self.secret})
+                self._writer = writer
+                while line := await reader.readline():
+                    self._receive(json.loads(line))
+            except (OSError, ValueError) as e:
+                print(f"Lost the cluster supervisor: {e!r}")
+            finally:
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def _receive(self, message):
+        if "reply" in message:
+            pending = self._pending.get(message["reply"])
+            if pending is None:
+                return  # Answered after the broadcast timed out
+            results, future = pending
+            if "forwarded" in message:
+                # The supervisor lists who it sent the operation to before any of them can answer
+                results.update((cluster_id, NO_REPLY) for cluster_id in message["forwarded"])
+            else:
+                results[message["cluster"]] = message["error"]
+            if NO_REPLY not in results.values() and not future.done():
+                future.set_result(None)
+        elif "op" in message:
+            asyncio.create_task(self._handle(message))
+
+    async def _handle(self, message):
+        error = None
+        try:
+            handler = self._handlers.get(message["op"])
+            if handler is None:
+                raise LookupError(f"This worker doesn't handle {message['op']!r}")
+            await handler(**message["data"])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if self._writer is not None:
+            await send_message(self._writer, {
+                "reply": message["id"], "to": message["from"], "cluster": self.cluster_id, "error": error
+            })
+
+    async def broadcast(self, op, timeout=BROADCAST_TIMEOUT, **data):
+        """
+        Run ``op`` on every other worker. Returns {cluster id: None if it succeeded, else
+        the error}; workers that didn't answer in time have ``NO_REPLY``.
+        """
+        if self._writer is None:
+            raise ConnectionError("Not connected to the cluster supervisor")
+        request_id = next(self._ids)
+        results = {}
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = [results, future]
+        try:
+            await send_message(self._writer, {"op": op, "id": request_id, "data": data})
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._pending[request_id]
+        return results
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,93 @@
+"""
+Slash command sync that only calls Discord when the commands have changed.
+
+The payload ``tree.sync`` would upload is hashed and compared with the hash of the last
+successful sync, which is kept on disk per application, so restarting with the same
+commands skips the sync (and its rate limit) entirely. ``request`` gathers the syncs asked
+for within ``SYNC_DELAY`` seconds, e.g. by several cog reloads in a row, into one.
+"""
+import asyncio
+import hashlib
+import json
+import os
+
+from utils.dictionary import ROOT_DIR
+
+DEFAULT_PATH = os.path.join(ROOT_DIR, "data", "command_tree.json")
+SYNC_DELAY = 3.0  # Seconds to wait for more cog changes before syncing
+
+
+class CommandSyncer:
+    def __init__(self, tree, path=DEFAULT_PATH, delay=SYNC_DELAY):
+        self.tree = tree
+        self.path = path
+        self.delay = delay
+        self._pending = None  # Future for the sync the current requests are waiting on
+        self._lock = asyncio.Lock()
+        self.synced = 0
+        self.skipped = 0
+
+    async def tree_hash(self):
+        """Hash of the global commands exactly as ``tree.sync`` would send them, whatever order they were added in."""
+        translator = self.tree.translator
+        if translator:
+            payload = [await command.get_translated_payload(self.tree, translator) for command in self.tree.get_commands()]
+        else:
+            payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        payload.sort(key=lambda command: (command.get("type", 1), command["name"]))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, hashes):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(hashes, f, indent=2, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    async def sync(self):
+        """Sync the commands unless they match the last sync. Returns True if Discord was called."""
+        async with self._lock:
+            application = str(self.tree.client.application_id)
+            tree_hash = await self.tree_hash()
+            hashes = await asyncio.to_thread(self._read)
+            if hashes.get(application) == tree_hash:
+                self.skipped += 1
+                return False
+            await self.tree.sync()
+            hashes[application] = tree_hash
+            await asyncio.to_thread(self._write, hashes)
+            self.synced += 1
+            return True
+
+    def request(self):
+        """
+        Ask for a sync in ``delay`` seconds, joining one already asked for. Returns a future
+        that resolves to what ``sync`` returned.
+        """
+        if self._pending is None:
+            self._pending = asyncio.get_running_loop().create_future()
+            asyncio.create_task(self._sync_later(self._pending))
+        return self._pending
+
+    async def _sync_later(self, future):
+        await asyncio.sleep(self.delay)
+        self._pending = None  # Changes from now on need another sync
+        try:
+            future.set_result(await self.sync())
+        except Exception as e:
+            future.set_exception(e)
+
+
+def get_syncer(bot):
+    """Return the bot's CommandSyncer, creating it on first use."""
+    syncer = getattr(bot, "command_sync", None)
+    if syncer is None:
+        syncer = bot.command_sync = CommandSyncer(bot.tree)
+    return syncer
@@ -0,0 +1,341 @@
+"""
+Indexed Wordle dictionary.
+
+Words are validated and loaded once per process (``get_dictionary`` caches by path and
+word length, so reloading the Wordle cog reuses the same instance). Each word length
+is a separate dictionary, built on first use, so only the lengths actually being
+played are held in memory. Guesses are checked against a frozenset, answers are drawn
+from a separate pool, and per-letter / per-position bitsets (one bit per word, stored
+as Python ints) answer "which words are still consistent with this feedback" with
+bitwise ANDs instead of list scans. The bitsets are only built when first used (by
+solver-style queries), not for ordinary games.
+
+``scripts/build_dictionary.py`` packs the word files into one binary file per length:
+a header, an index of where each two-letter prefix starts, the sorted allowed words
+and then the answers, each a fixed-width run of ASCII records. Packed files are
+memory-mapped rather than read, so words are decoded on access, membership is a binary
+search over the mapping and the pages are shared through the OS page cache by every
+process that maps the same file. Without an up-to-date packed file, the text files are
+read instead.
+"""
+import mmap
+import os
+import random
+import struct
+from array import array
+from collections.abc import Sequence
+from functools import cached_property
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWERS_PATH = os.path.join(ROOT_DIR, "words.txt")
+GUESSES_PATH = os.path.join(ROOT_DIR, "guesses.txt")  # Optional extra allowed guesses
+PACKED_DIR = os.path.join(ROOT_DIR, "data", "dictionary")
+WORD_LENGTH = 5
+WORD_LENGTHS = range(4, 9)  # Lengths packed by scripts/build_dictionary.py
+
+_MAGIC = b"WRDL"
+_VERSION = 1
+_HEADER = struct.Struct("<4sBBxxII")  # magic, version, word length, word count, answer count
+_PREFIXES = 26 * 26  # Two-letter prefixes; the index holds one more entry, the word count
+
+
+def _prefix(key):
+    """Bucket of an upper-case ASCII word's first two letters, or None if they aren't A-Z."""
+    first, second = key[0] - 65, key[1] - 65
+    if 0 <= first < 26 and 0 <= second < 26:
+        return first * 26 + second
+    return None
+
+# Feedback values for a single letter
+ABSENT, PRESENT, CORRECT = 0, 1, 2
+
+
+def score_guess(guess, target):
+    """
+    Return the feedback for each letter of ``guess`` as a tuple of ABSENT/PRESENT/CORRECT.
+    Repeated letters are only marked PRESENT as many times as they remain unmatched in the target.
+    """
+    feedback = [ABSENT] * len(guess)
+    remaining = {}
+    for i, (g, t) in enumerate(zip(guess, target)):
+        if g == t:
+            feedback[i] = CORRECT
+        else:
+            remaining[t] = remaining.get(t, 0) + 1
+    for i, g in enumerate(guess):
+        if feedback[i] != CORRECT and remaining.get(g, 0):
+            feedback[i] = PRESENT
+            remaining[g] -= 1
+    return tuple(feedback)
+
+
+def encode_feedback(feedback):
+    """Pack a feedback tuple into one base-3 int (first letter is the least significant digit)."""
+    return sum(value * 3 ** i for i, value in enumerate(feedback))
+
+
+def decode_feedback(pattern, length):
+    feedback = []
+    for _ in range(length):
+        pattern, value = divmod(pattern, 3)
+        feedback.append(value)
+    return tuple(feedback)
+
+
+def read_words(filename, length=WORD_LENGTH):
+    """Read a word file, keeping only alphabetic words of the given length (upper-cased, deduplicated)."""
+    try:
+        with open(filename, "r") as file:
+            lines = [line.strip().upper() for line in file]
+    except FileNotFoundError:
+        return []
+    words = [word for word in dict.fromkeys(lines) if len(word) == length and word.isalpha() and word.isascii()]
+    # Words of other lengths belong to other dictionaries and aren't counted as skipped
+    skipped = sum(1 for line in lines if len(line) == length) - len(words)
+    if skipped:
+        print(f"Skipped {skipped} invalid or duplicate entries in {filename}")
+    return words
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(bits, "little")
+
+
+class WordList(Sequence):
+    """
+    Read-only sequence of fixed-width upper-case words stored back to back in a buffer
+    (``bytes`` or an ``mmap``). Words are decoded when accessed. Membership tests on a
+    sorted list are a binary search over the raw bytes, narrowed to the word's two-letter
+    prefix when ``prefix_index`` (the position of the first word of each prefix) is given.
+    """
+
+    def __init__(self, buffer, length, count, offset=0, is_sorted=False, prefix_index=None):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self.length = length
+        self.is_sorted = is_sorted
+        self._prefix_index = prefix_index
+
+    def __len__(self):
+        return self._count
+
+    def _record(self, index):
+        start = self._offset + index * self.length
+        return self._buffer[start:start + self.length]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("word index out of range")
+        return self._record(index).decode("ascii")
+
+    def __contains__(self, word):
+        if not self.is_sorted:
+            return super().__contains__(word)
+        if not isinstance(word, str) or len(word) != self.length or not word.isascii():
+            return False
+        key = word.encode("ascii")
+        low, high = 0, self._count
+        if self._prefix_index is not None:
+            prefix = _prefix(key)
+            if prefix is None:
+                return False
+            low, high = self._prefix_index[prefix], self._prefix_index[prefix + 1]
+        buffer, offset, length = self._buffer, self._offset, self.length
+        while low < high:
+            middle = (low + high) // 2
+            start = offset + middle * length
+            if buffer[start:start + length] < key:
+                low = middle + 1
+            else:
+                high = middle
+        start = offset + low * length
+        return low < self._count and buffer[start:start + length] == key
+
+
+def save_packed(path, length, answers, guesses=()):
+    """
+    Write a packed dictionary: header, prefix index, sorted allowed words (answers and guesses)
+    and the answers in file order. Words must be upper-case A-Z, as ``read_words`` returns them.
+    """
+    words = sorted(set(answers).union(guesses))
+    prefix_index = array("I", [0] * (_PREFIXES + 1))
+    for word in words:
+        prefix_index[_prefix(word.encode("ascii")) + 1] += 1
+    for prefix in range(_PREFIXES):
+        prefix_index[prefix + 1] += prefix_index[prefix]  # Counts -> start positions
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(_HEADER.pack(_MAGIC, _VERSION, length, len(words), len(answers)))
+        file.write(prefix_index.tobytes())
+        file.write("".join(words).encode("ascii"))
+        file.write("".join(answers).encode("ascii"))
+    os.replace(temporary, path)
+
+
+def load_packed(path):
+    """Memory-map a packed dictionary. Raises OSError or ValueError if it is missing or unreadable."""
+    with open(path, "rb") as file:
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is truncated")
+        magic, version, length, word_count, answer_count = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} packed dictionary")
+        words_start = _HEADER.size + (_PREFIXES + 1) * 4
+        if os.fstat(file.fileno()).st_size != words_start + (word_count + answer_count) * length:
+            raise ValueError(f"{path} is truncated")
+        # The mapping stays valid after the file is closed
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    # Viewed in place, not copied (the file is little-endian, like the platforms the bot runs on)
+    prefix_index = memoryview(buffer)[_HEADER.size:words_start].cast("I")
+    words = WordList(buffer, length, word_count, words_start, is_sorted=True, prefix_index=prefix_index)
+    answers = WordList(buffer, length, answer_count, words_start + word_count * length)
+    return WordDictionary(words, answers, length)
+
+
+def packed_path(length, directory=PACKED_DIR):
+    return os.path.join(directory, f"words{length}.bin")
+
+
+class WordDictionary:
+    def __init__(self, words, answers, length=WORD_LENGTH):
+        """``words`` is every allowed guess, sorted; ``answers`` is the pool answers are drawn from."""
+        self.length = length
+        self.words = words
+        self.answers = answers
+        # A packed (sorted) word list is searched in place; a plain one gets a set
+        self.valid = words if isinstance(words, WordList) else frozenset(words)
+
+    @classmethod
+    def from_words(cls, answers, guesses=(), length=WORD_LENGTH):
+        answers = tuple(answers)
+        return cls(tuple(sorted(set(answers).union(guesses))), answers, length)
+
+    @property
+    def all_mask(self):
+        return (1 << len(self.words)) - 1
+
+    @cached_property
+    def _masks(self):
+        length = self.length
+        # Build the bitsets from byte arrays; OR-ing bits into large ints one word at a time is quadratic
+        size = (len(self.words) + 7) // 8
+        position_bits = [[bytearray(size) for _ in range(26)] for _ in range(length)]
+        count_bits = [[bytearray(size) for _ in range(length)] for _ in range(26)]
+        for i, word in enumerate(self.words):
+            byte, bit = i >> 3, 1 << (i & 7)
+            counts = {}
+            for position, letter in enumerate(word):
+                letter_index = ord(letter) - 65
+                position_bits[position][letter_index][byte] |= bit
+                counts[letter_index] = counts.get(letter_index, 0) + 1
+            for letter_index, count in counts.items():
+                for k in range(count):
+                    count_bits[letter_index][k][byte] |= bit
+
+        # position_masks[i][letter]: words with that letter at position i
+        position_masks = [[_bits_to_int(bits) for bits in letters] for letters in position_bits]
+        # count_masks[letter][k]: words containing the letter at least k + 1 times
+        count_masks = [[_bits_to_int(bits) for bits in counts] for counts in count_bits]
+        return position_masks, count_masks
+
+    @property
+    def position_masks(self):
+        return self._masks[0]
+
+    @property
+    def count_masks(self):
+        return self._masks[1]
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.valid
+
+    def random_answer(self):
+        return random.choice(self.answers)
+
+    def letter_mask(self, letter):
+        """Words containing the letter at least once."""
+        return self.count_masks[ord(letter) - 65][0]
+
+    def consistent_mask(self, guess, feedback, mask=None):
+        """Narrow ``mask`` (default: every word) to the words that would produce ``feedback`` for ``guess``."""
+        if mask is None:
+            mask = self.all_mask
+
+        matched = {}
+        for i, (letter, result) in enumerate(zip(guess, feedback)):
+            letter_index = ord(letter) - 65
+            if result == CORRECT:
+                mask &= self.position_masks[i][letter_index]
+            else:
+                mask &= ~self.position_masks[i][letter_index]
+            if result != ABSENT:
+                matched[letter_index] = matched.get(letter_index, 0) + 1
+
+        for letter in set(guess):
+            letter_index = ord(letter) - 65
+            count = matched.get(letter_index, 0)
+            if count:
+                mask &= self.count_masks[letter_index][count - 1]
+            absent = any(g == letter and r == ABSENT for g, r in zip(guess, feedback))
+            if absent:
+                # An absent copy pins the count exactly: no more than the matched ones
+                if count < self.length:
+                    mask &= ~self.count_masks[letter_index][count]
+        return mask
+
+    def candidates(self, history, mask=None):
+        """Return the mask of words consistent with every (guess, feedback) pair in ``history``."""
+        for guess, feedback in history:
+            mask = self.consistent_mask(guess, feedback, mask)
+        return mask
+
+    def words_in(self, mask):
+        """List the words whose bits are set in ``mask``."""
+        bits = bin(mask)[:1:-1]  # Least significant bit first
+        return [self.words[i] for i, bit in enumerate(bits) if bit == "1"]
+
+
+def _is_current(path, sources):
+    """True if ``path`` exists and is at least as new as every source file that exists."""
+    try:
+        built = os.path.getmtime(path)
+    except OSError:
+        return False
+    return all(built >= os.path.getmtime(source) for source in sources if os.path.exists(source))
+
+
+_dictionaries = {}
+
+
+def get_dictionary(answers_path=ANSWERS_PATH, guesses_path=GUESSES_PATH, length=WORD_LENGTH, packed_dir=PACKED_DIR):
+    """
+    Return the process-wide dictionary for these files, loading it on first use.
+    The packed file for the length is mapped if it is newer than the word files.
+    """
+    key = (answers_path, guesses_path, length)
+    dictionary = _dictionaries.get(key)
+    if dictionary is None:
+        path = packed_path(length, packed_dir) if packed_dir else None
+        if path and _is_current(path, (answers_path, guesses_path)):
+            try:
+                dictionary = load_packed(path)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring packed dictionary: {e}")
+        if dictionary is None:
+            answers = read_words(answers_path, length)
+            dictionary = WordDictionary.from_words(answers, read_words(guesses_path, length), length)
+        _dictionaries[key] = dictionary
+    return dictionary
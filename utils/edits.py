@@ -0,0 +1,197 @@
+"""
+Shared, rate-limit-aware queue for message edits.
+
+Edits are queued per message and sent by one worker per channel (Discord rate-limits
+message edits per channel). While an edit is waiting, newer edits to the same message
+are merged into it field by field, so only the latest state is ever sent and stale
+animation frames are dropped instead of piling up in the rate-limit bucket.
+
+Each channel is paced: the gap between edits starts at ``MIN_INTERVAL`` and doubles
+whenever an edit is rate limited (or held back by the library's limiter for longer
+than ``SLOW_EDIT``), then eases back down as edits go through quickly again.
+"""
+import asyncio
+import time
+
+import discord
+
+from utils.metrics import Metrics, get_metrics
+
+MIN_INTERVAL = 0.2  # Seconds between edits in one channel when nothing is rate limited
+MAX_INTERVAL = 5.0  # Upper bound for the back-off
+SLOW_EDIT = 1.0     # An edit taking longer than this was waiting on a rate limit
+RECOVERY = 0.8      # Interval multiplier after each fast edit
+# Counted per edit: requested, actually sent to Discord, merged into one that was already waiting, hit a rate limit
+OUTCOMES = ("submitted", "sent", "coalesced", "rate_limited")
+
+
+def _consume(future):
+    # Errors are logged by the worker; callers that don't await shouldn't trigger "never retrieved" warnings
+    if not future.cancelled():
+        future.exception()
+
+
+class _PendingEdit:
+    __slots__ = ("message", "fields", "futures")
+
+    def __init__(self, message, fields):
+        self.message = message
+        self.fields = fields
+        self.futures = []
+
+    def merge(self, other):
+        self.fields.update(other.fields)
+        self.futures.extend(other.futures)
+
+
+class EditCoalescer:
+    def __init__(self, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, metrics=None):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._queues = {}   # channel id -> {message id: _PendingEdit}, oldest first
+        self._pacing = {}   # channel id -> [interval, earliest time of the next edit]
+        self._workers = {}  # channel id -> task
+        self._pending = 0   # Edits waiting across every channel, i.e. the sum of the queue lengths
+        self.max_depth = 0  # Most messages waiting at once
+        # Without the bot's metrics the counters are kept in a registry of their own
+        outcomes = (metrics or Metrics()).counter("message_edits", "Message edits, by what happened to them", ("outcome",))
+        self.counts = {outcome: outcomes.labels(outcome) for outcome in OUTCOMES}
+
+    @property
+    def depth(self):
+        """Number of messages with an edit waiting to be sent."""
+        return self._pending
+
+    def stats(self):
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "channels": len(self._queues),
+            **{outcome: counter.value for outcome, counter in self.counts.items()},
+        }
+
+    def submit(self, message, **fields):
+        """
+        Queue ``message.edit(**fields)`` without waiting for it. Returns a future that
+        resolves once an edit containing these fields has been sent.
+        """
+        future = self._queue(message, fields)
+        self.max_depth = max(self.max_depth, self._pending)
+        return future
+
+    def submit_many(self, edits):
+        """Queue several ``(message, fields)`` edits at once (e.g. one animation tick). Returns their futures in order."""
+        futures = [self._queue(message, fields) for message, fields in edits]
+        self.max_depth = max(self.max_depth, self._pending)
+        return futures
+
+    def _queue(self, message, fields):
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume)
+        edit = _PendingEdit(message, fields)
+        edit.futures.append(future)
+
+        channel_id = message.channel.id
+        queue = self._queues.setdefault(channel_id, {})
+        waiting = queue.get(message.id)
+        if waiting is not None:
+            waiting.merge(edit)
+            self.counts["coalesced"].inc()
+        else:
+            queue[message.id] = edit
+            self._pending += 1
+        self.counts["submitted"].inc()
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(self._drain(channel_id))
+        return future
+
+    async def edit(self, message, **fields):
+        """Queue an edit and wait until it has been sent. Raises if the edit failed."""
+        await self.submit(message, **fields)
+
+    def close(self):
+        for task in self._workers.values():
+            task.cancel()
+        for queue in self._queues.values():
+            for edit in queue.values():
+                for future in edit.futures:
+                    future.cancel()
+        self._workers.clear()
+        self._queues.clear()
+        self._pending = 0
+
+    async def _drain(self, channel_id):
+        queue = self._queues[channel_id]
+        pacing = self._pacing.setdefault(channel_id, [self.min_interval, 0.0])
+        try:
+            while True:
+                delay = pacing[1] - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if not queue:
+                    break  # Idle for a full interval
+
+                message_id = next(iter(queue))
+                edit = queue.pop(message_id)
+                self._pending -= 1  # Whether it is sent or fails; a rate-limited edit is counted again below
+                start = time.monotonic()
+                try:
+                    await edit.message.edit(**edit.fields)
+                except (discord.RateLimited, discord.HTTPException) as e:
+                    if isinstance(e, discord.HTTPException) and e.status != 429:
+                        self._fail(edit, e)
+                        continue
+                    # Put the edit back, folding in anything queued meanwhile, and back off
+                    self.counts["rate_limited"].inc()
+                    newer = queue.pop(message_id, None)
+                    if newer is not None:
+                        edit.merge(newer)  # Takes over the newer edit's place in the count
+                    else:
+                        self._pending += 1
+                    queue[message_id] = edit
+                    retry_after = getattr(e, "retry_after", None) or pacing[0]
+                    pacing[0] = min(pacing[0] * 2, self.max_interval)
+                    pacing[1] = time.monotonic() + max(retry_after, pacing[0])
+                    continue
+                except Exception as e:
+                    self._fail(edit, e)
+                    continue
+
+                self.counts["sent"].inc()
+                for future in edit.futures:
+                    if not future.done():
+                        future.set_result(None)
+
+                elapsed = time.monotonic() - start
+                if elapsed > SLOW_EDIT:
+                    # The library sat on this edit until the bucket reset
+                    self.counts["rate_limited"].inc()
+                    pacing[0] = min(max(pacing[0] * 2, elapsed / 2), self.max_interval)
+                else:
+                    pacing[0] = max(pacing[0] * RECOVERY, self.min_interval)
+                pacing[1] = time.monotonic() + pacing[0]
+        finally:
+            self._workers.pop(channel_id, None)
+            if not queue:
+                self._queues.pop(channel_id, None)
+                if pacing[0] <= self.min_interval:
+                    self._pacing.pop(channel_id, None)  # Keep the back-off only for channels still being limited
+
+    @staticmethod
+    def _fail(edit, error):
+        print(f"Error editing message {edit.message.id}: {error}")
+        for future in edit.futures:
+            if not future.done():
+                future.set_exception(error)
+
+
+def get_edits(bot):
+    """Return the bot's shared EditCoalescer, creating it on first use and exporting its queue as metrics."""
+    edits = getattr(bot, "edits", None)
+    if edits is None:
+        metrics = get_metrics(bot)
+        edits = bot.edits = EditCoalescer(metrics=metrics)
+        metrics.gauge("edit_queue_depth", "Message edits waiting to be sent", (), lambda: {(): edits.depth})
+        metrics.gauge("edit_queue_channels", "Channels with message edits waiting", (), lambda: {(): len(edits._queues)})
+    return edits
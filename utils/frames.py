@@ -0,0 +1,72 @@
+"""
+Cached, pre-serialized views for boards whose frames repeat.
+
+A ``StaticView`` carries only the component payload of a rendered view. It is
+never added to the library's view store (``is_finished`` is always true), so its
+buttons must be handled elsewhere, i.e. by the interaction router (``utils/router.py``).
+``FrameCache`` memoizes those payloads by a frame key with LRU eviction, so an
+animation re-sends the same few frames instead of rebuilding 25 buttons each time.
+Cached frames can be shared between games and stamped with a game's id on use.
+"""
+from collections import OrderedDict
+
+import discord
+
+from utils.router import SEPARATOR
+
+
+class StaticView(discord.ui.View):
+    def __init__(self, components):
+        super().__init__(timeout=None)
+        self._components = components
+
+    @classmethod
+    def from_view(cls, view):
+        return cls(view.to_components())
+
+    def to_components(self):
+        return self._components
+
+    def with_game_id(self, game_id):
+        """Copy of this frame with the game id in every routed custom_id replaced."""
+        game_id = str(game_id)
+        rows = []
+        for row in self._components:
+            components = []
+            for component in row["components"]:
+                custom_id = component.get("custom_id")
+                if custom_id is not None and custom_id.count(SEPARATOR) >= 2:
+                    prefix, _, action = custom_id.split(SEPARATOR, 2)
+                    component = {**component, "custom_id": SEPARATOR.join((prefix, game_id, action))}
+                components.append(component)
+            rows.append({**row, "components": components})
+        return StaticView(rows)
+
+    def is_finished(self):
+        # Keeps Message.edit from registering the frame in the view store
+        return True
+
+
+class FrameCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def get(self, key, render):
+        """Return the cached frame for ``key``, calling ``render()`` (which returns a View) on a miss."""
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            self.hits += 1
+            return frame
+
+        self.misses += 1
+        frame = self._frames[key] = StaticView.from_view(render())
+        if len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+        return frame
@@ -0,0 +1,285 @@
+"""
+Runtime metrics: latency histograms, counters and gauges in the Prometheus text format.
+
+Recording is a dict lookup and a few integer additions, cheap enough for every click:
+histograms count observations into fixed buckets (``BUCKETS``) and only turn them into
+quantiles when read. Gauges are not updated as things change but computed when scraped.
+
+``Metrics.start`` samples the event loop lag in the background and serves everything
+at ``http://HOST:PORT/metrics``. REST calls to Discord are timed through the HTTP
+session's trace hooks (``trace_requests``), with ids and tokens in the URL replaced by
+placeholders so each route is one series.
+"""
+import asyncio
+import bisect
+import math
+import re
+import time
+
+from aiohttp import web
+
+HOST = "127.0.0.1"   # Only reachable from this machine
+PORT = 9464          # Prometheus endpoint; None to not serve one
+LAG_INTERVAL = 0.5   # Seconds between event loop lag samples
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_API_PATH = re.compile(r"^/api/v\d+")
+_ROUTE_PARTS = (
+    (re.compile(r"/\d+"), "/{id}"),
+    (re.compile(r"/((?:interactions|webhooks)/\{id\})/[^/]+"), r"/\1/{token}"),
+    (re.compile(r"/reactions/[^/]+"), "/reactions/{emoji}"),
+)
+
+
+def route_template(path):
+    """The route of a Discord API path, e.g. ``/api/v10/channels/1/messages`` -> ``/channels/{id}/messages``. None for other URLs."""
+    match = _API_PATH.match(path)
+    if match is None:
+        return None
+    path = path[match.end():]
+    for pattern, replacement in _ROUTE_PARTS:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last one counts values above every bucket
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket it falls in (the maximum for the last one)."""
+        if not self.count:
+            return math.nan
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _Family:
+    """A named metric with one child (Histogram or Counter) per combination of label values."""
+
+    def __init__(self, kind, name, help, labelnames, factory):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}  # label values -> child
+
+    def labels(self, *values):
+        """The child for these label values (positional, in ``labelnames`` order), created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._factory()
+        return child
+
+    def items(self):
+        return self._children.items()
+
+    def render(self, lines):
+        for values, child in self._children.items():
+            if self.kind == "counter":
+                lines.append(f"{self.name}_total{_format_labels(self.labelnames, values)} {child.value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(child.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {child.count}")
+
+
+class _Gauge:
+    """A metric whose values are computed when read: ``collect()`` returns {label values: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, labelnames, collect):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def items(self):
+        return self.collect().items()
+
+    def render(self, lines):
+        for values, value in self.collect().items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}")
+
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._metrics = {}  # name -> family, in registration order
+        self._lag_task = None
+        self._runner = None
+        self.started = time.monotonic()
+        self.loop_lag = self.histogram("event_loop_lag_seconds", "How late the event loop ran a timer").labels()
+
+    def _register(self, kind, name, create):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = create()
+        elif metric.kind != kind:
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+    def histogram(self, name, help, labelnames=()):
+        """Register a histogram (or return the one already registered under ``name``)."""
+        return self._register("histogram", name, lambda: _Family(
+            "histogram", name, help, labelnames, lambda: Histogram(self.buckets)
+        ))
+
+    def counter(self, name, help, labelnames=()):
+        """Register a counter; it is exported as ``<name>_total``."""
+        return self._register("counter", name, lambda: _Family("counter", name, help, labelnames, Counter))
+
+    def gauge(self, name, help, labelnames, collect):
+        """Register a gauge computed by ``collect()`` on every read. Registering again replaces ``collect``."""
+        gauge = self._register("gauge", name, lambda: _Gauge(name, help, labelnames, collect))
+        gauge.collect = collect
+        return gauge
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            metric.render(lines)
+        return "\n".join(lines) + "\n"
+
+    def trace_requests(self, trace_config):
+        """Time the REST calls made through an aiohttp session created with ``trace_config``."""
+        latency = self.histogram("discord_rest_seconds", "Discord REST call latency", ("method", "route"))
+        responses = self.counter("discord_rest_responses", "Discord REST calls by response status", ("method", "route", "status"))
+
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_done(session, context, params):
+            route = route_template(params.url.path)
+            if route is None:
+                return  # The gateway or the CDN
+            latency.labels(params.method, route).observe(time.perf_counter() - context.started)
+            status = params.response.status if hasattr(params, "response") else "error"
+            responses.labels(params.method, route, str(status)).inc()
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_done)
+        trace_config.on_request_exception.append(on_request_done)
+
+    async def start(self, host=HOST, port=PORT):
+        """Start sampling the event loop lag and serve ``/metrics`` (unless ``port`` is None)."""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._sample_lag())
+        if port is None or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self._serve)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+        except OSError as e:
+            print(f"Metrics endpoint not started on {host}:{port}: {e}")
+            await runner.cleanup()
+            return
+        self._runner = runner
+
+    async def _serve(self, request):
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def _sample_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.loop_lag.observe(max(time.perf_counter() - start - LAG_INTERVAL, 0.0))
+
+    async def close(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def summarize(metric, top=None):
+    """(labels, count, p50, p99, max) per series of a histogram, most observed first."""
+    if metric is None:
+        return []
+    rows = sorted(
+        ((values, h.count, h.quantile(0.5), h.quantile(0.99), h.max) for values, h in metric.items() if h.count),
+        key=lambda row: -row[1]
+    )
+    return rows[:top]
+
+
+def get_metrics(bot):
+    """Return the bot's Metrics, creating it on first use with a gauge of the games each cog is running."""
+    metrics = getattr(bot, "metrics", None)
+    if metrics is None:
+        metrics = bot.metrics = Metrics()
+
+        def active_games():
+            # Every game cog keeps its running sessions in ``games``
+            return {
+                (cog.__module__.rsplit(".", 1)[-1],): len(cog.games)
+                for cog in bot.cogs.values() if isinstance(getattr(cog, "games", None), dict)
+            }
+
+        metrics.gauge("active_games", "Games running, per game", ("game",), active_games)
+    return metrics
@@ -0,0 +1,206 @@
+"""
+Optional PNG rendering of grid boards (needs Pillow).
+
+A board is described as a column count and a tuple of ``(style, glyph)`` cells in
+row-major order. Rendering runs in a thread pool, off the event loop:
+
+- tiles (one per style) and glyphs (one per character) are rasterized once, and
+  each (style, glyph) cell is composited once into a fixed palette and pasted from
+  then on. Palette images encode several times faster than RGB ones;
+- each game's last canvas is kept, and only the cells that changed since it was
+  drawn are repainted;
+- the encoded PNG is cached by board state, so games showing the same board
+  (e.g. an empty grid) share one encode, including boards still being rendered.
+"""
+import asyncio
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Image boards are optional; without Pillow the games use text boards
+    Image = None
+
+CELL_SIZE = 64            # Pixels per cell
+GAP = 6                   # Pixels between cells and around the grid
+WORKERS = 4               # Render threads
+PNG_CACHE_SIZE = 2048     # Encoded boards kept, by state
+CANVAS_CACHE_SIZE = 1024  # Games whose last canvas is kept for incremental redraws
+FONT_PATHS = ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "arialbd.ttf")
+RAMP = 16                 # Palette shades between a tile and its glyph color, for antialiased edges
+
+BACKGROUND = (18, 18, 19)
+# style -> (fill, border, glyph color)
+STYLES = {
+    "empty": ((18, 18, 19), (58, 58, 60), (255, 255, 255)),
+    "absent": ((58, 58, 60), (58, 58, 60), (255, 255, 255)),
+    "present": ((181, 159, 59), (181, 159, 59), (255, 255, 255)),
+    "correct": ((83, 141, 78), (83, 141, 78), (255, 255, 255)),
+}
+
+
+def available():
+    return Image is not None
+
+
+def _palette():
+    """Flat RGB palette: the background, then each style's border and a ramp from its fill to its glyph color."""
+    colors = [BACKGROUND]
+    for fill, border, glyph in STYLES.values():
+        colors.append(border)
+        for step in range(RAMP):
+            colors.append(tuple(a + (b - a) * step // (RAMP - 1) for a, b in zip(fill, glyph)))
+    return [channel for color in colors for channel in color]
+
+
+def _load_font(size):
+    for path in FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size)
+
+
+class BoardRenderer:
+    def __init__(self, cell_size=CELL_SIZE, workers=WORKERS, png_cache_size=PNG_CACHE_SIZE,
+                 canvas_cache_size=CANVAS_CACHE_SIZE):
+        if Image is None:
+            raise RuntimeError("Image boards need Pillow (pip install Pillow)")
+        self.cell_size = cell_size
+        self.png_cache_size = png_cache_size
+        self.canvas_cache_size = canvas_cache_size
+        self.font = _load_font(int(cell_size * 0.55))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="board-render")
+        self._pngs = OrderedDict()      # (columns, cells) -> PNG bytes; only touched on the event loop
+        self._rendering = {}            # (columns, cells) -> future of a render in progress
+        self._canvases = OrderedDict()  # key -> (columns, cells, image); shared with the render threads
+        self._canvas_lock = threading.Lock()
+        self._palette = _palette()
+        self._palette_image = Image.new("P", (1, 1))
+        self._palette_image.putpalette(self._palette)
+        self._tiles = {}   # style -> RGB tile
+        self._glyphs = {}  # glyph -> (mask, offset)
+        self._cells = {}   # (style, glyph) -> finished cell in the palette
+        self.renders = 0
+        self.png_hits = 0
+        self.cells_drawn = 0
+        self.cells_total = 0
+
+    async def render(self, key, columns, cells):
+        """
+        Return the PNG bytes of a board. ``key`` identifies the game whose previous canvas
+        may be reused (None for a one-off board).
+        """
+        state = (columns, cells)
+        png = self._pngs.get(state)
+        if png is not None:
+            self._pngs.move_to_end(state)
+            self.png_hits += 1
+            return png
+
+        future = self._rendering.get(state)
+        if future is not None:
+            self.png_hits += 1
+            return await asyncio.shield(future)
+
+        future = self._rendering[state] = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._render, key, columns, cells
+        )
+        try:
+            png = await asyncio.shield(future)
+        finally:
+            self._rendering.pop(state, None)
+        self._pngs[state] = png
+        if len(self._pngs) > self.png_cache_size:
+            self._pngs.popitem(last=False)
+        return png
+
+    def discard(self, key):
+        """Forget a finished game's canvas."""
+        with self._canvas_lock:
+            self._canvases.pop(key, None)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _render(self, key, columns, cells):
+        previous = None
+        if key is not None:
+            # Taken out of the cache while drawing, so no other thread can touch the same canvas
+            with self._canvas_lock:
+                previous = self._canvases.pop(key, None)
+
+        if previous is not None and previous[0] == columns and len(previous[1]) == len(cells):
+            _, drawn, canvas = previous
+        else:
+            rows = -(-len(cells) // columns)
+            step = self.cell_size + GAP
+            canvas = Image.new("P", (GAP + columns * step, GAP + rows * step), 0)
+            canvas.putpalette(self._palette)
+            drawn = (None,) * len(cells)
+
+        changed = 0
+        for index, cell in enumerate(cells):
+            if cell != drawn[index]:
+                self._draw_cell(canvas, index, columns, cell)
+                changed += 1
+
+        buffer = io.BytesIO()
+        canvas.save(buffer, "PNG", compress_level=1)  # Boards are flat colors; fast compression is small enough
+
+        if key is not None:
+            with self._canvas_lock:
+                self._canvases[key] = (columns, cells, canvas)
+                if len(self._canvases) > self.canvas_cache_size:
+                    self._canvases.popitem(last=False)
+        self.renders += 1
+        self.cells_drawn += changed
+        self.cells_total += len(cells)
+        return buffer.getvalue()
+
+    def _draw_cell(self, canvas, index, columns, cell):
+        row, column = divmod(index, columns)
+        step = self.cell_size + GAP
+        canvas.paste(self._cell(cell), (GAP + column * step, GAP + row * step))
+
+    def _cell(self, cell):
+        image = self._cells.get(cell)
+        if image is None:
+            style, glyph = cell
+            rgb = self._tile(style).copy()
+            if glyph:
+                mask, offset = self._glyph(glyph)
+                rgb.paste(STYLES[style][2], offset, mask)
+            image = self._cells[cell] = rgb.quantize(palette=self._palette_image, dither=Image.Dither.NONE)
+        return image
+
+    def _tile(self, style):
+        tile = self._tiles.get(style)
+        if tile is None:
+            fill, border, _ = STYLES[style]
+            tile = Image.new("RGB", (self.cell_size, self.cell_size), fill)
+            ImageDraw.Draw(tile).rectangle((0, 0, self.cell_size - 1, self.cell_size - 1), outline=border, width=2)
+            self._tiles[style] = tile
+        return tile
+
+    def _glyph(self, glyph):
+        """Return the glyph's alpha mask and its offset to center it in a cell."""
+        entry = self._glyphs.get(glyph)
+        if entry is None:
+            left, top, right, bottom = self.font.getbbox(glyph)
+            mask = Image.new("L", (right - left, bottom - top), 0)
+            ImageDraw.Draw(mask).text((-left, -top), glyph, fill=255, font=self.font)
+            offset = ((self.cell_size - mask.width) // 2, (self.cell_size - mask.height) // 2)
+            entry = self._glyphs[glyph] = (mask, offset)
+        return entry
+
+
+def get_renderer(bot):
+    """Return the bot's BoardRenderer, creating it on first use. Raises RuntimeError without Pillow."""
+    renderer = getattr(bot, "renderer", None)
+    if renderer is None:
+        renderer = bot.renderer = BoardRenderer()
+    return renderer
@@ -0,0 +1,82 @@
+"""
+Central component-interaction router.
+
+Game buttons use stateless custom_ids of the form ``"<prefix>:<game id>:<action>"``
+(e.g. ``"memory:1234:12"``). One ``on_interaction`` listener on the bot parses the id
+and awaits the single handler registered for the prefix, so the cost of a click doesn't
+grow with the number of loaded game cogs, and ids from different games can't collide.
+
+Everything needed to handle a click is in its custom_id, so messages are sent with
+payload-only views (``utils.frames.StaticView``) and nothing per message stays in the
+library's view store; the buttons keep working after a restart once the cog is loaded.
+
+With metrics, each handler's run time is recorded under ``interaction_seconds`` by prefix.
+"""
+import time
+
+import discord
+
+from utils.metrics import get_metrics
+
+SEPARATOR = ":"
+
+
+def make_custom_id(prefix, game_id, *parts):
+    """Build a routed custom_id, e.g. ``make_custom_id("memory", 1234, 12) == "memory:1234:12"``."""
+    return SEPARATOR.join((prefix, str(game_id), *map(str, parts)))
+
+
+class InteractionRouter:
+    def __init__(self, metrics=None):
+        self._handlers = {}  # prefix -> async handler(interaction, game_id, action)
+        self._latency = None if metrics is None else metrics.histogram(
+            "interaction_seconds", "Time to handle a button click or Wordle guess", ("game",)
+        )
+        self._errors = None if metrics is None else metrics.counter(
+            "handler_errors", "Exceptions raised by game handlers and callbacks", ("source",)
+        )
+        self.dispatched = 0
+        self.unrouted = 0
+
+    def __contains__(self, prefix):
+        return prefix in self._handlers
+
+    def register(self, prefix, handler):
+        """Route ``prefix:<game id>:<action>`` custom_ids to ``await handler(interaction, game_id, action)``."""
+        if SEPARATOR in prefix:
+            raise ValueError(f"Router prefixes can't contain {SEPARATOR!r}: {prefix!r}")
+        if prefix in self._handlers:
+            raise ValueError(f"An interaction handler is already registered for {prefix!r}")
+        self._handlers[prefix] = handler
+
+    def unregister(self, prefix):
+        self._handlers.pop(prefix, None)
+
+    async def dispatch(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.component:
+            return
+        parts = interaction.data.get("custom_id", "").split(SEPARATOR, 2)
+        handler = self._handlers.get(parts[0]) if len(parts) == 3 and parts[1].isdigit() else None
+        if handler is None:
+            self.unrouted += 1
+            return
+        prefix, game_id, action = parts
+        self.dispatched += 1
+        start = time.perf_counter()
+        try:
+            await handler(interaction, int(game_id), action)
+        except Exception as e:
+            print(f"Error handling {prefix} interaction: {e}")
+            if self._errors is not None:
+                self._errors.labels(f"interaction:{prefix}").inc()
+        if self._latency is not None:
+            self._latency.labels(prefix).observe(time.perf_counter() - start)
+
+
+def get_router(bot):
+    """Return the bot's InteractionRouter, installing its listener on first use."""
+    router = getattr(bot, "router", None)
+    if router is None:
+        router = bot.router = InteractionRouter(get_metrics(bot))
+        bot.add_listener(router.dispatch, "on_interaction")
+    return router
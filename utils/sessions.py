@@ -0,0 +1,220 @@
+"""
+Compact per-game session objects.
+
+Each game keeps its state in a class with ``__slots__`` instead of a free-form dict,
+so a live game costs a handful of machine words. Cell sets are int bitmasks and
+sequences are ``array`` buffers of bytes rather than lists of Python ints.
+
+``to_dict``/``from_dict`` convert sessions to JSON-friendly dicts for the session store.
+Message handles are stored as (channel id, message id) and re-attached by the cogs.
+``game_id`` is the snowflake of the command that started the game; it is encoded in the
+game's button custom_ids and is the key the button games store their sessions under.
+
+Every session has an ``asyncio.Lock`` (not persisted) that the cogs hold while
+handling a click or guess, so simultaneous input is applied one at a time.
+"""
+import asyncio
+from array import array
+
+from utils.bitboard import Board
+from utils.dictionary import decode_feedback, encode_feedback
+
+
+def _message_ref(message):
+    """Return [channel id, message id] for a message handle, or None."""
+    if message is None:
+        return None
+    return [message.channel.id, message.id]
+
+
+class TicTacToeSession:
+    __slots__ = ("board", "player_ids", "player_names", "message", "game_started", "owner", "game_id",
+                 "channel_id", "lock")
+
+    def __init__(self, player_ids, player_names, owner, size=3, win_length=3, game_started=False, message=None, game_id=None,
+                 channel_id=None):
+        self.game_id = game_id
+        self.channel_id = channel_id
+        self.lock = asyncio.Lock()
+        self.board = Board(size=size, win_length=win_length)
+        self.player_ids = player_ids      # (X, O); O is None when playing the AI
+        self.player_names = player_names  # (X, O) display names
+        self.message = message
+        self.game_started = game_started
+        self.owner = owner
+
+    @property
+    def is_ai_game(self):
+        return self.player_ids[1] is None
+
+    def to_dict(self):
+        return {
+            "board": [self.board.x, self.board.o, self.board.turn, self.board.size, self.board.win_length],
+            "player_ids": list(self.player_ids),
+            "player_names": list(self.player_names),
+            "message": _message_ref(self.message),
+            "game_started": self.game_started,
+            "owner": self.owner,
+            "game_id": self.game_id,
+            "channel_id": self.channel_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        x, o, turn, size, win_length = data["board"]
+        session = cls(tuple(data["player_ids"]), tuple(data["player_names"]), data["owner"],
+                      size=size, win_length=win_length, game_started=data["game_started"],
+                      game_id=data["game_id"], channel_id=data["channel_id"])
+        session.board = Board(x, o, turn, size, win_length)
+        return session
+
+    @property
+    def current_player_id(self):
+        return self.player_ids[self.board.turn]
+
+    @property
+    def current_player_name(self):
+        return self.player_names[self.board.turn]
+
+
+class WordleSession:
+    __slots__ = ("target_word", "guesses", "patterns", "message", "owner", "hint", "ranked", "lock")
+
+    def __init__(self, target_word, owner, hint=None, message=None, ranked=False):
+        self.lock = asyncio.Lock()
+        self.target_word = target_word
+        self.guesses = []   # Guessed words, one per row
+        self.patterns = array("H")  # Base-3 encoded feedback per row (up to 3**8 for 8 letters)
+        self.message = message
+        self.owner = owner
+        self.hint = hint
+        self.ranked = ranked  # Counts for the leaderboard: a random word of the default length
+
+    @property
+    def current_row(self):
+        return len(self.guesses)
+
+    @property
+    def history(self):
+        """(guess, feedback) pairs, oldest first."""
+        length = len(self.target_word)
+        return [(guess, decode_feedback(pattern, length)) for guess, pattern in zip(self.guesses, self.patterns)]
+
+    def add_guess(self, guess, feedback):
+        self.guesses.append(guess)
+        self.patterns.append(encode_feedback(feedback))
+
+    def to_dict(self):
+        return {
+            "target_word": self.target_word,
+            "guesses": self.guesses,
+            "patterns": list(self.patterns),
+            "message": _message_ref(self.message),
+            "owner": self.owner,
+            "hint": self.hint,
+            "ranked": self.ranked,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data["target_word"], data["owner"], hint=data["hint"], ranked=data.get("ranked", False))
+        session.guesses = list(data["guesses"])
+        session.patterns = array("H", data["patterns"])
+        return session
+
+
+class MemorySession:
+    __slots__ = ("emoji_pairs", "revealed", "matched", "current_turn", "owner", "start_time",
+                 "game_started", "message_id", "game_id", "channel_id", "lock")
+
+    def __init__(self, emoji_pairs, owner, game_id=None, channel_id=None):
+        self.game_id = game_id
+        self.channel_id = channel_id
+        self.lock = asyncio.Lock()
+        self.emoji_pairs = tuple(emoji_pairs)
+        self.revealed = 0  # Bitmask of face-up cells
+        self.matched = 0   # Bitmask of matched cells
+        self.current_turn = ()
+        self.owner = owner
+        self.start_time = None
+        self.game_started = False
+        self.message_id = None
+
+    def is_revealed(self, index):
+        return self.revealed >> index & 1
+
+    def is_matched(self, index):
+        return self.matched >> index & 1
+
+    @property
+    def pairs_left(self):
+        return (len(self.emoji_pairs) - 1 - bin(self.matched).count("1")) // 2
+
+    def to_dict(self):
+        return {
+            "emoji_pairs": list(self.emoji_pairs),
+            "revealed": self.revealed,
+            "matched": self.matched,
+            "current_turn": list(self.current_turn),
+            "owner": self.owner,
+            "start_time": self.start_time,
+            "game_started": self.game_started,
+            "message_id": self.message_id,
+            "game_id": self.game_id,
+            "channel_id": self.channel_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data["emoji_pairs"], data["owner"], data["game_id"], data["channel_id"])
+        session.revealed = data["revealed"]
+        session.matched = data["matched"]
+        session.current_turn = tuple(data["current_turn"])
+        session.start_time = data["start_time"]
+        session.game_started = data["game_started"]
+        session.message_id = data["message_id"]
+        return session
+
+
+class SequenceSession:
+    __slots__ = ("owner", "game_started", "current_sequence", "player_sequence", "round",
+                 "showing_sequence", "message", "is_quitting", "error_button", "correct_button",
+                 "showing_correct", "game_id", "channel_id", "lock")
+
+    def __init__(self, owner, game_id=None, channel_id=None):
+        self.game_id = game_id
+        self.channel_id = channel_id
+        self.lock = asyncio.Lock()
+        self.owner = owner
+        self.game_started = False
+        self.current_sequence = array("B")  # Cell indices (0-23)
+        self.player_sequence = array("B")
+        self.round = 1
+        self.showing_sequence = False
+        self.message = None
+        self.is_quitting = False
+        self.error_button = None
+        self.correct_button = None
+        self.showing_correct = False
+
+    def to_dict(self):
+        # Animation and error-display flags are transient and not persisted
+        return {
+            "owner": self.owner,
+            "game_started": self.game_started,
+            "current_sequence": list(self.current_sequence),
+            "player_sequence": list(self.player_sequence),
+            "round": self.round,
+            "message": _message_ref(self.message),
+            "game_id": self.game_id,
+            "channel_id": self.channel_id,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        session = cls(data["owner"], data["game_id"], data["channel_id"])
+        session.game_started = data["game_started"]
+        session.current_sequence = array("B", data["current_sequence"])
+        session.player_sequence = array("B", data["player_sequence"])
+        session.round = data["round"]
+        return session
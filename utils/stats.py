@@ -0,0 +1,226 @@
+"""
+Game results and leaderboards.
+
+Cogs report finished games with ``record`` (a queue put, no I/O). A background task
+drains the queue in batches and writes them to SQLite from a worker thread: every
+result is appended to ``results`` and folded into the player's per-server and global
+row in ``bests`` (wins are summed, times and guesses keep the minimum, rounds the maximum).
+
+The top ``TOP_N`` of every leaderboard is kept in memory. It is loaded once with
+``load`` and updated from the rows each batch touches, which is exact because a
+player's aggregate only ever improves, so ``top`` never reads the disk. When several
+processes share the database (cluster mode), each only sees its own results that way,
+so with ``refresh_interval`` set the cache is also read again from disk periodically.
+"""
+import asyncio
+import bisect
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from utils.dictionary import ROOT_DIR
+
+DEFAULT_PATH = os.path.join(ROOT_DIR, "data", "stats.sqlite3")
+FLUSH_INTERVAL = 1.0  # Seconds a result may wait before its batch is written
+MAX_BATCH = 2000      # Write early once this many results are queued
+TOP_N = 10            # Entries kept per leaderboard
+GLOBAL = 0            # guild_id of the global leaderboards
+
+Leaderboard = namedtuple("Leaderboard", "title metric aggregate descending")
+
+LEADERBOARDS = {
+    "tictactoe": Leaderboard("Tic-Tac-Toe", "Wins", "sum", True),
+    "wordle": Leaderboard("Wordle", "Fewest guesses (random words of the default length)", "min", False),
+    "memory": Leaderboard("Memory Matching", "Fastest time", "min", False),
+    "sequence": Leaderboard("Sequence Memory", "Highest round", "max", True),
+}
+
+_UPSERT = (
+    "INSERT INTO bests (game, guild_id, user_id, best, games) VALUES (?, ?, ?, ?, 1) "
+    "ON CONFLICT (game, guild_id, user_id) DO UPDATE SET best = {}, games = games + 1"
+)
+_AGGREGATES = {
+    "sum": _UPSERT.format("best + excluded.best"),
+    "min": _UPSERT.format("MIN(best, excluded.best)"),
+    "max": _UPSERT.format("MAX(best, excluded.best)"),
+}
+
+
+def _rank_key(leaderboard, entry):
+    """Sort key for a (user_id, best, games) entry; the better score sorts first, ties by user id."""
+    return (-entry[1] if leaderboard.descending else entry[1], entry[0])
+
+
+class StatsService:
+    def __init__(self, path=DEFAULT_PATH, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH, top_n=TOP_N,
+                 refresh_interval=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.max_batch = max_batch
+        self.top_n = top_n
+        self._top = {}  # (game, guild_id) -> [(user_id, best, games)], best first
+        self._queue = None
+        self._wakeup = None
+        self._lock = None
+        self._task = None
+        self._refresh_task = None
+        self.recorded = 0
+        self.written = 0
+        self.batches = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Only ever used from one worker thread at a time (writes are serialized by the lock)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "game TEXT NOT NULL, guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+            "score INTEGER NOT NULL, played_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS results_player ON results (game, user_id);"
+            "CREATE TABLE IF NOT EXISTS bests ("
+            "game TEXT NOT NULL, guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, "
+            "best INTEGER NOT NULL, games INTEGER NOT NULL, PRIMARY KEY (game, guild_id, user_id));"
+            "CREATE INDEX IF NOT EXISTS bests_rank ON bests (game, guild_id, best);"
+        )
+        self._connection.commit()
+
+    def record(self, game, guild_id, user_id, score):
+        """Queue a finished game's result. ``guild_id`` is None for games played in DMs."""
+        if game not in LEADERBOARDS:
+            raise ValueError(f"Unknown leaderboard: {game!r}")
+        self._ensure_running()
+        self._queue.put_nowait((game, guild_id or GLOBAL, user_id, int(score), time.time()))
+        self.recorded += 1
+        if self._queue.qsize() == 1 or self._queue.qsize() >= self.max_batch:
+            self._wakeup.set()  # Start a batch, or write a full one early
+
+    def top(self, game, guild_id=None):
+        """The cached top entries of a leaderboard as (user_id, best, games), best first."""
+        return self._top.get((game, guild_id or GLOBAL), [])
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            # Set by the first result of a batch, then again only if the batch fills up early.
+            # Results stay in the queue while the batch fills, so close() can still write them.
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error writing game results: {e}")
+
+    async def flush(self):
+        """Write every queued result now and fold it into the cached leaderboards."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while self._queue is not None and not self._queue.empty():
+                batch = []
+                while len(batch) < self.max_batch and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                for game, guild_id, user_id, best, games in await asyncio.to_thread(self._write, batch):
+                    self._merge(game, guild_id, user_id, best, games)
+                self.written += len(batch)
+                self.batches += 1
+
+    def _merge(self, game, guild_id, user_id, best, games):
+        leaderboard = LEADERBOARDS[game]
+        board = self._top.setdefault((game, guild_id), [])
+        for i, entry in enumerate(board):
+            if entry[0] == user_id:
+                del board[i]
+                break
+        entry = (user_id, best, games)
+        if len(board) >= self.top_n and _rank_key(leaderboard, entry) > _rank_key(leaderboard, board[-1]):
+            return
+        bisect.insort(board, entry, key=lambda e: _rank_key(leaderboard, e))
+        del board[self.top_n:]
+
+    async def load(self):
+        """Fill the leaderboard cache from disk. Called once before the cache is served."""
+        await self.flush()
+        async with self._lock:  # No batch is merged into the cache between reading and replacing it
+            rows = await asyncio.to_thread(self._read_top)
+            top = {}
+            for game, guild_id, user_id, best, games in rows:
+                top.setdefault((game, guild_id), []).append((user_id, best, games))
+            self._top = top
+        if self.refresh_interval and self._refresh_task is None:
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self):
+        """Pick up the results other processes wrote to the shared database."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Error reading leaderboards: {e}")
+
+    def _write(self, batch):
+        """Insert a batch and return the updated (game, guild_id, user_id, best, games) rows it touched."""
+        upserts = {aggregate: [] for aggregate in _AGGREGATES}
+        touched = {}
+        for game, guild_id, user_id, score, played_at in batch:
+            rows = upserts[LEADERBOARDS[game].aggregate]
+            rows.append((game, GLOBAL, user_id, score))
+            touched[(game, GLOBAL, user_id)] = None
+            if guild_id != GLOBAL:
+                rows.append((game, guild_id, user_id, score))
+                touched[(game, guild_id, user_id)] = None
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO results (game, guild_id, user_id, score, played_at) VALUES (?, ?, ?, ?, ?)", batch
+            )
+            for aggregate, rows in upserts.items():
+                if rows:
+                    self._connection.executemany(_AGGREGATES[aggregate], rows)
+
+        select = "SELECT best, games FROM bests WHERE game = ? AND guild_id = ? AND user_id = ?"
+        return [key + self._connection.execute(select, key).fetchone() for key in touched]
+
+    def _read_top(self):
+        rows = []
+        for game, leaderboard in LEADERBOARDS.items():
+            order = "best DESC" if leaderboard.descending else "best"
+            rows += self._connection.execute(
+                "SELECT game, guild_id, user_id, best, games FROM ("
+                f"SELECT *, ROW_NUMBER() OVER (PARTITION BY guild_id ORDER BY {order}, user_id) AS position "
+                "FROM bests WHERE game = ?) WHERE position <= ? ORDER BY guild_id, position",
+                (game, self.top_n)
+            ).fetchall()
+        return rows
+
+    async def close(self):
+        """Write outstanding results and close the database."""
+        for task in (self._task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+        self._task = self._refresh_task = None
+        await self.flush()
+        await asyncio.to_thread(self._connection.close)
+
+
+def get_stats(bot):
+    """Return the bot's StatsService, opening the default database on first use."""
+    stats = getattr(bot, "stats", None)
+    if stats is None:
+        stats = bot.stats = StatsService()
+    return stats
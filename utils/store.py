@@ -0,0 +1,171 @@
+"""
+Durable session store so games survive restarts, crashes and cog reloads.
+
+Cogs mark sessions dirty with ``save`` (a dict assignment, no I/O) and remove them
+with ``delete``. A background task writes the latest state of every dirty session
+behind, in one transaction per batch, from a worker thread. Repeated clicks on the
+same game between flushes collapse into a single write.
+
+``SessionStore`` is the pluggable interface; ``SQLiteSessionStore`` is the default
+backend (SQLite in WAL mode).
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+
+from utils.dictionary import ROOT_DIR
+
+DEFAULT_PATH = os.path.join(ROOT_DIR, "data", "sessions.sqlite3")
+FLUSH_INTERVAL = 2.0  # Seconds between write-behind flushes
+MAX_BATCH = 5000      # Flush early once this many sessions are dirty
+
+
+class SessionStore:
+    """Write-behind session store. Subclasses implement the blocking ``_write``/``_read``/``_close``."""
+
+    def __init__(self, flush_interval=FLUSH_INTERVAL, max_batch=MAX_BATCH):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending = {}  # (namespace, key) -> session, or None to delete
+        self._lock = None
+        self._wakeup = None
+        self._task = None
+        self.writes = 0
+        self.flushes = 0
+
+    def save(self, namespace, key, session):
+        """Mark a session dirty. It is serialized with ``to_dict`` at the next flush."""
+        self._pending[(namespace, str(key))] = session
+        self._ensure_running()
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def delete(self, namespace, key):
+        self._pending[(namespace, str(key))] = None
+        self._ensure_running()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._lock = asyncio.Lock()
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error flushing game sessions: {e}")
+
+    async def flush(self):
+        """Write every dirty session now."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            # Serialize on the event loop so the worker thread never sees a half-updated session
+            now = time.time()
+            upserts = []
+            deletes = []
+            for (namespace, key), session in pending.items():
+                if session is None:
+                    deletes.append((namespace, key))
+                else:
+                    upserts.append((namespace, key, json.dumps(session.to_dict()), now))
+            try:
+                await asyncio.to_thread(self._write, upserts, deletes)
+            except BaseException:
+                # Keep the batch for the next flush, behind anything saved while it was being written
+                self._pending = {**pending, **self._pending}
+                raise
+            self.writes += len(pending)
+            self.flushes += 1
+
+    async def load(self, namespace):
+        """Return {key: data dict} for every stored session in ``namespace``."""
+        await self.flush()
+        rows = await asyncio.to_thread(self._read, namespace)
+        return {key: json.loads(data) for key, data in rows}
+
+    async def restore(self, namespace, session_class):
+        """
+        Return (session, data dict) pairs for every stored session in ``namespace``.
+        Rows saved in an older format that ``session_class.from_dict`` can't read are deleted.
+        """
+        sessions = []
+        for key, data in (await self.load(namespace)).items():
+            try:
+                sessions.append((session_class.from_dict(data), data))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Dropping unreadable {namespace} session {key}: {e!r}")
+                self.delete(namespace, key)
+        return sessions
+
+    async def close(self):
+        """Flush outstanding writes and release the backend."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        await asyncio.to_thread(self._close)
+
+    def _write(self, upserts, deletes):
+        raise NotImplementedError
+
+    def _read(self, namespace):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path=DEFAULT_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Only ever used from one worker thread at a time (flushes are serialized by the lock)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, updated REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.commit()
+
+    def _write(self, upserts, deletes):
+        with self._connection:
+            if upserts:
+                self._connection.executemany(
+                    "INSERT INTO sessions (namespace, key, data, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                    upserts
+                )
+            if deletes:
+                self._connection.executemany("DELETE FROM sessions WHERE namespace = ? AND key = ?", deletes)
+
+    def _read(self, namespace):
+        return self._connection.execute("SELECT key, data FROM sessions WHERE namespace = ?", (namespace,)).fetchall()
+
+    def _close(self):
+        self._connection.close()
+
+
+def get_store(bot):
+    """Return the bot's session store, opening the default SQLite store on first use."""
+    store = getattr(bot, "session_store", None)
+    if store is None:
+        store = bot.session_store = SQLiteSessionStore()
+    return store
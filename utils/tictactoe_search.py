@@ -0,0 +1,195 @@
+"""
+Time-bounded game-tree search for k-in-a-row boards larger than 3x3.
+
+Negamax with alpha-beta pruning, iterative deepening and a Zobrist-hashed
+transposition table. Moves are ordered by the transposition table's best move,
+then by how many win lines pass through each cell. Searches stop at a deadline
+and return the best move of the deepest completed iteration.
+
+``best_move`` only takes plain ints so it can be submitted to a
+``ProcessPoolExecutor`` and keep deep searches off the event loop.
+"""
+import random
+import time
+
+from utils.bitboard import get_geometry
+
+WIN_SCORE = 1_000_000
+MATE_BOUND = WIN_SCORE - 1000  # Scores beyond this are forced wins/losses
+LINE_WEIGHTS = (0, 1, 10, 100, 1000, 10000)
+CHECK_EVERY = 1024  # Nodes between deadline checks
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+_zobrist_keys = {}
+
+
+def _get_zobrist(geometry):
+    """Return per-cell keys for X and O plus a side-to-move key, seeded per geometry."""
+    keys = _zobrist_keys.get((geometry.size, geometry.win_length))
+    if keys is None:
+        rng = random.Random(geometry.size * 100 + geometry.win_length)
+        keys = (
+            tuple(rng.getrandbits(64) for _ in range(geometry.cells)),
+            tuple(rng.getrandbits(64) for _ in range(geometry.cells)),
+            rng.getrandbits(64),
+        )
+        _zobrist_keys[(geometry.size, geometry.win_length)] = keys
+    return keys
+
+
+def _static_order(geometry):
+    """Cells sorted by the number of win lines through them (centre first)."""
+    return sorted(range(geometry.cells), key=lambda cell: -len(geometry.cell_lines[cell]))
+
+
+def _hash(geometry, x, o, turn):
+    x_keys, o_keys, turn_key = _get_zobrist(geometry)
+    h = turn_key if turn else 0
+    for cell in range(geometry.cells):
+        if x >> cell & 1:
+            h ^= x_keys[cell]
+        elif o >> cell & 1:
+            h ^= o_keys[cell]
+    return h
+
+
+def _completes_line(geometry, mask, cell):
+    for line in geometry.cell_lines[cell]:
+        if mask & line == line:
+            return True
+    return False
+
+
+class _Search:
+    def __init__(self, geometry, deadline):
+        self.geometry = geometry
+        self.deadline = deadline
+        self.x_keys, self.o_keys, self.turn_key = _get_zobrist(geometry)
+        self.order = _static_order(geometry)
+        self.table = {}
+        self.nodes = 0
+
+    def evaluate(self, x, o, turn):
+        """Score open lines from the point of view of the side to move."""
+        score = 0
+        for line in self.geometry.win_lines:
+            x_count = bin(x & line).count("1")
+            o_count = bin(o & line).count("1")
+            if x_count and not o_count:
+                score += LINE_WEIGHTS[x_count]
+            elif o_count and not x_count:
+                score -= LINE_WEIGHTS[o_count]
+        return -score if turn else score
+
+    def ordered_moves(self, empty, first):
+        moves = [cell for cell in self.order if empty >> cell & 1 and cell != first]
+        if first is not None and empty >> first & 1:
+            moves.insert(0, first)
+        return moves
+
+    def negamax(self, x, o, turn, h, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout
+
+        empty = self.geometry.full_mask & ~(x | o)
+        if not empty:
+            return 0
+        if depth == 0:
+            return self.evaluate(x, o, turn)
+
+        alpha_orig = alpha
+        tt_move = None
+        entry = self.table.get(h)
+        if entry is not None:
+            entry_depth, value, flag, tt_move = entry
+            if entry_depth >= depth:
+                # Forced-win scores are stored relative to the node, not the root
+                if value > MATE_BOUND:
+                    value -= ply
+                elif value < -MATE_BOUND:
+                    value += ply
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_score, best_move = -WIN_SCORE - 1, None
+        for cell in self.ordered_moves(empty, tt_move):
+            bit = 1 << cell
+            if turn:
+                child_x, child_o, mover = x, o | bit, o | bit
+                child_h = h ^ self.o_keys[cell] ^ self.turn_key
+            else:
+                child_x, child_o, mover = x | bit, o, x | bit
+                child_h = h ^ self.x_keys[cell] ^ self.turn_key
+
+            if _completes_line(self.geometry, mover, cell):
+                score = WIN_SCORE - ply
+            else:
+                score = -self.negamax(child_x, child_o, turn ^ 1, child_h, depth - 1, -beta, -alpha, ply + 1)
+
+            if score > best_score:
+                best_score, best_move = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        stored = best_score
+        if stored > MATE_BOUND:
+            stored += ply
+        elif stored < -MATE_BOUND:
+            stored -= ply
+        flag = UPPER if best_score <= alpha_orig else LOWER if best_score >= beta else EXACT
+        self.table[h] = (depth, stored, flag, best_move)
+        return best_score
+
+
+def quick_move(x, o, turn, size, win_length):
+    """
+    Cheap fallback move: win if possible, otherwise block, otherwise take the
+    empty cell with the most win lines through it.
+    """
+    geometry = get_geometry(size, win_length)
+    empty = geometry.full_mask & ~(x | o)
+    mine, theirs = (o, x) if turn else (x, o)
+    order = [cell for cell in _static_order(geometry) if empty >> cell & 1]
+    for mask in (mine, theirs):
+        for cell in order:
+            if _completes_line(geometry, mask | 1 << cell, cell):
+                return cell
+    return order[0] if order else None
+
+
+def best_move(x, o, turn, size, win_length, time_limit):
+    """
+    Return the best cell for the side to move found within ``time_limit`` seconds.
+    """
+    geometry = get_geometry(size, win_length)
+    search = _Search(geometry, time.monotonic() + time_limit)
+    root_hash = _hash(geometry, x, o, turn)
+    empty = geometry.full_mask & ~(x | o)
+    empties = bin(empty).count("1")
+
+    best = quick_move(x, o, turn, size, win_length)
+    for depth in range(1, empties + 1):
+        try:
+            search.negamax(x, o, turn, root_hash, depth, -WIN_SCORE - 1, WIN_SCORE + 1, 0)
+        except SearchTimeout:
+            break
+        _, score, _, move = search.table[root_hash]
+        if move is not None:
+            best = move
+        if abs(score) > MATE_BOUND:
+            break  # The outcome is already decided
+    return best
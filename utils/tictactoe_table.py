@@ -0,0 +1,182 @@
+"""
+Precomputed perfect-play table for 3x3 Tic-Tac-Toe.
+
+Every reachable position (X always moves first) is solved once and stored
+under its canonical encoding, i.e. the smallest encoding among the 8
+rotations/reflections of the board. A position is encoded as
+``x_mask | o_mask << 9`` where bit ``row * 3 + col`` marks an occupied cell.
+
+Scores follow the convention of the original minimax AI: from O's point of
+view, ``10 - depth`` for an O win, ``depth - 10`` for an X win and ``0`` for
+a draw, where ``depth`` is counted from the position *after* the move.
+"""
+import os
+import struct
+
+from utils.bitboard import FULL_MASK, IS_WIN
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "tictactoe_table.bin")
+
+_RECORD = struct.Struct("<IBb")  # canonical code, move (0-8), score
+
+
+def _build_symmetries():
+    """Return the 8 board symmetries as cell permutations (cell -> new cell)."""
+    def rotate(r, c):
+        return c, 2 - r
+
+    def reflect(r, c):
+        return r, 2 - c
+
+    perms = []
+    for flip in (False, True):
+        for turns in range(4):
+            perm = []
+            for cell in range(9):
+                r, c = divmod(cell, 3)
+                if flip:
+                    r, c = reflect(r, c)
+                for _ in range(turns):
+                    r, c = rotate(r, c)
+                perm.append(r * 3 + c)
+            perms.append(tuple(perm))
+    return perms
+
+
+SYMMETRIES = _build_symmetries()
+INVERSE_SYMMETRIES = [tuple(perm.index(cell) for cell in range(9)) for perm in SYMMETRIES]
+
+# For each symmetry, the image of every possible 9-bit mask
+_MASK_MAPS = []
+for _perm in SYMMETRIES:
+    _images = []
+    for _mask in range(512):
+        _image = 0
+        for _cell in range(9):
+            if _mask >> _cell & 1:
+                _image |= 1 << _perm[_cell]
+        _images.append(_image)
+    _MASK_MAPS.append(tuple(_images))
+
+
+def encode(x_mask, o_mask):
+    return x_mask | o_mask << 9
+
+
+def board_to_masks(board):
+    """Convert a list-of-lists board of "X"/"O"/None into (x_mask, o_mask)."""
+    x_mask = o_mask = 0
+    for row in range(3):
+        for col in range(3):
+            if board[row][col] == "X":
+                x_mask |= 1 << (row * 3 + col)
+            elif board[row][col] == "O":
+                o_mask |= 1 << (row * 3 + col)
+    return x_mask, o_mask
+
+
+def canonical(x_mask, o_mask):
+    """Return (canonical code, index of the symmetry that produced it)."""
+    best_code, best_sym = None, 0
+    for sym, images in enumerate(_MASK_MAPS):
+        code = images[x_mask] | images[o_mask] << 9
+        if best_code is None or code < best_code:
+            best_code, best_sym = code, sym
+    return best_code, best_sym
+
+
+def _shift(score):
+    """Move a score one ply further away from its terminal position."""
+    if score > 0:
+        return score - 1
+    if score < 0:
+        return score + 1
+    return 0
+
+
+def build_table():
+    """
+    Solve every reachable position.
+    Returns a dict mapping canonical code -> (best move, best score), where the
+    move is a cell index in the canonical orientation.
+    """
+    table = {}
+    values = {}
+
+    def solve(x_mask, o_mask):
+        # Value of the position for O, with depth counted from this position
+        if IS_WIN[o_mask]:
+            return 10
+        if IS_WIN[x_mask]:
+            return -10
+        if x_mask | o_mask == FULL_MASK:
+            return 0
+
+        code, sym = canonical(x_mask, o_mask)
+        if code in values:
+            return values[code]
+
+        # Solve in the canonical orientation so moves are stored consistently
+        x_mask, o_mask = _MASK_MAPS[sym][x_mask], _MASK_MAPS[sym][o_mask]
+        o_to_move = bin(x_mask).count("1") > bin(o_mask).count("1")
+        best_move, best_score = None, None
+        for cell in range(9):
+            bit = 1 << cell
+            if (x_mask | o_mask) & bit:
+                continue
+            if o_to_move:
+                score = solve(x_mask, o_mask | bit)
+                better = best_score is None or score > best_score
+            else:
+                score = solve(x_mask | bit, o_mask)
+                better = best_score is None or score < best_score
+            if better:
+                best_move, best_score = cell, score
+
+        table[code] = (best_move, best_score)
+        values[code] = _shift(best_score)
+        return values[code]
+
+    solve(0, 0)
+    return table
+
+
+def save_table(table, path=TABLE_PATH):
+    with open(path, "wb") as file:
+        for code in sorted(table):
+            move, score = table[code]
+            file.write(_RECORD.pack(code, move, score))
+
+
+def load_table(path=TABLE_PATH):
+    """Load the table from disk, solving it in-process if the file is missing."""
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return build_table()
+    return {code: (move, score) for code, move, score in _RECORD.iter_unpack(data)}
+
+
+_table = None
+
+
+def get_table():
+    """Return the process-wide table, loading it on first use."""
+    global _table
+    if _table is None:
+        _table = load_table()
+    return _table
+
+
+def lookup(x_mask, o_mask):
+    """
+    Return (cell, score) of the optimal move for the side to move,
+    or None if the position is terminal or unreachable.
+    """
+    code, sym = canonical(x_mask, o_mask)
+    entry = get_table().get(code)
+    if entry is None:
+        return None
+    move, score = entry
+    return INVERSE_SYMMETRIES[sym][move], score
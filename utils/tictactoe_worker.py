@@ -0,0 +1,142 @@
+"""
+Worker processes for the Tic-Tac-Toe AI's searches on 4x4/5x5 boards.
+
+Each worker runs this module (``python -m utils.tictactoe_worker``), so it only imports the
+search, not the bot. It reads one search per line on stdin as a JSON list of
+``tictactoe_search.best_move`` arguments and answers each with the chosen cell.
+
+``SearchPool`` keeps the workers running, restarting any that die, and hands them the
+queued moves in order. The search time of each move shrinks as moves queue up, so under
+load every game still gets a searched reply in time rather than a few getting the full
+budget and the rest timing out.
+"""
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+import time
+
+from utils.tictactoe_search import best_move, quick_move
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIN_SEARCH = 0.05    # Below this much search time a move is played by quick_move instead
+REPLY_MARGIN = 0.2   # Seconds kept back from the deadline to send the answer
+RESTART_DELAY = 1.0  # Seconds before restarting a worker that died
+
+log = logging.getLogger(__name__)
+
+
+def default_workers(processes=1):
+    """
+    Workers for one of ``processes`` bot processes sharing the machine (cluster mode): an
+    equal share of the CPUs, less one for that process's event loop, but at least one.
+    """
+    return max((os.cpu_count() or 1) // processes - 1, 1)
+
+
+def fallback_counter(metrics):
+    return metrics.counter("ai_fallback_moves", "AI moves played by quick_move instead of a search", ("reason",))
+
+
+class SearchPool:
+    def __init__(self, workers, time_limit, metrics=None):
+        self.workers = workers
+        self.time_limit = time_limit
+        self._late = None if metrics is None else fallback_counter(metrics).labels("late")
+        self._queue = None  # ((x, o, turn, size, win_length), deadline, future), oldest first
+        self._tasks = []
+        self.searched = 0  # Moves searched by a worker
+        self.quick = 0     # Moves that were too late to search
+
+    async def start(self):
+        """Start the workers and wait until every one of them is ready to search."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        ready = [loop.create_future() for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._run(started)) for started in ready]
+        try:
+            await asyncio.gather(*ready)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def best_move(self, x, o, turn, size, win_length, timeout):
+        """The move a worker found, answered within ``timeout`` seconds of being asked."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(((x, o, turn, size, win_length), time.monotonic() + timeout, future))
+        return await future
+
+    def budget(self, deadline):
+        """Search time for a move: the full limit while no others wait, less the more do, and never past its deadline."""
+        share = self.time_limit * self.workers / (self.workers + self._queue.qsize())
+        return min(share, deadline - time.monotonic() - REPLY_MARGIN)
+
+    async def _run(self, started):
+        while True:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", __name__, cwd=ROOT_DIR,
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE
+            )
+            future = None
+            try:
+                if await process.stdout.readline() != b"ready\n":
+                    raise ConnectionError(f"search worker exited with code {await process.wait()}")
+                if not started.done():
+                    started.set_result(None)
+                while True:
+                    args, deadline, future = await self._queue.get()
+                    if future.done():
+                        continue  # The game stopped waiting for it
+                    budget = self.budget(deadline)
+                    if budget < MIN_SEARCH:
+                        self.quick += 1
+                        if self._late is not None:
+                            self._late.inc()
+                        future.set_result(quick_move(*args))
+                        continue
+                    process.stdin.write(json.dumps([*args, budget]).encode() + b"\n")
+                    await process.stdin.drain()
+                    line = await process.stdout.readline()
+                    if not line:
+                        raise ConnectionError(f"search worker exited with code {await process.wait()}")
+                    self.searched += 1
+                    if not future.done():
+                        future.set_result(json.loads(line))
+            except (OSError, ValueError, ConnectionError) as e:
+                log.warning("Search worker failed: %r", e)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                if not started.done():
+                    started.set_exception(e)
+                    return
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+            await asyncio.sleep(RESTART_DELAY)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                future.cancel()
+
+
+def main():
+    # The bot stops its workers itself; don't die with a traceback on Ctrl+C in its terminal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    print("ready", flush=True)
+    for line in sys.stdin:
+        print(json.dumps(best_move(*json.loads(line))), flush=True)
+
+
+if __name__ == "__main__":
+    main()
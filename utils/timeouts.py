@@ -0,0 +1,138 @@
+"""
+Shared timeout service for game sessions.
+
+A single task sleeps until the earliest deadline in a min-heap, so idle cost does
+not grow with the number of live games. Deadlines are keyed (e.g. ``("wordle", channel_id)``)
+and can be pushed back cheaply: extending a deadline only updates the entry, and the
+stale heap item is re-queued when it comes up.
+
+With metrics, each expiry callback's run time is recorded under ``timeout_seconds`` by
+the key's namespace.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+
+from utils.metrics import get_metrics
+
+
+class TimeoutScheduler:
+    def __init__(self, metrics=None):
+        self._heap = []     # (deadline, sequence, key)
+        self._entries = {}  # key -> [deadline, sequence, callback]
+        self._counter = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._expiring = set()  # Running expiry callbacks; the loop only keeps weak references to tasks
+        self._latency = None if metrics is None else metrics.histogram(
+            "timeout_seconds", "Time to handle an expired game timeout", ("namespace",)
+        )
+        self._errors = None if metrics is None else metrics.counter(
+            "handler_errors", "Exceptions raised by game handlers and callbacks", ("source",)
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _push(self, deadline, sequence, key):
+        self._ensure_running()
+        heapq.heappush(self._heap, (deadline, sequence, key))
+        if self._heap[0][1] == sequence:
+            # New earliest deadline: wake the runner so it doesn't oversleep
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def schedule(self, key, delay, callback):
+        """Call ``await callback()`` after ``delay`` seconds unless rescheduled or cancelled. Replaces any existing deadline for ``key``."""
+        sequence = next(self._counter)
+        deadline = time.monotonic() + delay
+        self._entries[key] = [deadline, sequence, callback]
+        self._push(deadline, sequence, key)
+
+    def reschedule(self, key, delay):
+        """Move the deadline for ``key`` to ``delay`` seconds from now. Returns False if it isn't scheduled."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        deadline = time.monotonic() + delay
+        if deadline >= entry[0]:
+            # Later deadline: the existing heap item will be re-queued when it expires
+            entry[0] = deadline
+        else:
+            entry[0], entry[1] = deadline, next(self._counter)
+            self._push(deadline, entry[1], key)
+        return True
+
+    def cancel(self, key):
+        """Drop the deadline for ``key``; its heap item is discarded lazily."""
+        return self._entries.pop(key, None) is not None
+
+    def cancel_namespace(self, namespace):
+        """Drop every deadline whose key is a tuple starting with ``namespace`` (used on cog unload)."""
+        for key in [key for key in self._entries if isinstance(key, tuple) and key and key[0] == namespace]:
+            del self._entries[key]
+
+    def close(self):
+        self._entries.clear()
+        self._heap.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                _, sequence, key = heapq.heappop(self._heap)
+                entry = self._entries.get(key)
+                if entry is None or entry[1] != sequence:
+                    continue  # Cancelled or replaced
+                if entry[0] > now:
+                    heapq.heappush(self._heap, (entry[0], sequence, key))  # Deadline was extended
+                    continue
+                del self._entries[key]
+                # Run each expiry separately so a slow edit doesn't delay the others
+                task = asyncio.create_task(self._expire(key, entry[2]))
+                self._expiring.add(task)
+                task.add_done_callback(self._expiring.discard)
+
+    async def _expire(self, key, callback):
+        namespace = key[0] if isinstance(key, tuple) and key else "other"
+        start = time.perf_counter()
+        try:
+            await callback()
+        except Exception as e:
+            print(f"Error in timeout handling for {key}: {e}")
+            if self._errors is not None:
+                self._errors.labels(f"timeout:{namespace}").inc()
+        if self._latency is not None:
+            self._latency.labels(namespace).observe(time.perf_counter() - start)
+
+
+def get_scheduler(bot):
+    """Return the bot's shared TimeoutScheduler, creating it on first use."""
+    scheduler = getattr(bot, "timeouts", None)
+    if scheduler is None:
+        scheduler = bot.timeouts = TimeoutScheduler(get_metrics(bot))
+    return scheduler
@@ -0,0 +1,158 @@
+"""
+Feedback-pattern matrix and entropy-based guess suggestions for Wordle.
+
+The pattern of every guess against every answer is computed with vectorized NumPy,
+encoded in base 3 (``sum(feedback[i] * 3 ** i)`` with ABSENT=0, PRESENT=1, CORRECT=2)
+and cached on disk as a memory-mapped ``.npy`` file keyed by a hash of the word list.
+Duplicate letters follow the same rules as ``utils.dictionary.score_guess``.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+from utils.dictionary import ROOT_DIR, score_guess, encode_feedback
+
+CACHE_DIR = os.path.join(ROOT_DIR, "data", "cache")
+CHUNK_SIZE = 256  # Guesses per vectorized block, bounds temporary memory
+ENTROPY_BLOCK = 1 << 20  # Pattern counts per block of guesses scored by ``entropies``, bounds temporary memory
+
+
+def _as_array(words):
+    return np.frombuffer("".join(words).encode("ascii"), dtype=np.uint8).reshape(len(words), -1) - 65
+
+
+def compute_patterns(guesses, answers):
+    """Return a (len(guesses), len(answers)) uint8/uint16 matrix of base-3 patterns."""
+    length = len(guesses[0]) if guesses else 0
+    dtype = np.uint8 if 3 ** length <= 256 else np.uint16
+    result = np.empty((len(guesses), len(answers)), dtype=dtype)
+    if not len(guesses) or not len(answers):
+        return result
+
+    guess_letters = _as_array(guesses)
+    answer_letters = _as_array(answers)
+    powers = (3 ** np.arange(length)).astype(np.uint16)
+
+    for start in range(0, len(guesses), CHUNK_SIZE):
+        g = guess_letters[start:start + CHUNK_SIZE, None, :]  # (G, 1, L)
+        a = answer_letters[None, :, :]                        # (1, A, L)
+        green = g == a                                        # (G, A, L)
+        not_green = ~green
+        feedback = green.astype(np.uint16) * 2
+
+        for i in range(length):
+            letter = g[:, :, i:i + 1]  # (G, 1, 1)
+            # Copies of this letter in the answer that aren't already green
+            available = ((a == letter) & not_green).sum(axis=2)
+            # Earlier non-green copies in the guess consume those first
+            earlier = ((g[:, :, :i] == letter) & not_green[:, :, :i]).sum(axis=2)
+            feedback[:, :, i] += not_green[:, :, i] & (available > earlier)
+
+        result[start:start + CHUNK_SIZE] = (feedback * powers).sum(axis=2)
+    return result
+
+
+def dictionary_hash(guesses, answers):
+    digest = hashlib.sha1()
+    digest.update("\n".join(guesses).encode())
+    digest.update(b"\0")
+    digest.update("\n".join(answers).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_patterns(guesses, answers, cache_dir=CACHE_DIR):
+    """Return the pattern matrix, memory-mapped from the on-disk cache (computed and saved on a miss)."""
+    path = os.path.join(cache_dir, f"wordle_patterns_{dictionary_hash(guesses, answers)}.npy")
+    try:
+        return np.load(path, mmap_mode="r")
+    except (FileNotFoundError, ValueError):
+        pass
+
+    patterns = compute_patterns(guesses, answers)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        np.save(file, patterns)
+    os.replace(temporary, path)
+    return np.load(path, mmap_mode="r")
+
+
+class WordleSolver:
+    """Suggests guesses that maximise the expected information about the answer."""
+
+    def __init__(self, dictionary):
+        self.dictionary = dictionary
+        self.guesses = dictionary.words
+        self.answers = tuple(sorted(dictionary.answers))
+        self.guess_index = {word: i for i, word in enumerate(self.guesses)}
+        self.answer_index = {word: i for i, word in enumerate(self.answers)}
+        self.patterns = load_patterns(self.guesses, self.answers)
+        self.pattern_count = 3 ** dictionary.length
+        self._opening = None  # The first suggestion never changes, so it is computed once
+
+    def candidates(self, history):
+        """Indices of the answers consistent with every (guess, feedback) pair in ``history``."""
+        candidates = np.arange(len(self.answers))
+        for guess, feedback in history:
+            pattern = encode_feedback(feedback)
+            row = self.guess_index.get(guess)
+            if row is not None:
+                candidates = candidates[self.patterns[row, candidates] == pattern]
+            else:
+                candidates = np.array(
+                    [i for i in candidates if score_guess(guess, self.answers[i]) == tuple(feedback)],
+                    dtype=np.int64
+                )
+        return candidates
+
+    def entropies(self, candidates):
+        """Expected information (bits) of every guess over the candidate answers."""
+        scores = np.empty(len(self.guesses))
+        # Guesses per block, so neither the combined indices nor the counts outgrow ENTROPY_BLOCK
+        rows = max(ENTROPY_BLOCK // max(len(candidates), self.pattern_count), 1)
+        for start in range(0, len(self.guesses), rows):
+            columns = self.patterns[start:start + rows, candidates]  # (rows, candidates)
+            block = len(columns)
+            # One bincount for the whole block: each guess's patterns get their own range of bins
+            offsets = np.arange(block, dtype=np.int32)[:, None] * self.pattern_count
+            counts = np.bincount((columns + offsets).ravel(), minlength=block * self.pattern_count)
+            probabilities = counts.reshape(block, self.pattern_count) / len(candidates)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                terms = np.where(probabilities > 0, probabilities * np.log2(probabilities), 0.0)
+            scores[start:start + block] = -terms.sum(axis=1)
+        return scores
+
+    def best_guesses(self, history=(), count=1):
+        """
+        Return up to ``count`` (word, expected bits, remaining candidates) tuples,
+        best first. Ties prefer words that could still be the answer.
+        """
+        if not history and self._opening is not None and len(self._opening) >= count:
+            return self._opening[:count]
+
+        candidates = self.candidates(history)
+        if len(candidates) == 0:
+            return []
+        if len(candidates) <= 2:
+            return [(self.answers[i], 1.0 if len(candidates) == 2 else 0.0, len(candidates)) for i in candidates[:count]]
+
+        scores = self.entropies(candidates)
+        is_candidate = np.zeros(len(self.guesses), dtype=bool)
+        is_candidate[[self.guess_index[self.answers[i]] for i in candidates]] = True
+        order = np.lexsort((~is_candidate, -scores))[:count]
+        suggestions = [(self.guesses[i], float(scores[i]), len(candidates)) for i in order]
+        if not history:
+            self._opening = suggestions
+        return suggestions
+
+
+_solvers = {}
+
+
+def get_solver(dictionary):
+    """Return the process-wide solver for a dictionary, building it on first use."""
+    solver = _solvers.get(id(dictionary))
+    if solver is None:
+        solver = _solvers[id(dictionary)] = WordleSolver(dictionary)
+    return solver